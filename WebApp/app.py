@@ -3,25 +3,55 @@ FraudGuard BFSI - Banking Fraud Detection Web Platform
 Main Flask Application
 """
 import os
+import atexit
+import base64
 import csv
-from datetime import datetime
-from io import StringIO, BytesIO
+import math
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from io import StringIO
 from functools import wraps
 
 import requests
 from flask import (
     Flask, render_template, request, redirect, url_for, 
-    flash, session, jsonify, send_file, g
+    flash, session, jsonify, g, Response, stream_with_context, has_request_context
 )
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, select, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.dialects import postgresql, sqlite
 from werkzeug.security import check_password_hash, generate_password_hash
 import logging
 
+from fraud_client import FraudAPIClient
+from user_cache import CurrentUser, UserCache
+from write_behind import WriteBehindQueue
+
 # Initialize Flask app and database
 app = Flask(__name__)
 app.config.from_object('config.DevelopmentConfig')
 db = SQLAlchemy(app)
 
+@event.listens_for(Engine, 'connect')
+def configure_sqlite(dbapi_connection, connection_record):
+    """Apply the SQLite journal and sync settings to every new connection"""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={app.config['SQLITE_JOURNAL_MODE']}")
+    cursor.execute(f"PRAGMA synchronous={app.config['SQLITE_SYNCHRONOUS']}")
+    cursor.close()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    """Count SQL statements run for the current request (background threads are not counted)"""
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -64,6 +94,9 @@ class Transaction(db.Model):
     prediction = db.Column(db.Integer, default=0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # History pages and the CSV export walk this index newest-first
+    __table_args__ = (db.Index('ix_transactions_user_created_id', 'user_id', 'created_at', 'id'),)
+    
     def to_dict(self):
         """Convert to dictionary"""
         return {
@@ -79,7 +112,259 @@ class Transaction(db.Model):
             'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S')
         }
 
+class HourlyRollup(db.Model):
+    """Per-user, per-hour transaction totals, updated with every Transaction insert"""
+    __tablename__ = 'hourly_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    hour = db.Column(db.DateTime, primary_key=True)  # UTC, truncated to the hour
+    tx_count = db.Column(db.Integer, nullable=False, default=0)
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+    risk_sum = db.Column(db.Float, nullable=False, default=0)
+    probability_sum = db.Column(db.Float, nullable=False, default=0)
+
+class UserRollup(db.Model):
+    """All-time per-user transaction totals, updated with every Transaction insert"""
+    __tablename__ = 'user_rollups'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), primary_key=True)
+    tx_count = db.Column(db.Integer, nullable=False, default=0)
+    alert_count = db.Column(db.Integer, nullable=False, default=0)
+    risk_sum = db.Column(db.Float, nullable=False, default=0)
+    probability_sum = db.Column(db.Float, nullable=False, default=0)
+
+class UploadJob(db.Model):
+    """Background bulk-scoring job for an uploaded CSV"""
+    __tablename__ = 'upload_jobs'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), default='queued')  # queued, running, done, failed
+    rows_total = db.Column(db.Integer, default=0)
+    rows_done = db.Column(db.Integer, default=0)
+    rows_rejected = db.Column(db.Integer, default=0)
+    alerts = db.Column(db.Integer, default=0)
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        """Convert to dictionary, with progress as a percentage of rows processed"""
+        processed = (self.rows_done or 0) + (self.rows_rejected or 0)
+        progress = 100.0 if self.status == 'done' else (
+            round(min(processed / self.rows_total, 1) * 100, 1) if self.rows_total else 0.0
+        )
+        return {
+            'id': self.id,
+            'filename': self.filename,
+            'status': self.status,
+            'rows_total': self.rows_total,
+            'rows_done': self.rows_done,
+            'rows_rejected': self.rows_rejected,
+            'alerts': self.alerts,
+            'progress': progress,
+            'error': self.error,
+            'created_at': self.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+            'finished_at': self.finished_at.strftime('%Y-%m-%d %H:%M:%S') if self.finished_at else None
+        }
+
+# ==================== FRAUD API CLIENT ====================
+_fraud_client = None
+_fraud_client_pid = None
+_fraud_client_lock = threading.Lock()
+
+def get_fraud_client():
+    """Pooled fraud API client, created on first use in each worker process
+
+    Built lazily rather than at import so gunicorn workers forked from the
+    master never share a connection pool.
+    """
+    global _fraud_client, _fraud_client_pid
+    with _fraud_client_lock:
+        if _fraud_client is None or _fraud_client_pid != os.getpid():
+            _fraud_client = FraudAPIClient.from_config(app.config)
+            _fraud_client_pid = os.getpid()
+        return _fraud_client
+
+def transaction_columns(payload, result):
+    """Transaction table columns for one fraud API response"""
+    return {
+        'amount': payload['Transaction_Amount'],
+        'location': payload['Transaction_Location'],
+        'fraud_probability': result.get('Fraud_Probability', 0),
+        'risk_score': result.get('Final_Risk_Score', 0),
+        'alert_triggered': result.get('alert_triggered', False),
+        'alert_reasons': ','.join(result.get('alert_reasons', [])),
+        'prediction': result.get('isFraud_pred', 0)
+    }
+
+# ==================== DASHBOARD ROLLUPS ====================
+ROLLUP_COUNTERS = ('tx_count', 'alert_count', 'risk_sum', 'probability_sum')
+
+def upsert_counters(model, keys, rows):
+    """Add each row's counters to the model's row with the same keys, inserting it if missing"""
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        statement = (sqlite if dialect == 'sqlite' else postgresql).insert(model)
+        statement = statement.on_conflict_do_update(
+            index_elements=keys,
+            set_={name: getattr(model, name) + getattr(statement.excluded, name) for name in ROLLUP_COUNTERS}
+        )
+        db.session.execute(statement, rows)
+        return
+    for row in rows:
+        current = db.session.get(model, tuple(row[key] for key in keys))
+        if current is None:
+            db.session.add(model(**row))
+        else:
+            for name in ROLLUP_COUNTERS:
+                setattr(current, name, getattr(current, name) + row[name])
+
+def update_rollups(transactions):
+    """Add newly inserted transactions (dicts of Transaction columns) to the rollup tables
+
+    Runs in the caller's database transaction, so rollups commit together
+    with the rows they count.
+    """
+    hourly = {}
+    totals = {}
+    for tx in transactions:
+        hour = tx['created_at'].replace(minute=0, second=0, microsecond=0)
+        for bucket, key in ((hourly, (tx['user_id'], hour)), (totals, tx['user_id'])):
+            counters = bucket.setdefault(key, [0, 0, 0.0, 0.0])
+            counters[0] += 1
+            counters[1] += 1 if tx['alert_triggered'] else 0
+            counters[2] += tx['risk_score']
+            counters[3] += tx['fraud_probability']
+    if not totals:
+        return
+    upsert_counters(HourlyRollup, ['user_id', 'hour'], [
+        {'user_id': user_id, 'hour': hour, **dict(zip(ROLLUP_COUNTERS, counters))}
+        for (user_id, hour), counters in hourly.items()
+    ])
+    upsert_counters(UserRollup, ['user_id'], [
+        {'user_id': user_id, **dict(zip(ROLLUP_COUNTERS, counters))} for user_id, counters in totals.items()
+    ])
+
+def dashboard_stats(user_id, now=None):
+    """Dashboard figures from the rollups: at most 25 rows read, however long the history"""
+    now = now or datetime.utcnow()
+    current_hour = now.replace(minute=0, second=0, microsecond=0)
+    window_start = min(current_hour - timedelta(hours=23), datetime(now.year, now.month, now.day))
+    hours = {
+        rollup.hour: rollup
+        for rollup in HourlyRollup.query.filter(
+            HourlyRollup.user_id == user_id, HourlyRollup.hour >= window_start
+        )
+    }
+    totals = db.session.get(UserRollup, user_id)
+    
+    today = [rollup for hour, rollup in hours.items() if hour.date() == now.date()]
+    today_count = sum(rollup.tx_count for rollup in today)
+    fraud_count = sum(rollup.alert_count for rollup in today)
+    
+    labels, probability, risk = [], [], []
+    for offset in range(23, -1, -1):
+        hour = current_hour - timedelta(hours=offset)
+        rollup = hours.get(hour)
+        labels.append(f'{hour.hour}:00')
+        probability.append(round(rollup.probability_sum / rollup.tx_count, 3) if rollup else None)
+        risk.append(round(rollup.risk_sum / rollup.tx_count, 3) if rollup else None)
+    
+    return {
+        'today_count': today_count,
+        'fraud_rate': (fraud_count / today_count * 100) if today_count > 0 else 0,
+        'high_risk': totals.alert_count if totals else 0,
+        'avg_risk': (totals.risk_sum / totals.tx_count) if totals and totals.tx_count else 0,
+        'chart_data': {'labels': labels, 'data': probability, 'risk': risk}
+    }
+
+# ==================== TRANSACTION WRITES ====================
+_transaction_writer = None
+_transaction_writer_pid = None
+_transaction_writer_lock = threading.Lock()
+
+def save_transactions(rows):
+    """Insert Transaction rows and their rollup increments in one commit"""
+    db.session.execute(insert(Transaction), rows)
+    update_rollups(rows)
+    db.session.commit()
+
+def flush_transactions(rows):
+    """Write-behind flush: one commit per batch, retrying row by row so a bad row only drops itself"""
+    with app.app_context():
+        try:
+            save_transactions(rows)
+            return
+        except Exception:
+            db.session.rollback()
+            if len(rows) == 1:
+                raise
+            logger.exception(f"Batch insert of {len(rows)} transactions failed; retrying one at a time")
+        for row in rows:
+            try:
+                save_transactions([row])
+            except Exception:
+                db.session.rollback()
+                logger.exception(f"Dropped transaction {row['transaction_id']}")
+
+def get_transaction_writer():
+    """Write-behind queue for /predict inserts, started on first use in each worker process"""
+    global _transaction_writer, _transaction_writer_pid
+    with _transaction_writer_lock:
+        if _transaction_writer is None or _transaction_writer_pid != os.getpid():
+            _transaction_writer = WriteBehindQueue(
+                flush_transactions,
+                batch_size=app.config['DB_WRITE_BATCH_SIZE'],
+                linger_seconds=app.config['DB_WRITE_LINGER_MS'] / 1000,
+                max_queued=app.config['DB_WRITE_QUEUE_SIZE'],
+                name='transaction-writer'
+            )
+            _transaction_writer_pid = os.getpid()
+            atexit.register(_transaction_writer.close)
+        return _transaction_writer
+
 # ==================== AUTHENTICATION HELPERS ====================
+# Methods that may use the session's identity claims instead of a user lookup
+CLAIMS_METHODS = ('GET', 'HEAD')
+
+def load_user(user_id):
+    """UserCache loader: one primary-key query on a cache miss"""
+    user = db.session.get(User, user_id)
+    return CurrentUser.from_user(user) if user else None
+
+user_cache = UserCache(
+    load_user,
+    ttl=app.config['USER_CACHE_TTL'],
+    max_size=app.config['USER_CACHE_SIZE'],
+    claims_max_age=app.config['USER_CLAIMS_MAX_AGE']
+)
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def invalidate_cached_user(mapper, connection, user):
+    """Drop a changed or deleted user from this process's cache and revoke its claims"""
+    user_cache.invalidate(user.id)
+
+def current_user_from_session():
+    """The logged-in user for this request, with as few queries as possible
+    
+    Read-only requests trust the signed claims in the session cookie while
+    they are younger than USER_CLAIMS_MAX_AGE (no query at all). Other
+    requests, and stale claims, go through the per-process user cache, and
+    the claims are reissued from the result.
+    """
+    user_id = session['user_id']
+    claims = session.get('user_claims')
+    if request.method in CLAIMS_METHODS and user_cache.claims_valid(claims, user_id):
+        return CurrentUser.from_claims(claims)
+    
+    user = user_cache.get(user_id)
+    if user and not user_cache.claims_valid(claims, user_id):
+        session['user_claims'] = user.claims()
+    return user
+
 def login_required(f):
     """Decorator to protect routes"""
     @wraps(f)
@@ -88,8 +373,7 @@ def login_required(f):
             flash('Please log in first.', 'warning')
             return redirect(url_for('login'))
         
-        # Load user into g for use in template
-        g.user = User.query.get(session['user_id'])
+        # g.user was loaded by before_request
         if not g.user:
             session.clear()
             flash('User not found.', 'danger')
@@ -99,14 +383,31 @@ def login_required(f):
     return decorated_function
 
 # ==================== CONTEXT PROCESSORS ====================
+# Per-endpoint request and SQL statement totals for this worker, see /api/db/stats
+query_totals = {}
+query_totals_lock = threading.Lock()
+
 @app.before_request
 def before_request():
     """Before each request"""
+    g.query_count = 0
     if 'user_id' in session:
-        g.user = User.query.get(session['user_id'])
+        g.user = current_user_from_session()
     else:
         g.user = None
 
+@app.after_request
+def after_request(response):
+    """Record how many SQL statements the request ran"""
+    count = g.get('query_count', 0)
+    with query_totals_lock:
+        totals = query_totals.setdefault(request.endpoint or 'unmatched', [0, 0])
+        totals[0] += 1
+        totals[1] += count
+    if app.config['QUERY_COUNT_HEADER']:
+        response.headers['X-DB-Queries'] = str(count)
+    return response
+
 @app.context_processor
 def inject_user():
     """Inject user into all templates"""
@@ -189,8 +490,9 @@ def login():
             flash('Invalid email or password.', 'danger')
             return redirect(url_for('login'))
         
-        # Set session
+        # Set session; the signed claims let read-only pages skip the user lookup
         session['user_id'] = user.id
+        session['user_claims'] = CurrentUser.from_user(user).claims()
         session.permanent = True
         app.permanent_session_lifetime = __import__('datetime').timedelta(days=7)
         
@@ -202,6 +504,8 @@ def login():
 @app.route('/logout')
 def logout():
     """User logout"""
+    if 'user_id' in session:
+        user_cache.invalidate(session['user_id'])
     session.clear()
     flash('You have been logged out.', 'info')
     return redirect(url_for('login'))
@@ -210,29 +514,8 @@ def logout():
 @login_required
 def dashboard():
     """Main dashboard"""
-    # Get statistics
-    today = datetime.utcnow().date()
-    
-    # Today's transactions
-    today_txs = Transaction.query.filter(
-        Transaction.user_id == g.user.id,
-        db.func.date(Transaction.created_at) == today
-    ).all()
-    
-    today_count = len(today_txs)
-    fraud_count = sum(1 for tx in today_txs if tx.alert_triggered)
-    fraud_rate = (fraud_count / today_count * 100) if today_count > 0 else 0
-    
-    # High-risk alerts
-    high_risk = Transaction.query.filter(
-        Transaction.user_id == g.user.id,
-        Transaction.alert_triggered == True
-    ).count()
-    
-    # Average risk score
-    avg_risk = db.session.query(db.func.avg(Transaction.risk_score)).filter(
-        Transaction.user_id == g.user.id
-    ).scalar() or 0
+    # Counts, rates and the 24-hour chart come from the rollup tables
+    stats = dashboard_stats(g.user.id)
     
     # Recent alerts (last 5)
     recent_alerts = Transaction.query.filter_by(
@@ -240,20 +523,13 @@ def dashboard():
         alert_triggered=True
     ).order_by(Transaction.created_at.desc()).limit(5).all()
     
-    # Mock time-series data for chart (last 24 hours)
-    from random import randint
-    chart_data = {
-        'labels': [f'{i}:00' for i in range(24)],
-        'data': [round(randint(10, 95) / 100, 2) for _ in range(24)]
-    }
-    
     return render_template('dashboard.html',
-                         today_count=today_count,
-                         fraud_rate=round(fraud_rate, 1),
-                         high_risk=high_risk,
-                         avg_risk=round(avg_risk, 2),
+                         today_count=stats['today_count'],
+                         fraud_rate=round(stats['fraud_rate'], 1),
+                         high_risk=stats['high_risk'],
+                         avg_risk=round(stats['avg_risk'], 2),
                          recent_alerts=recent_alerts,
-                         chart_data=chart_data)
+                         chart_data=stats['chart_data'])
 
 @app.route('/predict', methods=['GET', 'POST'])
 @login_required
@@ -293,30 +569,19 @@ def predict():
             
             # Call external API
             logger.info(f"Calling fraud detection API with payload: {payload}")
-            response = requests.post(
-                app.config['FRAUD_API_URL'],
-                json=payload,
-                timeout=app.config['FRAUD_API_TIMEOUT']
-            )
-            response.raise_for_status()
-            
-            result = response.json()
+            result = get_fraud_client().detect(payload)
             logger.info(f"API Response: {result}")
             
-            # Save to database
-            transaction = Transaction(
-                user_id=g.user.id,
-                transaction_id=str(result.get('Transaction_ID', int(datetime.utcnow().timestamp() * 1000))),
-                amount=payload['Transaction_Amount'],
-                location=payload['Transaction_Location'],
-                fraud_probability=result.get('Fraud_Probability', 0),
-                risk_score=result.get('Final_Risk_Score', 0),
-                alert_triggered=result.get('alert_triggered', False),
-                alert_reasons=','.join(result.get('alert_reasons', [])),
-                prediction=result.get('isFraud_pred', 0)
-            )
-            db.session.add(transaction)
-            db.session.commit()
+            # Save to database; with DB_WRITE_BEHIND the row is committed by the
+            # background writer in the next batch (or here if its queue is full)
+            row = {
+                'user_id': g.user.id,
+                'transaction_id': str(result.get('Transaction_ID', int(datetime.utcnow().timestamp() * 1000))),
+                'created_at': datetime.utcnow(),
+                **transaction_columns(payload, result)
+            }
+            if not (app.config['DB_WRITE_BEHIND'] and get_transaction_writer().submit(row)):
+                save_transactions([row])
             
             # Determine risk level
             risk_level = 'SAFE'
@@ -349,92 +614,330 @@ def predict():
     # Render form with defaults
     return render_template('predict.html', show_result=False)
 
+# ==================== HISTORY ====================
+EXPORT_HEADER = ['Transaction ID', 'Date', 'Amount (UZS)', 'Location',
+                 'Fraud Probability', 'Risk Score', 'Alert', 'Reasons']
+EXPORT_CHUNK_ROWS = 1000
+
+def encode_cursor(tx):
+    """Opaque page cursor for the (created_at, id) position of a transaction"""
+    position = f'{tx.created_at.isoformat()}|{tx.id}'
+    return base64.urlsafe_b64encode(position.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError on a malformed cursor"""
+    try:
+        position = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, tx_id = position.split('|')
+        return datetime.fromisoformat(created_at), int(tx_id)
+    except (UnicodeDecodeError, ValueError, TypeError) as e:
+        raise ValueError('invalid cursor') from e
+
+def history_page(user_id, per_page, after=None, before=None):
+    """One page of a user's history, newest first, by keyset on (created_at, id)
+    
+    ``after`` returns the page older than that cursor and ``before`` the page
+    newer than it. Each page is a range scan of ix_transactions_user_created_id,
+    so it costs the same on page 1 and page 10,000, with no OFFSET or COUNT(*).
+    Returns (transactions, next_cursor, prev_cursor).
+    """
+    position = tuple_(Transaction.created_at, Transaction.id)
+    query = Transaction.query.filter(Transaction.user_id == user_id)
+    
+    if before:
+        rows = query.filter(position > decode_cursor(before)).order_by(
+            Transaction.created_at.asc(), Transaction.id.asc()
+        ).limit(per_page + 1).all()
+        if rows:
+            has_newer = len(rows) > per_page
+            rows = rows[:per_page][::-1]
+            return rows, encode_cursor(rows[-1]), encode_cursor(rows[0]) if has_newer else None
+        # Nothing newer than the cursor any more: show the first page
+        after = None
+    
+    if after:
+        query = query.filter(position < decode_cursor(after))
+    rows = query.order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()
+    ).limit(per_page + 1).all()
+    has_older = len(rows) > per_page
+    rows = rows[:per_page]
+    next_cursor = encode_cursor(rows[-1]) if has_older else None
+    prev_cursor = encode_cursor(rows[0]) if after and rows else None
+    return rows, next_cursor, prev_cursor
+
+def history_page_size(default):
+    """Requested page size, clamped to 1..HISTORY_MAX_PAGE_SIZE"""
+    per_page = request.args.get('per_page', default, type=int)
+    return max(1, min(per_page, app.config['HISTORY_MAX_PAGE_SIZE']))
+
+def history_total(user_id):
+    """Total transactions for a user, read from the rollup instead of COUNT(*)"""
+    totals = db.session.get(UserRollup, user_id)
+    return totals.tx_count if totals else 0
+
 @app.route('/history')
 @login_required
 def history():
     """Transaction history"""
-    page = request.args.get('page', 1, type=int)
-    per_page = 10
-    
-    # Get transactions with pagination
-    paginated = Transaction.query.filter_by(user_id=g.user.id).order_by(
-        Transaction.created_at.desc()
-    ).paginate(page=page, per_page=per_page)
+    per_page = history_page_size(app.config['HISTORY_PAGE_SIZE'])
     
-    transactions = paginated.items
+    try:
+        transactions, next_cursor, prev_cursor = history_page(
+            g.user.id, per_page, after=request.args.get('after'), before=request.args.get('before')
+        )
+    except ValueError:
+        return redirect(url_for('history'))
     
     return render_template('history.html',
                          transactions=transactions,
-                         page=page,
-                         total_pages=paginated.pages,
-                         total_transactions=paginated.total,
-                         max=max,
-                         min=min)
+                         transactions_data=[tx.to_dict() for tx in transactions],
+                         per_page=per_page,
+                         next_cursor=next_cursor,
+                         prev_cursor=prev_cursor,
+                         total_transactions=history_total(g.user.id))
 
 @app.route('/api/history')
 @login_required
 def api_history():
-    """API endpoint for history data (JSON)"""
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 10, type=int)
+    """API endpoint for history data (JSON)
+    
+    Pass the returned next_cursor as ``after`` for older transactions and
+    prev_cursor as ``before`` for newer ones.
+    """
+    per_page = history_page_size(app.config['HISTORY_PAGE_SIZE'])
     
-    paginated = Transaction.query.filter_by(user_id=g.user.id).order_by(
-        Transaction.created_at.desc()
-    ).paginate(page=page, per_page=per_page)
+    try:
+        transactions, next_cursor, prev_cursor = history_page(
+            g.user.id, per_page, after=request.args.get('after'), before=request.args.get('before')
+        )
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
     
     return jsonify({
-        'data': [tx.to_dict() for tx in paginated.items],
-        'page': page,
+        'data': [tx.to_dict() for tx in transactions],
         'per_page': per_page,
-        'total': paginated.total,
-        'pages': paginated.pages
+        'next_cursor': next_cursor,
+        'prev_cursor': prev_cursor,
+        'total': history_total(g.user.id)
     })
 
 @app.route('/export-csv')
 @login_required
 def export_csv():
-    """Export transaction history to CSV"""
-    try:
-        transactions = Transaction.query.filter_by(user_id=g.user.id).order_by(
-            Transaction.created_at.desc()
-        ).all()
-        
-        # Create CSV in memory
+    """Export transaction history to CSV
+    
+    Rows are streamed from a server-side cursor and sent EXPORT_CHUNK_ROWS at
+    a time, so memory use does not grow with the size of the history.
+    """
+    user_id = g.user.id
+    statement = select(
+        Transaction.transaction_id, Transaction.created_at, Transaction.amount, Transaction.location,
+        Transaction.fraud_probability, Transaction.risk_score, Transaction.alert_triggered,
+        Transaction.alert_reasons
+    ).where(Transaction.user_id == user_id).order_by(
+        Transaction.created_at.desc(), Transaction.id.desc()
+    ).execution_options(yield_per=EXPORT_CHUNK_ROWS)
+    
+    def generate():
         output = StringIO()
         writer = csv.writer(output)
-        writer.writerow(['Transaction ID', 'Date', 'Amount (UZS)', 'Location', 
-                        'Fraud Probability', 'Risk Score', 'Alert', 'Reasons'])
+        writer.writerow(EXPORT_HEADER)
+        try:
+            for partition in db.session.execute(statement).partitions():
+                for tx in partition:
+                    writer.writerow([
+                        tx.transaction_id,
+                        tx.created_at.strftime('%Y-%m-%d %H:%M:%S'),
+                        f"{tx.amount:,.2f}",
+                        tx.location,
+                        f"{tx.fraud_probability:.1%}",
+                        f"{tx.risk_score:.2f}",
+                        'YES' if tx.alert_triggered else 'NO',
+                        tx.alert_reasons or 'N/A'
+                    ])
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+            yield output.getvalue()
+        except Exception as e:
+            # Headers are already sent; dropping the connection marks the download as failed
+            logger.exception(f"CSV export error for user {user_id}: {e}")
+            raise
+    
+    filename = f'fraudguard_export_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/csv',
+        headers={'Content-Disposition': f'attachment; filename={filename}'}
+    )
+
+# ==================== BULK UPLOAD ====================
+# The fraud API's Transaction schema, in field order
+TRANSACTION_FIELDS = [
+    ('User_ID', int), ('Transaction_Amount', float), ('Transaction_Location', str), ('Merchant_ID', int),
+    ('Device_ID', int), ('Card_Type', str), ('Transaction_Currency', str), ('Transaction_Status', str),
+    ('Previous_Transaction_Count', int), ('Distance_Between_Transactions_km', float),
+    ('Time_Since_Last_Transaction_min', int), ('Authentication_Method', str), ('Transaction_Velocity', int),
+    ('Transaction_Category', str), ('Transaction_Hour', int), ('Transaction_Day', int), ('Transaction_Month', int),
+    ('Transaction_Weekday', int), ('Log_Transaction_Amount', float), ('Velocity_Distance_Interact', float),
+    ('Amount_Velocity_Interact', float), ('Time_Distance_Interact', float), ('Hour_sin', float),
+    ('Hour_cos', float), ('Weekday_sin', float), ('Weekday_cos', float),
+]
+
+# Threads start on the first submit, so each gunicorn worker gets its own after the fork
+upload_executor = ThreadPoolExecutor(max_workers=app.config['UPLOAD_WORKERS'], thread_name_prefix='upload')
+
+# The API keys its behavior state by int64 user and device ids and rejects others with 422
+BEHAVIOR_ID_FIELDS = ('User_ID', 'Device_ID')
+MAX_BEHAVIOR_ID = 2**63 - 1
+
+def parse_csv_value(value, cast):
+    """Cast a CSV cell the way the API validates it: integers must not have a fractional part"""
+    if value is None or value == '':
+        raise ValueError('missing value')
+    if cast is int:
+        try:
+            return int(value)
+        except ValueError:
+            number = float(value)
+        if not number.is_integer():
+            raise ValueError(f'{value} is not an integer')
+        return int(number)
+    if cast is float:
+        number = float(value)
+        if not math.isfinite(number):
+            raise ValueError(f'{value} is not a finite number')
+        return number
+    return cast(value)
+
+def parse_upload_row(row, row_number):
+    """API payload for one uploaded CSV row; raises ValueError if the API would reject it
+
+    Files without a User_ID column (like Dataset/test_dataset_100_mixed.csv)
+    use each row's Transaction_ID, so rows don't all count towards one
+    user's burst velocity.
+    """
+    payload = {}
+    for name, cast in TRANSACTION_FIELDS:
+        value = row.get(name)
+        if name == 'User_ID' and value in (None, ''):
+            value = row.get('Transaction_ID') or row_number
+        payload[name] = parse_csv_value(value, cast)
+    for name in BEHAVIOR_ID_FIELDS:
+        if not 0 <= payload[name] <= MAX_BEHAVIOR_ID:
+            raise ValueError(f'{name} {payload[name]} is out of range')
+    return payload
+
+def upload_transaction_id(job, row_number, source_id):
+    """Transaction key for an uploaded row: unique per job and row even if the CSV repeats a Transaction_ID"""
+    key = f'U{job.id}-{row_number}'
+    return f'{key}-{source_id}'[:50] if source_id else key
+
+def score_upload_chunk(job, chunk):
+    """Score one chunk with a single batch API call and insert it in one commit"""
+    results = get_fraud_client().detect_batch([payload for _, _, payload in chunk])
+    created_at = datetime.utcnow()
+    rows = [
+        {
+            'user_id': job.user_id,
+            'transaction_id': upload_transaction_id(job, row_number, source_id),
+            'created_at': created_at,
+            **transaction_columns(payload, result)
+        }
+        for (row_number, source_id, payload), result in zip(chunk, results)
+    ]
+    job.rows_done += len(rows)
+    job.alerts += sum(1 for row in rows if row['alert_triggered'])
+    save_transactions(rows)
+
+def run_upload_job(job_id, path):
+    """Stream an uploaded CSV through the fraud API in chunks (runs on upload_executor)"""
+    with app.app_context():
+        job = db.session.get(UploadJob, job_id)
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                # Count CSV records, not lines: quoted cells may contain newlines
+                job.rows_total = max(sum(1 for record in csv.reader(handle) if record) - 1, 0)
+            job.status = 'running'
+            db.session.commit()
+            
+            chunk_size = app.config['UPLOAD_CHUNK_SIZE']
+            with open(path, newline='', encoding='utf-8-sig') as handle:
+                reader = csv.DictReader(handle)
+                missing = [name for name, _ in TRANSACTION_FIELDS[1:] if name not in (reader.fieldnames or [])]
+                if missing:
+                    raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+                chunk = []
+                for row_number, row in enumerate(reader, start=1):
+                    try:
+                        chunk.append((row_number, row.get('Transaction_ID'), parse_upload_row(row, row_number)))
+                    except (TypeError, ValueError):
+                        job.rows_rejected += 1
+                    if len(chunk) >= chunk_size:
+                        score_upload_chunk(job, chunk)
+                        chunk = []
+                if chunk:
+                    score_upload_chunk(job, chunk)
+            job.status = 'done'
+        except Exception as e:
+            # Chunks committed before the failure stay in the history.
+            logger.error(f"Upload job {job_id} failed: {e}")
+            db.session.rollback()
+            job = db.session.get(UploadJob, job_id)
+            job.status = 'failed'
+            job.error = str(e)[:500]
+        finally:
+            job.finished_at = datetime.utcnow()
+            db.session.commit()
+            db.session.remove()
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+@app.route('/upload', methods=['GET', 'POST'])
+@login_required
+def upload():
+    """Bulk CSV upload; scoring runs in the background"""
+    if request.method == 'POST':
+        file = request.files.get('file')
+        if not file or not file.filename:
+            flash('Choose a CSV file to upload.', 'danger')
+            return redirect(url_for('upload'))
+        if not file.filename.lower().endswith('.csv'):
+            flash('Only .csv files are supported.', 'danger')
+            return redirect(url_for('upload'))
         
-        for tx in transactions:
-            writer.writerow([
-                tx.transaction_id,
-                tx.created_at.strftime('%Y-%m-%d %H:%M:%S'),
-                f"{tx.amount:,.2f}",
-                tx.location,
-                f"{tx.fraud_probability:.1%}",
-                f"{tx.risk_score:.2f}",
-                'YES' if tx.alert_triggered else 'NO',
-                tx.alert_reasons or 'N/A'
-            ])
+        upload_folder = app.config['UPLOAD_FOLDER']
+        os.makedirs(upload_folder, exist_ok=True)
+        path = os.path.join(upload_folder, f'{uuid.uuid4().hex}.csv')
+        file.save(path)
         
-        # Convert StringIO to BytesIO
-        output.seek(0)
-        bytes_output = BytesIO(output.getvalue().encode('utf-8'))
-        bytes_output.seek(0)
+        job = UploadJob(user_id=g.user.id, filename=file.filename[:255])
+        db.session.add(job)
+        db.session.commit()
+        upload_executor.submit(run_upload_job, job.id, path)
         
-        return send_file(
-            bytes_output,
-            mimetype='text/csv',
-            as_attachment=True,
-            download_name=f'fraudguard_export_{datetime.utcnow().strftime("%Y%m%d_%H%M%S")}.csv'
-        )
-    except Exception as e:
-        import traceback
-        error_msg = traceback.format_exc()
-        logger.error(f"CSV export error: {e}\n{error_msg}")
-        print(f"CSV export error: {e}\n{error_msg}")
-        flash('Error exporting CSV.', 'danger')
-        return redirect(url_for('history'))
+        flash(f'Upload received. Scoring {file.filename} in the background.', 'info')
+        return redirect(url_for('upload_status', job_id=job.id))
+    
+    jobs = UploadJob.query.filter_by(user_id=g.user.id).order_by(UploadJob.created_at.desc()).limit(10).all()
+    return render_template('upload.html', jobs=jobs, job=None)
+
+@app.route('/upload/<int:job_id>')
+@login_required
+def upload_status(job_id):
+    """Progress page for one upload job"""
+    job = UploadJob.query.filter_by(id=job_id, user_id=g.user.id).first_or_404()
+    return render_template('upload.html', jobs=[], job=job)
+
+@app.route('/api/upload/<int:job_id>')
+@login_required
+def api_upload_status(job_id):
+    """Upload job progress (JSON), polled by the progress page"""
+    job = UploadJob.query.filter_by(id=job_id, user_id=g.user.id).first_or_404()
+    return jsonify(job.to_dict())
 
 @app.route('/api/chat', methods=['POST'])
 @login_required
@@ -502,6 +1005,26 @@ def api_chat():
         logger.error(f"Chatbot error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/fraud-client/stats')
+@login_required
+def fraud_client_stats():
+    """Fraud API client call counts, latency percentiles and circuit state for this worker"""
+    return jsonify(get_fraud_client().stats())
+
+@app.route('/api/db/stats')
+@login_required
+def db_stats():
+    """Connection pool and write-behind queue status (this worker only)"""
+    return jsonify({
+        'backend': db.engine.dialect.name,
+        'pool': db.engine.pool.status(),
+        'user_cache': user_cache.stats(),
+        'queries_per_request': {
+            endpoint: round(queries / requests, 2) for endpoint, (requests, queries) in sorted(query_totals.items())
+        },
+        'write_behind': get_transaction_writer().stats() if app.config['DB_WRITE_BEHIND'] else None
+    })
+
 @app.route('/chatbot')
 @login_required
 def chatbot():
@@ -513,6 +1036,12 @@ def about():
     """About page"""
     return render_template('about.html')
 
+@app.errorhandler(413)
+def upload_too_large(error):
+    """Upload exceeds MAX_CONTENT_LENGTH"""
+    flash(f"File is larger than the {app.config['MAX_CONTENT_LENGTH'] // (1024 * 1024)} MB upload limit.", 'danger')
+    return redirect(url_for('upload'))
+
 @app.route('/404')
 @app.errorhandler(404)
 def not_found(error):
@@ -527,13 +1056,38 @@ def server_error(error):
 
 # ==================== CLI COMMANDS ====================
 
+def create_indexes():
+    """Add indexes declared after a table was first created (create_all skips existing tables)"""
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
 @app.cli.command()
 def init_db():
     """Initialize database"""
     with app.app_context():
         db.create_all()
+        create_indexes()
         print("Database initialized!")
 
+@app.cli.command()
+def rebuild_rollups():
+    """Recompute the dashboard rollups from the transactions table"""
+    with app.app_context():
+        HourlyRollup.query.delete()
+        UserRollup.query.delete()
+        columns = (Transaction.user_id, Transaction.created_at, Transaction.alert_triggered,
+                   Transaction.risk_score, Transaction.fraud_probability)
+        batch = []
+        for row in db.session.query(*columns).yield_per(10000):
+            batch.append(row._asdict())
+            if len(batch) >= 10000:
+                update_rollups(batch)
+                batch = []
+        update_rollups(batch)
+        db.session.commit()
+        print(f"Rollups rebuilt: {UserRollup.query.count()} users, {HourlyRollup.query.count()} hours")
+
 @app.cli.command()
 def seed_demo():
     """Seed demo data"""
@@ -556,4 +1110,5 @@ def seed_demo():
 if __name__ == '__main__':
     with app.app_context():
         db.create_all()
+        create_indexes()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,300 @@
+import base64
+import csv
+import math
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import app as webapp
+from app import CurrentUser, HourlyRollup, Transaction, UploadJob, UserRollup
+
+
+def transaction(user_id, number, created_at, alert=False, risk=0.5, probability=0.25):
+    return {
+        'user_id': user_id, 'transaction_id': f'T{user_id}-{number}', 'created_at': created_at,
+        'amount': 100.0, 'location': 'Tashkent', 'fraud_probability': probability, 'risk_score': risk,
+        'alert_triggered': alert, 'alert_reasons': '', 'prediction': int(alert),
+    }
+
+
+# ==================== AUTHENTICATION HELPERS ====================
+def session_user(method, user_id, claims):
+    with webapp.app.test_request_context('/', method=method):
+        webapp.session.update(user_id=user_id, user_claims=claims)
+        return webapp.current_user_from_session(), webapp.session['user_claims']
+
+
+def test_updating_a_user_revokes_the_claims_in_existing_sessions(db, user):
+    claims = CurrentUser.from_user(user).claims(issued_at=time.time() - 1)
+    assert session_user('GET', user.id, claims)[0].name == 'Test User'
+
+    user.name = 'Renamed User'
+    db.session.commit()
+
+    current, reissued = session_user('GET', user.id, claims)
+    assert current.name == 'Renamed User'
+    assert reissued['name'] == 'Renamed User' and reissued['iat'] > claims['iat']
+    assert session_user('POST', user.id, reissued)[0].name == 'Renamed User'
+
+
+# ==================== DASHBOARD ROLLUPS ====================
+@pytest.mark.parametrize('dialect', ['sqlite', 'other'])
+def test_rollups_add_each_insert_to_existing_rows(db, user, monkeypatch, dialect):
+    if dialect == 'other':
+        # Databases without ON CONFLICT go through the read-modify-write path
+        monkeypatch.setattr(db.session, 'get_bind', lambda: SimpleNamespace(dialect=SimpleNamespace(name=dialect)))
+    other = webapp.User(name='Other', email='other@example.com', bank_id='BANK002', password_hash='-')
+    db.session.add(other)
+    db.session.commit()
+    nine, ten = datetime(2025, 5, 1, 9, 15), datetime(2025, 5, 1, 10, 5)
+
+    webapp.save_transactions([
+        transaction(user.id, 1, nine, alert=True, risk=0.9, probability=0.8),
+        transaction(user.id, 2, nine.replace(minute=45)),
+        transaction(other.id, 1, ten),
+    ])
+    webapp.save_transactions([transaction(user.id, 3, nine.replace(minute=59)), transaction(user.id, 4, ten)])
+
+    hourly = {(row.user_id, row.hour): row for row in HourlyRollup.query}
+    assert sorted(hourly) == [(user.id, nine.replace(minute=0)), (user.id, ten.replace(minute=0)),
+                              (other.id, ten.replace(minute=0))]
+    first_hour = hourly[(user.id, nine.replace(minute=0))]
+    assert (first_hour.tx_count, first_hour.alert_count) == (3, 1)
+    assert first_hour.risk_sum == pytest.approx(1.9) and first_hour.probability_sum == pytest.approx(1.3)
+    totals = db.session.get(UserRollup, user.id)
+    assert (totals.tx_count, totals.alert_count) == (4, 1) and totals.risk_sum == pytest.approx(2.4)
+    assert db.session.get(UserRollup, other.id).tx_count == 1
+
+
+def test_dashboard_stats_read_the_rollups(db, user):
+    now = datetime(2025, 5, 1, 10, 30)
+    webapp.save_transactions([
+        transaction(user.id, 1, datetime(2025, 4, 30, 23, 10), alert=True, risk=1.0),
+        transaction(user.id, 2, datetime(2025, 5, 1, 9, 10), alert=True, risk=0.8),
+        transaction(user.id, 3, datetime(2025, 5, 1, 9, 20), risk=0.2),
+        transaction(user.id, 4, datetime(2025, 5, 1, 10, 0), risk=0.6),
+    ])
+
+    stats = webapp.dashboard_stats(user.id, now=now)
+
+    assert stats['today_count'] == 3
+    assert stats['fraud_rate'] == pytest.approx(100 / 3)
+    assert stats['high_risk'] == 2 and stats['avg_risk'] == pytest.approx(0.65)
+    chart = stats['chart_data']
+    assert chart['labels'][-1] == '10:00' and len(chart['labels']) == 24
+    assert chart['risk'][-2:] == [0.5, 0.6] and chart['risk'][-12] == 1.0
+    assert chart['risk'][-3] is None
+
+
+# ==================== TRANSACTION WRITES ====================
+def test_failed_write_behind_batch_is_retried_row_by_row(db, user):
+    webapp.save_transactions([transaction(user.id, 1, datetime(2025, 5, 1, 9, 0))])
+    rows = [transaction(user.id, n, datetime(2025, 5, 1, 9, n)) for n in (2, 1, 3)]  # T-1 is already stored
+
+    webapp.flush_transactions(rows)
+
+    ids = sorted(tx.transaction_id for tx in Transaction.query.filter_by(user_id=user.id))
+    assert ids == [f'T{user.id}-{n}' for n in (1, 2, 3)]
+    assert db.session.get(UserRollup, user.id).tx_count == 3
+
+
+# ==================== HISTORY ====================
+def page_ids(page):
+    return [tx.transaction_id for tx in page[0]]
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    tx = SimpleNamespace(created_at=datetime(2025, 5, 1, 9, 15, 30, 123456), id=42)
+    cursor = webapp.encode_cursor(tx)
+    assert '=' not in cursor
+    assert webapp.decode_cursor(cursor) == (tx.created_at, 42)
+    for garbage in ('!!!', 'bm9wZQ', base64.urlsafe_b64encode(b'2025-05-01|x').decode(), '\u00e9'):
+        with pytest.raises(ValueError):
+            webapp.decode_cursor(garbage)
+
+
+def test_history_pages_walk_both_ways_through_equal_timestamps(db, user):
+    start = datetime(2025, 5, 1, 9, 0)
+    # Pairs of transactions share a timestamp, so only the id keeps the order total
+    webapp.save_transactions([transaction(user.id, n, start + timedelta(minutes=n // 2)) for n in range(1, 8)])
+    newest_first = [f'T{user.id}-{n}' for n in range(7, 0, -1)]
+
+    first = webapp.history_page(user.id, 3)
+    second = webapp.history_page(user.id, 3, after=first[1])
+    last = webapp.history_page(user.id, 3, after=second[1])
+    assert page_ids(first) + page_ids(second) + page_ids(last) == newest_first
+    assert first[2] is None and last[1] is None
+
+    back = webapp.history_page(user.id, 3, before=last[2])
+    assert page_ids(back) == page_ids(second) and back[1:] == second[1:]
+    assert webapp.history_page(user.id, 3, before=back[2]) == (first[0], first[1], None)
+
+
+def test_history_before_the_newest_row_falls_back_to_the_first_page(db, user):
+    webapp.save_transactions([transaction(user.id, n, datetime(2025, 5, 1, 9, n)) for n in range(1, 4)])
+    newest = webapp.history_page(user.id, 2)[0][0]
+    assert page_ids(webapp.history_page(user.id, 2, before=webapp.encode_cursor(newest))) == [
+        f'T{user.id}-3', f'T{user.id}-2'
+    ]
+
+
+def test_api_history_rejects_an_invalid_cursor(db, user):
+    client = webapp.app.test_client()
+    with client.session_transaction() as session:
+        session['user_id'] = user.id
+    webapp.save_transactions([transaction(user.id, 1, datetime(2025, 5, 1, 9, 0))])
+
+    response = client.get('/api/history?per_page=500')
+    assert response.status_code == 200
+    assert response.json['per_page'] == webapp.app.config['HISTORY_MAX_PAGE_SIZE'] and response.json['total'] == 1
+    assert client.get('/api/history?after=not-a-cursor').status_code == 400
+
+
+# ==================== BULK UPLOAD ====================
+SAMPLE_ROW = {
+    'Transaction_Amount': '1500.5', 'Transaction_Location': 'Tashkent', 'Merchant_ID': '12',
+    'Device_ID': '7', 'Card_Type': 'Visa', 'Transaction_Currency': 'UZS', 'Transaction_Status': 'Approved',
+    'Previous_Transaction_Count': '3', 'Distance_Between_Transactions_km': '1.5',
+    'Time_Since_Last_Transaction_min': '40', 'Authentication_Method': 'PIN', 'Transaction_Velocity': '2',
+    'Transaction_Category': 'Retail', 'Transaction_Hour': '14', 'Transaction_Day': '3', 'Transaction_Month': '5',
+    'Transaction_Weekday': '2', 'Log_Transaction_Amount': '7.31', 'Velocity_Distance_Interact': '3.0',
+    'Amount_Velocity_Interact': '3001.0', 'Time_Distance_Interact': '60.0', 'Hour_sin': '-0.5',
+    'Hour_cos': '-0.87', 'Weekday_sin': '0.97', 'Weekday_cos': '-0.22',
+}
+
+
+class FakeClient:
+    """Scores every payload as an alert when its amount is over 1000; fails on call ``fail_on``
+
+    Like the API, one invalid payload fails the whole batch.
+    """
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+
+    def detect_batch(self, payloads):
+        self.batches.append(payloads)
+        if len(self.batches) == self.fail_on:
+            raise RuntimeError('API unavailable')
+        for payload in payloads:
+            ids_valid = all(0 <= payload[name] <= 2**63 - 1 for name in ('User_ID', 'Device_ID'))
+            if not ids_valid or not all(math.isfinite(v) for v in payload.values() if isinstance(v, float)):
+                raise RuntimeError('422 Unprocessable Entity')
+        return [
+            {'Fraud_Probability': 0.9, 'Final_Risk_Score': 0.8, 'alert_triggered': True, 'alert_reasons': ['amount']}
+            if payload['Transaction_Amount'] > 1000 else
+            {'Fraud_Probability': 0.1, 'Final_Risk_Score': 0.2, 'alert_triggered': False, 'alert_reasons': []}
+            for payload in payloads
+        ]
+
+
+def write_upload(path, rows):
+    with open(path, 'w', newline='') as handle:
+        writer = csv.DictWriter(handle, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+    return str(path)
+
+
+def run_job(db, user, path, client, monkeypatch):
+    monkeypatch.setattr(webapp, 'get_fraud_client', lambda: client)
+    monkeypatch.setitem(webapp.app.config, 'UPLOAD_CHUNK_SIZE', 2)
+    job = UploadJob(user_id=user.id, filename='upload.csv')
+    db.session.add(job)
+    db.session.commit()
+    webapp.run_upload_job(job.id, path)
+    db.session.expire_all()
+    return db.session.get(UploadJob, job.id)
+
+
+def test_parse_csv_value_matches_the_api_validation():
+    assert webapp.parse_csv_value('3.0', int) == 3
+    assert webapp.parse_csv_value('2.5', float) == 2.5
+    assert webapp.parse_csv_value(str(2**63 - 1), int) == 2**63 - 1  # not rounded through a float
+    for value, cast in (('3.5', int), ('', int), (None, int), ('inf', int), ('nan', float), ('-inf', float)):
+        with pytest.raises(ValueError):
+            webapp.parse_csv_value(value, cast)
+
+
+def test_one_bad_row_is_rejected_without_failing_its_chunk(db, user, tmp_path, monkeypatch):
+    rows = [{'Transaction_ID': str(n), 'User_ID': str(n), **SAMPLE_ROW} for n in range(1, 7)]
+    rows[1]['User_ID'] = '-5'
+    rows[2]['Device_ID'] = str(2**63)
+    rows[3]['Hour_sin'] = 'nan'
+    rows[4]['Transaction_Amount'] = 'inf'
+    path = write_upload(tmp_path / 'upload.csv', rows)
+    client = FakeClient()
+
+    job = run_job(db, user, path, client, monkeypatch)
+
+    assert job.status == 'done' and job.error is None
+    assert (job.rows_total, job.rows_done, job.rows_rejected) == (6, 2, 4)
+    assert [payload['User_ID'] for batch in client.batches for payload in batch] == [1, 6]
+
+
+def test_upload_job_scores_in_chunks_and_skips_rejected_rows(db, user, tmp_path, monkeypatch):
+    rows = [{**SAMPLE_ROW, 'Transaction_ID': str(n), 'Transaction_Amount': str(500 * n)} for n in range(1, 6)]
+    rows[2]['Transaction_Velocity'] = '2.5'  # the API would reject a fractional count
+    path = write_upload(tmp_path / 'upload.csv', rows)
+    client = FakeClient()
+
+    job = run_job(db, user, path, client, monkeypatch)
+
+    assert job.status == 'done' and job.finished_at is not None
+    assert (job.rows_total, job.rows_done, job.rows_rejected, job.alerts) == (5, 4, 1, 2)
+    assert [len(batch) for batch in client.batches] == [2, 2]
+    # Without a User_ID column each row is its own user in the API's behavior state
+    assert [payload['User_ID'] for batch in client.batches for payload in batch] == [1, 2, 4, 5]
+    ids = sorted(tx.transaction_id for tx in Transaction.query.filter_by(user_id=user.id))
+    assert ids == [f'U{job.id}-{n}-{n}' for n in (1, 2, 4, 5)]
+    assert db.session.get(UserRollup, user.id).tx_count == 4
+    assert not (tmp_path / 'upload.csv').exists()
+
+
+def test_repeated_transaction_ids_in_a_file_are_all_stored(db, user, tmp_path, monkeypatch):
+    rows = [{**SAMPLE_ROW, 'Transaction_ID': '7'} for _ in range(3)]
+    rows.append({**SAMPLE_ROW, 'Transaction_ID': ''})
+    path = write_upload(tmp_path / 'upload.csv', rows)
+
+    job = run_job(db, user, path, FakeClient(), monkeypatch)
+
+    assert job.status == 'done' and job.rows_done == 4
+    ids = sorted(tx.transaction_id for tx in Transaction.query.filter_by(user_id=user.id))
+    assert ids == [f'U{job.id}-1-7', f'U{job.id}-2-7', f'U{job.id}-3-7', f'U{job.id}-4']
+
+
+def test_rows_total_counts_records_not_lines(db, user, tmp_path, monkeypatch):
+    rows = [{**SAMPLE_ROW, 'Transaction_ID': str(n), 'Transaction_Location': 'Tashkent,\nChilanzar'} for n in (1, 2)]
+    path = write_upload(tmp_path / 'upload.csv', rows)
+    with open(path, 'a') as handle:
+        handle.write('\n')  # blank lines are skipped by the reader too
+
+    job = run_job(db, user, path, FakeClient(), monkeypatch)
+
+    assert (job.rows_total, job.rows_done) == (2, 2)
+    assert Transaction.query.first().location == 'Tashkent,\nChilanzar'
+
+
+def test_failed_upload_job_keeps_the_chunks_already_committed(db, user, tmp_path, monkeypatch):
+    rows = [{**SAMPLE_ROW, 'Transaction_ID': str(n)} for n in range(1, 6)]
+    path = write_upload(tmp_path / 'upload.csv', rows)
+
+    job = run_job(db, user, path, FakeClient(fail_on=2), monkeypatch)
+
+    assert job.status == 'failed' and job.error == 'API unavailable'
+    assert Transaction.query.filter_by(user_id=user.id).count() == 2
+    assert db.session.get(UserRollup, user.id).tx_count == 2
+
+
+def test_upload_job_rejects_a_file_with_missing_columns(db, user, tmp_path, monkeypatch):
+    path = tmp_path / 'upload.csv'
+    path.write_text('Transaction_ID,Transaction_Amount\n1,100\n')
+    client = FakeClient()
+
+    job = run_job(db, user, str(path), client, monkeypatch)
+
+    assert job.status == 'failed' and job.error.startswith('CSV is missing columns: Transaction_Location')
+    assert client.batches == []
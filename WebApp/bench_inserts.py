@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+"""
+FraudGuard BFSI - Insert Throughput Benchmark
+Drives concurrent /predict requests from several processes (like gunicorn -w N)
+and reports how many Transaction rows per second reach the database
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# Run from anywhere: the workers import app.py from this directory
+sys.path.insert(0, str(Path(__file__).parent))
+
+BENCH_EMAIL = 'bench@fraudguard.com'
+BENCH_PASSWORD = 'bench123'
+FORM = {'Transaction_Amount': '125000', 'Transaction_Location': 'Tashkent'}
+
+
+class CannedFraudClient:
+    """Stands in for the fraud API so the benchmark measures the database write path only"""
+
+    def detect(self, payload):
+        return {
+            'Transaction_ID': uuid.uuid4().hex[:20],
+            'Fraud_Probability': 0.12,
+            'Final_Risk_Score': 0.2,
+            'alert_triggered': False,
+            'alert_reasons': [],
+            'isFraud_pred': 0,
+        }
+
+
+def setup(results):
+    """Create the schema and the benchmark user (runs in its own process)"""
+    from app import app, db, User, create_indexes
+
+    with app.app_context():
+        db.create_all()
+        create_indexes()
+        user = User.query.filter_by(email=BENCH_EMAIL).first()
+        if user is None:
+            user = User(name='Benchmark', email=BENCH_EMAIL, bank_id=f'BENCH-{uuid.uuid4().hex[:8]}')
+            user.set_password(BENCH_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+        results.put(user.id)
+
+
+def worker(threads, start_at, duration, canned, results):
+    """One 'gunicorn worker': ``threads`` clients posting /predict until the deadline"""
+    import logging
+    logging.disable(logging.INFO)
+    import app as webapp
+
+    if canned:
+        client = CannedFraudClient()
+        webapp.get_fraud_client = lambda: client
+
+    latencies = []
+    lock = threading.Lock()
+
+    def run():
+        http = webapp.app.test_client()
+        http.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+        mine = []
+        time.sleep(max(0.0, start_at - time.time()))
+        while time.time() < start_at + duration:
+            started = time.perf_counter()
+            response = http.post('/predict', data=FORM)
+            if response.status_code == 200:
+                mine.append(time.perf_counter() - started)
+        with lock:
+            latencies.extend(mine)
+
+    pool = [threading.Thread(target=run) for _ in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    if webapp.app.config['DB_WRITE_BEHIND']:
+        webapp.get_transaction_writer().close()
+    results.put({'latencies': latencies, 'finished_at': time.time()})
+
+
+def run_mode(database_url, journal_mode, write_behind, args):
+    """Benchmark one configuration; each run gets its own worker processes"""
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['SQLITE_JOURNAL_MODE'] = journal_mode
+    os.environ['DB_WRITE_BEHIND'] = '1' if write_behind else '0'
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+
+    process = context.Process(target=setup, args=(results,))
+    process.start()
+    user_id = results.get()
+    process.join()
+
+    from sqlalchemy import create_engine, text
+    engine = create_engine(database_url)
+    count = text('SELECT COUNT(*) FROM transactions WHERE user_id = :user_id')
+    with engine.connect() as connection:
+        rows_before = connection.execute(count, {'user_id': user_id}).scalar()
+
+    start_at = time.time() + args.warmup
+    workers = [
+        context.Process(target=worker, args=(args.threads, start_at, args.duration, not args.api_url, results))
+        for _ in range(args.processes)
+    ]
+    for process in workers:
+        process.start()
+    reports = [results.get() for _ in workers]
+    for process in workers:
+        process.join()
+
+    with engine.connect() as connection:
+        rows = connection.execute(count, {'user_id': user_id}).scalar() - rows_before
+    engine.dispose()
+
+    latencies = sorted(latency for report in reports for latency in report['latencies'])
+    elapsed = max(report['finished_at'] for report in reports) - start_at
+
+    def percentile(q):
+        if not latencies:
+            return 0.0
+        return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+    return {
+        'journal_mode': journal_mode if database_url.startswith('sqlite') else None,
+        'write_behind': write_behind,
+        'requests': len(latencies),
+        'rows_written': rows,
+        'rows_per_s': round(rows / elapsed, 1),
+        'latency_ms': {'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=4, help='worker processes (like gunicorn -w)')
+    parser.add_argument('--threads', type=int, default=4, help='concurrent clients per process')
+    parser.add_argument('--duration', type=float, default=10, help='seconds of load per configuration')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds allowed for workers to start')
+    parser.add_argument('--journal', default='DELETE,WAL', help='comma-separated SQLite journal modes')
+    parser.add_argument('--database-url',
+                        help='benchmark this database instead of temporary SQLite files (tables are created, rows added)')
+    parser.add_argument('--api-url', help='call this fraud API instead of a canned response')
+    args = parser.parse_args()
+
+    if args.api_url:
+        os.environ['FRAUD_API_URL'] = args.api_url
+
+    runs = []
+    with tempfile.TemporaryDirectory() as directory:
+        journals = args.journal.split(',') if not args.database_url else ['WAL']
+        for journal_mode in journals:
+            for write_behind in (False, True):
+                database_url = args.database_url or f'sqlite:///{directory}/{journal_mode}-{int(write_behind)}.db'
+                run = run_mode(database_url, journal_mode, write_behind, args)
+                runs.append(run)
+                print(json.dumps(run), file=sys.stderr)
+
+    print(json.dumps({
+        'processes': args.processes,
+        'threads': args.threads,
+        'duration_s': args.duration,
+        'fraud_api': args.api_url or 'canned',
+        'runs': runs,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
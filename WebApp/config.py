@@ -5,13 +5,54 @@ import os
 from datetime import timedelta
 from pathlib import Path
 
+def database_uri(default):
+    """DATABASE_URL from the environment (e.g. Postgres on Render), else the given default"""
+    uri = os.environ.get('DATABASE_URL') or default
+    # Render and Heroku hand out postgres://, which SQLAlchemy 1.4+ no longer accepts
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+def engine_options(uri):
+    """SQLAlchemy engine options for the database behind ``uri``"""
+    options = {
+        # Test pooled connections before use, so a restarted database never fails a request
+        'pool_pre_ping': os.environ.get('DB_POOL_PRE_PING', '1') == '1',
+    }
+    if uri.startswith('sqlite'):
+        # Seconds a writer waits for SQLite's write lock before "database is locked"
+        options['connect_args'] = {'timeout': float(os.environ.get('SQLITE_BUSY_TIMEOUT', 30))}
+        if ':memory:' in uri:
+            return options
+    options.update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 5)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        pool_timeout=float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+    )
+    return options
+
 class Config:
     """Base configuration"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'dev-secret-key-fraudguard-bfsi-2025'
     # Use absolute path for database
     DB_PATH = Path(__file__).parent / 'models' / 'user.db'
-    SQLALCHEMY_DATABASE_URI = f'sqlite:///{DB_PATH}'
+    SQLALCHEMY_DATABASE_URI = database_uri(f'sqlite:///{DB_PATH}')
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # SQLite only: WAL lets readers run alongside the single writer, and NORMAL
+    # syncs at checkpoints instead of on every commit (still crash-safe in WAL)
+    SQLITE_JOURNAL_MODE = os.environ.get('SQLITE_JOURNAL_MODE', 'WAL')
+    SQLITE_SYNCHRONOUS = os.environ.get('SQLITE_SYNCHRONOUS', 'NORMAL')
+    
+    # Write-behind queue: /predict hands its Transaction row to a background
+    # thread that inserts queued rows in batches, one commit per batch
+    DB_WRITE_BEHIND = os.environ.get('DB_WRITE_BEHIND', '0') == '1'
+    DB_WRITE_BATCH_SIZE = int(os.environ.get('DB_WRITE_BATCH_SIZE', 200))
+    # How long the writer waits for more rows after the first one of a batch
+    DB_WRITE_LINGER_MS = float(os.environ.get('DB_WRITE_LINGER_MS', 20))
+    # Rows waiting beyond this are written by the request itself instead
+    DB_WRITE_QUEUE_SIZE = int(os.environ.get('DB_WRITE_QUEUE_SIZE', 10000))
     PERMANENT_SESSION_LIFETIME = timedelta(days=7)
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
@@ -19,12 +60,43 @@ class Config:
     
     # External API Configuration
     FRAUD_API_URL = os.environ.get('FRAUD_API_URL') or 'http://localhost:8000/detect'
-    FRAUD_API_TIMEOUT = 10
+    FRAUD_API_TIMEOUT = float(os.environ.get('FRAUD_API_TIMEOUT', 10))
+    FRAUD_API_CONNECT_TIMEOUT = float(os.environ.get('FRAUD_API_CONNECT_TIMEOUT', 3))
+    # Keep-alive connections per worker process; size it to the worker's thread count
+    FRAUD_API_POOL_SIZE = int(os.environ.get('FRAUD_API_POOL_SIZE', 10))
+    FRAUD_API_RETRIES = int(os.environ.get('FRAUD_API_RETRIES', 2))
+    FRAUD_API_BACKOFF = float(os.environ.get('FRAUD_API_BACKOFF', 0.2))
+    # Consecutive failures that open the circuit breaker, and how long it stays open
+    FRAUD_API_BREAKER_FAILURES = int(os.environ.get('FRAUD_API_BREAKER_FAILURES', 5))
+    FRAUD_API_BREAKER_RESET_SECONDS = float(os.environ.get('FRAUD_API_BREAKER_RESET_SECONDS', 30))
+    # Defaults to FRAUD_API_URL + '/batch'
+    FRAUD_API_BATCH_URL = os.environ.get('FRAUD_API_BATCH_URL')
+
+    # Bulk CSV upload
+    UPLOAD_FOLDER = Path(__file__).parent / 'uploads'
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_UPLOAD_MB', 100)) * 1024 * 1024
+    # Rows per /detect/batch call and per database commit (the API accepts up to 1000)
+    UPLOAD_CHUNK_SIZE = int(os.environ.get('UPLOAD_CHUNK_SIZE', 500))
+    # Background scoring threads per worker process
+    UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', 2))
+
+    # Logged-in user cache: seconds a cached user is trusted, and how long the
+    # identity claims in the session cookie stand in for a lookup on GET pages
+    USER_CACHE_TTL = float(os.environ.get('USER_CACHE_TTL', 60))
+    USER_CACHE_SIZE = int(os.environ.get('USER_CACHE_SIZE', 10000))
+    USER_CLAIMS_MAX_AGE = float(os.environ.get('USER_CLAIMS_MAX_AGE', 300))
+    # Send X-DB-Queries (SQL statements run by the request) on every response
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER', '0') == '1'
+
+    # Transaction history pages; ?per_page= is capped at HISTORY_MAX_PAGE_SIZE
+    HISTORY_PAGE_SIZE = int(os.environ.get('HISTORY_PAGE_SIZE', 10))
+    HISTORY_MAX_PAGE_SIZE = int(os.environ.get('HISTORY_MAX_PAGE_SIZE', 100))
     
 class DevelopmentConfig(Config):
     """Development configuration"""
     DEBUG = True
     TESTING = False
+    QUERY_COUNT_HEADER = os.environ.get('QUERY_COUNT_HEADER', '1') == '1'
 
 class ProductionConfig(Config):
     """Production configuration"""
@@ -36,6 +108,7 @@ class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:////:memory:'
+    SQLALCHEMY_ENGINE_OPTIONS = engine_options(SQLALCHEMY_DATABASE_URI)
 
 config = {
     'development': DevelopmentConfig,
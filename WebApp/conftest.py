@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway SQLite file before app.py reads its config
+DB_DIR = tempfile.mkdtemp(prefix='fraudguard-test-')
+os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(DB_DIR, 'test.db')}"
+
+import app as webapp  # noqa: E402
+
+
+def pytest_sessionfinish(session, exitstatus):
+    with webapp.app.app_context():
+        webapp.db.engine.dispose()
+    shutil.rmtree(DB_DIR, ignore_errors=True)
+
+
+@pytest.fixture
+def db():
+    """Fresh tables for each test, inside an application context"""
+    with webapp.app.app_context():
+        webapp.db.create_all()
+        yield webapp.db
+        webapp.db.session.remove()
+        webapp.db.drop_all()
+    # Ids restart with the tables, so cached users must not outlive them
+    webapp.user_cache.entries.clear()
+    webapp.user_cache.revoked.clear()
+
+
+@pytest.fixture
+def user(db):
+    user = webapp.User(name='Test User', email='test@example.com', bank_id='BANK001')
+    user.set_password('secret123')
+    db.session.add(user)
+    db.session.commit()
+    return user
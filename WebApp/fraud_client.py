@@ -0,0 +1,180 @@
+"""
+FraudGuard BFSI - Fraud Detection API Client
+Pooled keep-alive HTTP client with retries, a circuit breaker and timing stats
+"""
+import threading
+import time
+import uuid
+from collections import deque
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling the API while the circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calling an unhealthy API for a while after repeated failures
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls fail fast for ``reset_seconds``. Then a single trial call is let
+    through (half-open): success closes the breaker, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            if time.monotonic() - self.opened_at < self.reset_seconds:
+                return 'open'
+            return 'half-open'
+
+    def allow(self):
+        """Return True if a call may go ahead now"""
+        with self.lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_seconds or self.trial_running:
+                return False
+            self.trial_running = True
+            return True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+
+class FraudAPIClient:
+    """Keep-alive client for the fraud detection API, created once per worker process
+
+    Connections are reused from a pool of ``pool_size``, so only the first
+    call per connection pays for the TCP (and TLS) handshake. Failed
+    connections and 429/503 responses are retried with exponential backoff.
+    The API sends those two statuses when it sheds load before scoring.
+    Each submission also carries its own ``Idempotency-Key``, reused by its
+    retries, so a retry the API did score is answered from its result cache
+    instead of scoring the transaction twice.
+    """
+
+    RETRY_STATUSES = (429, 503)
+
+    def __init__(self, url, timeout=10, connect_timeout=3, pool_size=10, retries=2, backoff=0.2,
+                 breaker_failures=5, breaker_reset_seconds=30, batch_url=None):
+        self.url = url
+        self.batch_url = batch_url or url.rstrip('/') + '/batch'
+        self.timeout = (connect_timeout, timeout)
+        self.breaker = CircuitBreaker(breaker_failures, breaker_reset_seconds)
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=0,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=self.RETRY_STATUSES,
+            allowed_methods=frozenset(['GET', 'POST']),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.stats_lock = threading.Lock()
+        self.latencies = deque(maxlen=2048)
+        self.calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config['FRAUD_API_URL'],
+            timeout=config['FRAUD_API_TIMEOUT'],
+            connect_timeout=config['FRAUD_API_CONNECT_TIMEOUT'],
+            pool_size=config['FRAUD_API_POOL_SIZE'],
+            retries=config['FRAUD_API_RETRIES'],
+            backoff=config['FRAUD_API_BACKOFF'],
+            breaker_failures=config['FRAUD_API_BREAKER_FAILURES'],
+            breaker_reset_seconds=config['FRAUD_API_BREAKER_RESET_SECONDS'],
+            batch_url=config.get('FRAUD_API_BATCH_URL'),
+        )
+
+    def detect(self, payload):
+        """Score one transaction and return the API's JSON response"""
+        return self.post(self.url, payload, idempotency_key=uuid.uuid4().hex)
+
+    def detect_batch(self, payloads):
+        """Score a list of transactions in one call; results come back in the same order"""
+        return self.post(self.batch_url, payloads, idempotency_key=uuid.uuid4().hex)
+
+    def post(self, url, payload, idempotency_key=None):
+        if not self.breaker.allow():
+            with self.stats_lock:
+                self.rejected += 1
+            raise CircuitOpenError('Fraud detection API is unavailable; retrying shortly')
+
+        start = time.perf_counter()
+        healthy = False
+        try:
+            headers = {'Idempotency-Key': idempotency_key} if idempotency_key else None
+            response = self.session.post(url, json=payload, headers=headers, timeout=self.timeout)
+            # A 4xx other than 429 is a bad request, not an unhealthy API.
+            healthy = response.status_code < 500 and response.status_code != 429
+            response.raise_for_status()
+            return response.json()
+        except requests.exceptions.RequestException:
+            with self.stats_lock:
+                self.failures += 1
+            raise
+        finally:
+            if healthy:
+                self.breaker.record_success()
+            else:
+                self.breaker.record_failure()
+            with self.stats_lock:
+                self.calls += 1
+                self.latencies.append(time.perf_counter() - start)
+
+    def stats(self):
+        """Call counts and latency percentiles (ms) over the last calls"""
+        with self.stats_lock:
+            latencies = sorted(self.latencies)
+            counts = {'calls': self.calls, 'failures': self.failures, 'rejected_open_circuit': self.rejected}
+
+        def percentile(q):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2)
+
+        return {
+            **counts,
+            'circuit': self.breaker.state,
+            'latency_ms_p50': percentile(0.50),
+            'latency_ms_p95': percentile(0.95),
+            'latency_ms_p99': percentile(0.99),
+        }
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,122 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import fraud_client
+from fraud_client import CircuitBreaker, CircuitOpenError, FraudAPIClient
+
+
+class FakeAPI(BaseHTTPRequestHandler):
+    """Answers POSTs with the queued status codes, then 200, recording each Idempotency-Key"""
+
+    statuses = []
+    keys = []
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.keys.append(self.headers.get('Idempotency-Key'))
+        status = self.statuses.pop(0) if self.statuses else 200
+        body = json.dumps({'status': status}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(fraud_client.time, 'monotonic', clock)
+    return clock
+
+
+@pytest.fixture
+def api():
+    FakeAPI.statuses, FakeAPI.keys = [], []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAPI)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_port}/detect'
+    server.shutdown()
+    server.server_close()
+
+
+def test_retries_reuse_the_submission_idempotency_key(api):
+    client = FraudAPIClient(api, retries=2, backoff=0)
+    FakeAPI.statuses = [503]
+    assert client.detect({'User_ID': 1}) == {'status': 200}
+    client.detect({'User_ID': 1})
+    client.detect_batch([{'User_ID': 1}])
+
+    first, retry, second, batch = FakeAPI.keys
+    assert first and first == retry
+    assert len({first, second, batch}) == 3
+
+
+def test_breaker_opens_after_consecutive_failures_and_lets_one_trial_through(clock):
+    breaker = CircuitBreaker(failure_threshold=3, reset_seconds=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success()  # a success resets the count
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == 'closed' and breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+
+    clock.now += 30
+    assert breaker.state == 'half-open'
+    assert breaker.allow() and not breaker.allow()  # only one trial call at a time
+    breaker.record_success()
+    assert breaker.state == 'closed' and breaker.failures == 0 and breaker.allow()
+
+
+def test_a_failed_trial_reopens_the_breaker(clock):
+    breaker = CircuitBreaker(failure_threshold=5, reset_seconds=30)
+    for _ in range(5):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == 'open' and not breaker.allow()
+    clock.now += 29
+    assert breaker.state == 'open'
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_client_fails_fast_while_open_and_ignores_client_errors(api, clock):
+    client = FraudAPIClient(api, retries=0, breaker_failures=2, breaker_reset_seconds=30)
+    FakeAPI.statuses = [422, 422, 500, 500]
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.detect({'User_ID': 1})
+    assert client.breaker.state == 'closed'  # a rejected payload says nothing about the API's health
+
+    for _ in range(2):
+        with pytest.raises(requests.exceptions.HTTPError):
+            client.detect({'User_ID': 1})
+    with pytest.raises(CircuitOpenError):
+        client.detect({'User_ID': 1})
+    assert len(FakeAPI.keys) == 4
+
+    clock.now += 30
+    assert client.detect({'User_ID': 1}) == {'status': 200}
+    stats = client.stats()
+    assert stats['circuit'] == 'closed'
+    assert (stats['calls'], stats['failures'], stats['rejected_open_circuit']) == (5, 4, 1)
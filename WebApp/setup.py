@@ -10,7 +10,7 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from app import app, db, User
+from app import app, db, User, create_indexes
 
 def setup_database():
     """Initialize database"""
@@ -18,6 +18,7 @@ def setup_database():
     with app.app_context():
         # Create all tables
         db.create_all()
+        create_indexes()
         print("✅ Database initialized")
         
         # Check if demo user exists
@@ -0,0 +1,115 @@
+"""
+FraudGuard BFSI - Logged-In User Cache
+Per-process TTL cache of user identities and checks for the identity claims kept in the session
+"""
+import threading
+import time
+
+
+class CurrentUser:
+    """Identity of the logged-in user, detached from any database session
+
+    Safe to cache and share between requests and threads. Routes that need
+    the full ``User`` row load it with ``db.session.get(User, g.user.id)``.
+    """
+
+    __slots__ = ('id', 'name', 'email', 'bank_id')
+
+    def __init__(self, id, name, email, bank_id):
+        self.id = id
+        self.name = name
+        self.email = email
+        self.bank_id = bank_id
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(user.id, user.name, user.email, user.bank_id)
+
+    @classmethod
+    def from_claims(cls, claims):
+        return cls(claims['id'], claims['name'], claims['email'], claims['bank_id'])
+
+    def claims(self, issued_at=None):
+        """Identity claims for the signed session cookie"""
+        return {
+            'id': self.id,
+            'name': self.name,
+            'email': self.email,
+            'bank_id': self.bank_id,
+            'iat': issued_at if issued_at is not None else time.time(),
+        }
+
+
+class UserCache:
+    """Maps user id to CurrentUser for ``ttl`` seconds, loading misses with ``loader(user_id)``
+
+    ``invalidate`` drops a user and revokes session claims issued before it,
+    but only in this process: other workers see the change when their entry
+    expires, so ``ttl`` and ``claims_max_age`` bound how stale a name or a
+    deleted account can be.
+    """
+
+    def __init__(self, loader, ttl=60, max_size=10000, claims_max_age=300):
+        self.loader = loader
+        self.ttl = ttl
+        self.max_size = max(1, max_size)
+        self.claims_max_age = claims_max_age
+        self.entries = {}
+        self.revoked = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        """CurrentUser for ``user_id``, or None if the user no longer exists"""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        user = self.loader(user_id)
+        if user is None:
+            return None
+        with self.lock:
+            # Skip caching if the user was invalidated while we were loading
+            if self.revoked.get(user_id, 0) < now:
+                if user_id not in self.entries and len(self.entries) >= self.max_size:
+                    self.entries.pop(next(iter(self.entries)))
+                self.entries[user_id] = (now + self.ttl, user)
+        return user
+
+    def invalidate(self, user_id):
+        """Forget a user after logout, update or delete"""
+        now = time.time()
+        with self.lock:
+            self.entries.pop(user_id, None)
+            self.revoked[user_id] = now
+            if len(self.revoked) > self.max_size:
+                # Claims older than claims_max_age are rejected anyway
+                self.revoked = {
+                    key: revoked_at for key, revoked_at in self.revoked.items()
+                    if now - revoked_at < self.claims_max_age
+                }
+
+    def claims_valid(self, claims, user_id):
+        """True if session claims can stand in for a lookup of ``user_id``"""
+        if not claims or claims.get('id') != user_id:
+            return False
+        issued_at = claims.get('iat', 0)
+        if time.time() - issued_at >= self.claims_max_age:
+            return False
+        with self.lock:
+            return self.revoked.get(user_id, 0) < issued_at
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'cached': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+
+import user_cache
+from user_cache import CurrentUser, UserCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(user_cache.time, 'time', clock)
+    return clock
+
+
+class Loader:
+    def __init__(self):
+        self.users = {1: 'Alice', 2: 'Bob', 3: 'Carol'}
+        self.calls = []
+
+    def __call__(self, user_id):
+        self.calls.append(user_id)
+        name = self.users.get(user_id)
+        return CurrentUser(user_id, name, f'{name.lower()}@example.com', f'B{user_id}') if name else None
+
+
+def test_entries_are_reused_until_the_ttl_expires(clock):
+    loader = Loader()
+    cache = UserCache(loader, ttl=60)
+    assert cache.get(1).name == 'Alice'
+    clock.now += 59
+    assert cache.get(1).name == 'Alice' and loader.calls == [1]
+
+    loader.users[1] = 'Alicia'
+    clock.now += 1
+    assert cache.get(1).name == 'Alicia' and loader.calls == [1, 1]
+    assert cache.stats() == {'cached': 1, 'hits': 1, 'misses': 2, 'hit_ratio': 0.333}
+
+
+def test_missing_users_are_not_cached_and_the_oldest_entry_is_evicted(clock):
+    loader = Loader()
+    cache = UserCache(loader, max_size=2)
+    assert cache.get(9) is None and cache.get(9) is None
+    for user_id in (1, 2, 3):
+        cache.get(user_id)
+    assert sorted(cache.entries) == [2, 3] and loader.calls == [9, 9, 1, 2, 3]
+
+
+def test_invalidate_drops_the_user_and_revokes_older_claims(clock):
+    loader = Loader()
+    cache = UserCache(loader, claims_max_age=300)
+    claims = cache.get(1).claims()
+    clock.now += 1
+    assert cache.claims_valid(claims, 1)
+    assert not cache.claims_valid(claims, 2) and not cache.claims_valid(None, 1)
+
+    cache.invalidate(1)
+    assert not cache.claims_valid(claims, 1)
+    clock.now += 1
+    fresh = cache.get(1).claims()
+    assert loader.calls == [1, 1]
+    clock.now += 1
+    assert cache.claims_valid(fresh, 1)
+    clock.now += 300
+    assert not cache.claims_valid(fresh, 1)  # too old even though never revoked
+
+
+def test_a_user_invalidated_while_loading_is_not_cached(clock):
+    loading, release = threading.Event(), threading.Event()
+    loader = Loader()
+
+    def slow_loader(user_id):
+        loading.set()
+        release.wait(5)
+        return loader(user_id)
+
+    cache = UserCache(slow_loader)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(cache.get(1)))
+    thread.start()
+    assert loading.wait(5)
+    clock.now += 1
+    cache.invalidate(1)  # e.g. the user was renamed by another request
+    release.set()
+    thread.join(5)
+
+    assert result[0].name == 'Alice' and 1 not in cache.entries
+
+
+def test_revocations_older_than_claims_max_age_are_pruned(clock):
+    cache = UserCache(Loader(), max_size=2, claims_max_age=300)
+    cache.invalidate(1)
+    clock.now += 300
+    cache.invalidate(2)
+    cache.invalidate(3)
+    assert sorted(cache.revoked) == [2, 3]
@@ -0,0 +1,115 @@
+"""
+FraudGuard BFSI - Write-Behind Queue
+Groups rows submitted by request threads into batched writes on one background thread
+"""
+import logging
+import queue
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteBehindQueue:
+    """Hands submitted items to ``flush(batch)`` in batches on a background thread
+
+    The writer takes the first waiting item, lingers up to ``linger_seconds``
+    for more, and flushes up to ``batch_size`` items at once. Under load,
+    rows pile up while a batch commits, so the next commit carries many of
+    them: one lock acquisition and one fsync per batch instead of per row.
+
+    Items still queued when the process dies are lost. ``close()`` drains
+    the queue and is registered with atexit by the caller; items submitted
+    after it are refused, like on a full queue.
+    """
+
+    def __init__(self, flush, batch_size=200, linger_seconds=0.02, max_queued=10000, name='write-behind'):
+        self.flush = flush
+        self.batch_size = max(1, batch_size)
+        self.linger_seconds = linger_seconds
+        self.name = name
+        self.queue = queue.Queue(maxsize=max_queued)
+        self.thread = None
+        self.closed = False
+        self.lock = threading.Lock()
+
+        self.batches = 0
+        self.written = 0
+        self.failed = 0
+        self.overflowed = 0
+        self.largest_batch = 0
+
+    def submit(self, item):
+        """Queue an item; returns False when the queue is full or closed and the caller must write it itself"""
+        self.start()
+        with self.lock:
+            if self.closed:
+                return False
+            try:
+                self.queue.put_nowait(item)
+                return True
+            except queue.Full:
+                self.overflowed += 1
+                return False
+
+    def start(self):
+        with self.lock:
+            if self.thread is None and not self.closed:
+                self.thread = threading.Thread(target=self.run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def run(self):
+        stopping = False
+        while not stopping:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.linger_seconds
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self.write(batch)
+
+    def write(self, batch):
+        try:
+            self.flush(batch)
+        except Exception:
+            logger.exception(f"{self.name}: dropped a batch of {len(batch)}")
+            with self.lock:
+                self.failed += len(batch)
+            return
+        with self.lock:
+            self.batches += 1
+            self.written += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+
+    def close(self, timeout=10):
+        """Write everything queued so far and stop the writer thread"""
+        with self.lock:
+            self.closed = True
+            thread = self.thread
+        if thread is None or not thread.is_alive():
+            return
+        self.queue.put(_STOP)
+        thread.join(timeout)
+
+    def stats(self):
+        with self.lock:
+            return {
+                'queued': self.queue.qsize(),
+                'batches': self.batches,
+                'written': self.written,
+                'failed': self.failed,
+                'overflowed': self.overflowed,
+                'largest_batch': self.largest_batch,
+                'avg_batch': round(self.written / self.batches, 1) if self.batches else 0.0,
+            }
@@ -0,0 +1,76 @@
+import threading
+
+from write_behind import WriteBehindQueue
+
+
+class Recorder:
+    """flush() stand-in that records batches and can hold the writer until released"""
+
+    def __init__(self, fail_on=None):
+        self.batches = []
+        self.fail_on = fail_on
+        self.release = threading.Event()
+        self.release.set()
+        self.entered = threading.Event()
+
+    def __call__(self, batch):
+        self.entered.set()
+        self.release.wait(5)
+        self.batches.append(list(batch))
+        if self.fail_on in batch:
+            raise RuntimeError('constraint violated')
+
+
+def test_rows_queued_while_a_batch_commits_share_the_next_one():
+    flush = Recorder()
+    writer = WriteBehindQueue(flush, batch_size=3, linger_seconds=0)
+    flush.release.clear()
+    writer.submit(0)
+    assert flush.entered.wait(5)  # the writer is busy with [0]
+    for item in range(1, 8):
+        assert writer.submit(item)
+    flush.release.set()
+    writer.close()
+
+    assert flush.batches == [[0], [1, 2, 3], [4, 5, 6], [7]]
+    stats = writer.stats()
+    assert (stats['batches'], stats['written'], stats['largest_batch'], stats['queued']) == (4, 8, 3, 0)
+    assert not writer.thread.is_alive()
+
+
+def test_full_or_closed_queue_hands_the_row_back_to_the_caller():
+    flush = Recorder()
+    writer = WriteBehindQueue(flush, batch_size=10, linger_seconds=0, max_queued=2)
+    flush.release.clear()
+    writer.submit('a')
+    assert flush.entered.wait(5)
+    assert writer.submit('b') and writer.submit('c')
+    assert not writer.submit('d')
+    flush.release.set()
+    writer.close()
+
+    assert not writer.submit('e')
+    assert [item for batch in flush.batches for item in batch] == ['a', 'b', 'c']
+    assert writer.stats()['overflowed'] == 1
+
+
+def test_a_failed_batch_is_counted_and_the_writer_keeps_going():
+    flush = Recorder(fail_on='bad')
+    writer = WriteBehindQueue(flush, batch_size=2, linger_seconds=0)
+    flush.release.clear()
+    writer.submit('first')
+    assert flush.entered.wait(5)
+    for item in ('bad', 'x', 'y'):
+        writer.submit(item)
+    flush.release.set()
+    writer.close()
+
+    stats = writer.stats()
+    assert (stats['written'], stats['failed']) == (2, 2)
+    assert flush.batches[-1] == ['y']
+
+
+def test_close_without_submissions_starts_no_thread():
+    writer = WriteBehindQueue(Recorder())
+    writer.close()
+    assert writer.thread is None and not writer.submit('late') and writer.thread is None
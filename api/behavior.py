@@ -0,0 +1,538 @@
+import fcntl
+import mmap
+import os
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from windows import SlidingWindows
+
+# (device was new, per-user window counts, per-device window counts), one entry per transaction
+Observation = Tuple[List[bool], List[List[int]], List[List[int]]]
+
+
+class BehaviorStore:
+    """Bounded keyed state for the "New Device" and "Burst" rules.
+
+    Each tracked key owns one slot in preallocated NumPy arrays: a ring of the
+    last ``max_devices`` device IDs (0 disables device tracking) and the
+    sliding-window transaction counters. Slots are recycled
+    least-recently-used first, and keys idle for longer than ``ttl_seconds``
+    are forgotten, so memory stays fixed no matter how many keys the worker
+    sees. ``on_lock_wait``, if given, is called with the seconds each batch
+    waited for the lock.
+    """
+
+    def __init__(
+        self,
+        max_keys: int = 100_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_devices: int = 16,
+        max_bytes: Optional[int] = None,
+        windows: Optional[SlidingWindows] = None,
+        on_lock_wait: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.windows = windows or SlidingWindows()
+        self.on_lock_wait = on_lock_wait
+        self.max_devices = max(0, max_devices)
+        self.ttl_seconds = ttl_seconds
+        if max_bytes is not None:
+            max_keys = min(max_keys, max(1, max_bytes // self.bytes_per_key(self.max_devices, self.windows)))
+        self.max_keys = max(1, max_keys)
+
+        self._devices = np.zeros((self.max_keys, self.max_devices), dtype=np.int64)
+        self._device_count = np.zeros(self.max_keys, dtype=np.int32)
+        self._last_seen = np.zeros(self.max_keys, dtype=np.float64)
+        self._buckets, self._heads, self._totals = self.windows.allocate(self.max_keys)
+        self._slots: "OrderedDict[int, int]" = OrderedDict()
+        self._free: List[int] = list(range(self.max_keys - 1, -1, -1))
+        self._lock = Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def bytes_per_key(max_devices: int, windows: SlidingWindows) -> int:
+        # Array columns plus an approximate OrderedDict entry.
+        return max_devices * 8 + 4 + 8 + windows.bytes_per_key() + 100
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def observe_batch(
+        self, keys: Sequence[int], device_ids: Optional[Sequence[int]], now: float
+    ) -> Tuple[List[bool], List[List[int]]]:
+        """Count one transaction per key; returns (device was new, window counts) per row."""
+        new_devices: List[bool] = []
+        counts: List[List[int]] = []
+        clock = time.monotonic()
+        waited = time.perf_counter()
+        with self._lock:
+            if self.on_lock_wait is not None:
+                self.on_lock_wait(time.perf_counter() - waited)
+            self._expire(clock)
+            for row, key in enumerate(keys):
+                slot = self._slot(key)
+                self._last_seen[slot] = clock
+
+                is_new = False
+                if device_ids is not None and self.max_devices:
+                    device_id = device_ids[row]
+                    device_count = int(self._device_count[slot])
+                    is_new = device_id not in self._devices[slot, : min(device_count, self.max_devices)].tolist()
+                    if is_new:
+                        self._devices[slot, device_count % self.max_devices] = device_id
+                        self._device_count[slot] = device_count + 1
+
+                new_devices.append(is_new)
+                counts.append(self.windows.add(self._buckets[slot], self._heads[slot], self._totals[slot], now))
+        return new_devices, counts
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "keys": len(self._slots),
+                "capacity": self.max_keys,
+                "bytes": self.max_keys * self.bytes_per_key(self.max_devices, self.windows),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._slots.clear()
+            self._free = list(range(self.max_keys - 1, -1, -1))
+
+    def _slot(self, key: int) -> int:
+        slot = self._slots.get(key)
+        if slot is not None:
+            self._slots.move_to_end(key)
+            self.hits += 1
+            return slot
+
+        self.misses += 1
+        if not self._free:
+            _, evicted = self._slots.popitem(last=False)
+            self._free.append(evicted)
+            self.evictions += 1
+        slot = self._free.pop()
+        self._slots[key] = slot
+        self._device_count[slot] = 0
+        self._heads[slot] = 0
+        return slot
+
+    def _expire(self, clock: float) -> None:
+        cutoff = clock - self.ttl_seconds
+        while self._slots:
+            key, slot = next(iter(self._slots.items()))
+            if self._last_seen[slot] >= cutoff:
+                break
+            del self._slots[key]
+            self._free.append(slot)
+            self.expirations += 1
+
+
+class ShardedBehaviorStore:
+    """Lock-striped per-user and per-device state spread over BehaviorStores.
+
+    Keys are assigned to a shard by ``hash(key) % shards``; each shard has its
+    own lock, so requests for different users rarely wait on each other.
+    Users (device sets plus velocity windows) and devices (velocity windows
+    only) live in separate shard sets. Capacity and the memory ceiling are
+    split evenly across shards.
+    """
+
+    def __init__(
+        self,
+        shards: int = 16,
+        max_users: int = 100_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_devices: int = 16,
+        max_bytes: Optional[int] = None,
+        windows: Optional[SlidingWindows] = None,
+        on_lock_wait: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        count = max(1, shards)
+        self.windows = windows or SlidingWindows()
+
+        def build(max_devices_per_key: int, budget: Optional[int]) -> List[BehaviorStore]:
+            return [
+                BehaviorStore(
+                    max_keys=max(1, max_users // count),
+                    ttl_seconds=ttl_seconds,
+                    max_devices=max_devices_per_key,
+                    max_bytes=None if budget is None else budget // count,
+                    windows=self.windows,
+                    on_lock_wait=on_lock_wait,
+                )
+                for _ in range(count)
+            ]
+
+        self.user_shards = build(max_devices, None if max_bytes is None else max_bytes // 2)
+        self.device_shards = build(0, None if max_bytes is None else max_bytes // 2)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self.user_shards)
+
+    def observe(self, user_id: int, device_id: int, now: float) -> Tuple[bool, List[int], List[int]]:
+        new_devices, user_counts, device_counts = self.observe_batch([user_id], [device_id], now)
+        return new_devices[0], user_counts[0], device_counts[0]
+
+    def observe_batch(self, user_ids: Sequence[int], device_ids: Sequence[int], now: float) -> Observation:
+        new_devices, user_counts = self._observe_sharded(self.user_shards, user_ids, device_ids, now)
+        _, device_counts = self._observe_sharded(self.device_shards, device_ids, None, now)
+        return new_devices, user_counts, device_counts
+
+    @staticmethod
+    def _observe_sharded(
+        shards: List[BehaviorStore], keys: Sequence[int], device_ids: Optional[Sequence[int]], now: float
+    ) -> Tuple[List[bool], List[List[int]]]:
+        if len(keys) == 1:
+            return shards[hash(keys[0]) % len(shards)].observe_batch(keys, device_ids, now)
+
+        groups: Dict[int, List[int]] = {}
+        for row, key in enumerate(keys):
+            groups.setdefault(hash(key) % len(shards), []).append(row)
+
+        new_devices: List[bool] = [False] * len(keys)
+        counts: List[List[int]] = [[] for _ in keys]
+        for shard_index, rows in groups.items():
+            shard_new, shard_counts = shards[shard_index].observe_batch(
+                [keys[row] for row in rows], None if device_ids is None else [device_ids[row] for row in rows], now
+            )
+            for row, new_device, row_counts in zip(rows, shard_new, shard_counts):
+                new_devices[row] = new_device
+                counts[row] = row_counts
+        return new_devices, counts
+
+    def stats(self) -> Dict[str, int]:
+        totals: Dict[str, int] = {"users": 0, "devices": 0}
+        for kind, shards in (("users", self.user_shards), ("devices", self.device_shards)):
+            for shard in shards:
+                for key, value in shard.stats().items():
+                    if key == "keys":
+                        totals[kind] += value
+                    else:
+                        totals[key] = totals.get(key, 0) + value
+        totals["shards"] = len(self.user_shards)
+        return totals
+
+    def clear(self) -> None:
+        for shard in self.user_shards + self.device_shards:
+            shard.clear()
+
+
+class SharedMemoryTable:
+    """Keyed behavior state in a memory-mapped file shared by every worker on a host.
+
+    The file is split into ``stripes`` open-addressing regions. A key hashes
+    to one stripe and probes at most ``probe_length`` slots in it; when all of
+    them belong to other live keys, the least recently seen one is
+    overwritten. Each stripe is guarded by a byte-range ``fcntl`` lock for
+    other processes and a ``threading.Lock`` for other threads in this one.
+    Entries idle for longer than ``ttl_seconds`` count as free.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_keys: int = 100_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_devices: int = 16,
+        stripes: int = 64,
+        probe_length: int = 8,
+        windows: Optional[SlidingWindows] = None,
+        on_lock_wait: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        self.path = Path(path)
+        self.windows = windows or SlidingWindows()
+        self.on_lock_wait = on_lock_wait
+        self.ttl_seconds = ttl_seconds
+        self.max_devices = max(0, max_devices)
+        self.stripes = max(1, stripes)
+        self.probe_length = max(1, probe_length)
+        self.slots_per_stripe = max(self.probe_length, -(-max_keys // self.stripes))
+
+        n_windows = len(self.windows)
+        record = np.dtype(
+            [
+                ("key", np.int64),
+                ("seen", np.float64),
+                ("device_count", np.int64),
+                ("devices", np.int64, (self.max_devices,)),
+                ("heads", np.int64, (n_windows,)),
+                ("totals", np.int32, (n_windows,)),
+                ("buckets", np.int32, (n_windows, self.windows.max_buckets)),
+            ]
+        )
+        size = self.stripes * self.slots_per_stripe * record.itemsize
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        current = os.fstat(self._fd).st_size
+        if current == 0:
+            os.ftruncate(self._fd, size)
+        elif current != size:
+            os.close(self._fd)
+            raise ValueError(f"{self.path} has a different table layout ({current} bytes, expected {size})")
+
+        self._mmap = mmap.mmap(self._fd, size)
+        table = np.ndarray((self.stripes, self.slots_per_stripe), dtype=record, buffer=self._mmap)
+        self._table = table
+        self._key = table["key"]
+        self._seen = table["seen"]
+        self._device_count = table["device_count"]
+        self._devices = table["devices"]
+        self._heads = table["heads"]
+        self._totals = table["totals"]
+        self._buckets = table["buckets"]
+        self._locks = [Lock() for _ in range(self.stripes)]
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return int((self._seen >= time.time() - self.ttl_seconds).sum())
+
+    def _position(self, key: int) -> Tuple[int, int]:
+        mixed = (int(key) * 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        return mixed % self.stripes, (mixed // self.stripes) % self.slots_per_stripe
+
+    @contextmanager
+    def _locked(self, stripe: int) -> Iterator[None]:
+        waited = time.perf_counter()
+        with self._locks[stripe]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, 1, stripe)
+            if self.on_lock_wait is not None:
+                self.on_lock_wait(time.perf_counter() - waited)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, 1, stripe)
+
+    def observe_batch(
+        self, keys: Sequence[int], device_ids: Optional[Sequence[int]], now: float
+    ) -> Tuple[List[bool], List[List[int]]]:
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        for row, key in enumerate(keys):
+            stripe, home = self._position(key)
+            groups.setdefault(stripe, []).append((row, home))
+
+        new_devices: List[bool] = [False] * len(keys)
+        counts: List[List[int]] = [[] for _ in keys]
+        for stripe, rows in groups.items():
+            with self._locked(stripe):
+                for row, home in rows:
+                    slot = self._slot(stripe, home, int(keys[row]), now)
+                    self._seen[stripe, slot] = now
+                    if device_ids is not None and self.max_devices:
+                        new_devices[row] = self._add_device(stripe, slot, int(device_ids[row]))
+                    counts[row] = self.windows.add(
+                        self._buckets[stripe, slot], self._heads[stripe, slot], self._totals[stripe, slot], now
+                    )
+        return new_devices, counts
+
+    def _slot(self, stripe: int, home: int, key: int, now: float) -> int:
+        cutoff = now - self.ttl_seconds
+        window = [(home + offset) % self.slots_per_stripe for offset in range(self.probe_length)]
+        keys = self._key[stripe, window].tolist()
+        seen = self._seen[stripe, window].tolist()
+
+        free: Optional[int] = None
+        oldest = window[0]
+        oldest_seen = float("inf")
+        for slot, slot_key, slot_seen in zip(window, keys, seen):
+            if slot_seen == 0.0 or slot_seen < cutoff:
+                if free is None:
+                    free = slot
+            elif slot_key == key:
+                self.hits += 1
+                return slot
+            elif slot_seen < oldest_seen:
+                oldest, oldest_seen = slot, slot_seen
+
+        self.misses += 1
+        if free is None:
+            free = oldest
+            self.evictions += 1
+        self._key[stripe, free] = key
+        self._device_count[stripe, free] = 0
+        self._heads[stripe, free] = 0
+        return free
+
+    def _add_device(self, stripe: int, slot: int, device_id: int) -> bool:
+        device_count = int(self._device_count[stripe, slot])
+        devices = self._devices[stripe, slot]
+        if device_id in devices[: min(device_count, self.max_devices)].tolist():
+            return False
+        devices[device_count % self.max_devices] = device_id
+        self._device_count[stripe, slot] = device_count + 1
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "keys": len(self),
+            "capacity": self.stripes * self.slots_per_stripe,
+            "bytes": int(self._table.nbytes),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def clear(self) -> None:
+        for stripe in range(self.stripes):
+            with self._locked(stripe):
+                self._seen[stripe] = 0.0
+
+    def close(self) -> None:
+        self._mmap.flush()
+        self._mmap.close()
+        os.close(self._fd)
+
+
+class SharedMemoryBehaviorStore:
+    """Per-user and per-device state in two SharedMemoryTables on one host.
+
+    Users live in ``path`` (device sets plus velocity windows) and devices in
+    ``<path>-devices`` (velocity windows only).
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        max_users: int = 100_000,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_devices: int = 16,
+        windows: Optional[SlidingWindows] = None,
+        on_lock_wait: Optional[Callable[[float], None]] = None,
+    ) -> None:
+        path = Path(path)
+        self.windows = windows or SlidingWindows()
+        self.users = SharedMemoryTable(
+            path, max_users, ttl_seconds, max_devices, windows=self.windows, on_lock_wait=on_lock_wait
+        )
+        self.devices = SharedMemoryTable(
+            path.with_name(f"{path.name}-devices"),
+            max_users,
+            ttl_seconds,
+            0,
+            windows=self.windows,
+            on_lock_wait=on_lock_wait,
+        )
+
+    def __len__(self) -> int:
+        return len(self.users)
+
+    def observe(self, user_id: int, device_id: int, now: float) -> Tuple[bool, List[int], List[int]]:
+        new_devices, user_counts, device_counts = self.observe_batch([user_id], [device_id], now)
+        return new_devices[0], user_counts[0], device_counts[0]
+
+    def observe_batch(self, user_ids: Sequence[int], device_ids: Sequence[int], now: float) -> Observation:
+        new_devices, user_counts = self.users.observe_batch(user_ids, device_ids, now)
+        _, device_counts = self.devices.observe_batch(device_ids, None, now)
+        return new_devices, user_counts, device_counts
+
+    def stats(self) -> Dict[str, int]:
+        stats = {f"user_{key}": value for key, value in self.users.stats().items()}
+        stats.update({f"device_{key}": value for key, value in self.devices.stats().items()})
+        stats["users"] = stats.pop("user_keys")
+        stats["devices"] = stats.pop("device_keys")
+        return stats
+
+    def clear(self) -> None:
+        self.users.clear()
+        self.devices.clear()
+
+    def close(self) -> None:
+        self.users.close()
+        self.devices.close()
+
+
+class RedisBehaviorStore:
+    """Behavior state in Redis (or any server speaking the Redis protocol).
+
+    Per user, device IDs live in a set and ``SADD`` reports whether the device
+    is new. Velocity windows are per-bucket counter keys that expire once they
+    slide out of their window: ``INCR`` bumps the current bucket and ``MGET``
+    reads the whole ring. All commands for a batch go out in one
+    non-transactional pipeline, so a batch costs a single round trip.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        ttl_seconds: float = 7 * 24 * 3600,
+        prefix: str = "fraudguard:behavior",
+        windows: Optional[SlidingWindows] = None,
+    ) -> None:
+        self.client = client
+        self.ttl_seconds = int(ttl_seconds)
+        self.prefix = prefix
+        self.windows = windows or SlidingWindows()
+        self.observations = 0
+        self.round_trips = 0
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisBehaviorStore":
+        try:
+            import redis
+        except ImportError as exc:
+            raise RuntimeError("BEHAVIOR_BACKEND=redis requires the 'redis' package (pip install redis)") from exc
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}:user:*:devices", count=1000))
+
+    def observe(self, user_id: int, device_id: int, now: float) -> Tuple[bool, List[int], List[int]]:
+        new_devices, user_counts, device_counts = self.observe_batch([user_id], [device_id], now)
+        return new_devices[0], user_counts[0], device_counts[0]
+
+    def _queue_windows(self, pipe: Any, key: str, epochs: List[int]) -> None:
+        for window, epoch in enumerate(epochs):
+            size = self.windows.buckets[window]
+            label = self.windows.labels[window]
+            bucket_key = f"{key}:{label}:{epoch}"
+            pipe.incr(bucket_key)
+            pipe.expire(bucket_key, int(self.windows.seconds[window] + self.windows.widths[window]) + 1)
+            pipe.mget([f"{key}:{label}:{bucket}" for bucket in range(epoch - size + 1, epoch + 1)])
+
+    def observe_batch(self, user_ids: Sequence[int], device_ids: Sequence[int], now: float) -> Observation:
+        epochs = self.windows.epochs(now)
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, device_id in zip(user_ids, device_ids):
+            devices_key = f"{self.prefix}:user:{user_id}:devices"
+            pipe.sadd(devices_key, int(device_id))
+            pipe.expire(devices_key, self.ttl_seconds)
+            self._queue_windows(pipe, f"{self.prefix}:user:{user_id}", epochs)
+            self._queue_windows(pipe, f"{self.prefix}:device:{device_id}", epochs)
+        results = pipe.execute()
+        self.observations += len(user_ids)
+        self.round_trips += 1
+
+        per_row = 2 + 2 * 3 * len(epochs)
+        new_devices: List[bool] = []
+        user_counts: List[List[int]] = []
+        device_counts: List[List[int]] = []
+        for row in range(len(user_ids)):
+            chunk = results[row * per_row : (row + 1) * per_row]
+            new_devices.append(bool(chunk[0]))
+            reads = [sum(int(value) for value in values if value is not None) for values in chunk[4::3]]
+            user_counts.append(reads[: len(epochs)])
+            device_counts.append(reads[len(epochs) :])
+        return new_devices, user_counts, device_counts
+
+    def stats(self) -> Dict[str, int]:
+        return {"observations": self.observations, "round_trips": self.round_trips}
+
+    def clear(self) -> None:
+        keys = list(self.client.scan_iter(match=f"{self.prefix}:*", count=1000))
+        if keys:
+            self.client.delete(*keys)
@@ -0,0 +1,107 @@
+import multiprocessing
+import time
+
+import pytest
+
+from behavior import BehaviorStore, RedisBehaviorStore, ShardedBehaviorStore, SharedMemoryBehaviorStore
+from windows import SlidingWindows
+
+NOW = float(int(time.time()))
+
+
+def test_new_device_tracking_and_hour_window_counts():
+    store = BehaviorStore(max_keys=8, max_devices=4)
+
+    assert store.observe_batch([1, 1, 1], [100, 100, 101], NOW) == ([True, False, True], [[1, 1, 1], [2, 2, 2], [3, 3, 3]])
+    assert store.observe_batch([1], [101], NOW + 120) == ([False], [[1, 4, 4]])
+
+
+def test_least_recently_used_key_is_evicted_at_capacity():
+    store = BehaviorStore(max_keys=2)
+    store.observe_batch([1, 2, 1, 3], [10, 20, 10, 30], NOW)
+
+    assert store.observe_batch([1], [10], NOW) == ([False], [[3, 3, 3]])
+    assert store.observe_batch([2], [20], NOW) == ([True], [[1, 1, 1]])
+    assert store.stats()["evictions"] == 2
+
+
+def test_idle_keys_expire_after_ttl():
+    store = BehaviorStore(ttl_seconds=0)
+    store.observe_batch([1], [10], NOW)
+
+    assert store.observe_batch([1], [10], NOW) == ([True], [[1, 1, 1]])
+    assert store.stats()["expirations"] == 1
+
+
+def test_memory_ceiling_bounds_capacity():
+    store = BehaviorStore(max_keys=1_000_000, max_devices=8, max_bytes=1_000_000)
+
+    assert store.max_keys * BehaviorStore.bytes_per_key(8, store.windows) <= 1_000_000
+
+
+def test_sharded_batch_keeps_request_order_and_counts_devices():
+    store = ShardedBehaviorStore(shards=4, max_users=64)
+
+    new_devices, user_counts, device_counts = store.observe_batch([1, 2, 1, 5, 1], [7, 8, 7, 9, 6], NOW)
+
+    assert new_devices == [True, True, False, True, True]
+    assert [counts[2] for counts in user_counts] == [1, 1, 2, 1, 3]
+    assert [counts[2] for counts in device_counts] == [1, 1, 2, 1, 1]
+    assert store.stats()["users"] == 3
+    assert store.stats()["devices"] == 4
+
+
+def _observe_in_worker(path, user_id, device_id):
+    SharedMemoryBehaviorStore(path, max_users=64).observe(user_id, device_id, NOW)
+
+
+def test_shared_memory_store_is_shared_across_workers(tmp_path):
+    path = tmp_path / "behavior.shm"
+    first = SharedMemoryBehaviorStore(path, max_users=64)
+    second = SharedMemoryBehaviorStore(path, max_users=64)
+
+    assert first.observe(42, 7, NOW) == (True, [1, 1, 1], [1, 1, 1])
+    assert second.observe(42, 7, NOW) == (False, [2, 2, 2], [2, 2, 2])
+
+    worker = multiprocessing.get_context("fork").Process(target=_observe_in_worker, args=(path, 42, 8))
+    worker.start()
+    worker.join()
+
+    new_devices, user_counts, _ = first.observe_batch([42, 43, 42], [8, 1, 9], NOW)
+    assert new_devices == [False, True, True]
+    assert [counts[0] for counts in user_counts] == [4, 1, 5]
+    assert first.stats()["users"] == 2
+
+
+def test_shared_memory_store_rejects_mismatched_layout(tmp_path):
+    path = tmp_path / "behavior.shm"
+    SharedMemoryBehaviorStore(path, max_users=64).close()
+
+    with pytest.raises(ValueError):
+        SharedMemoryBehaviorStore(path, max_users=64, max_devices=4)
+
+
+def test_redis_store_pipelines_a_batch_into_one_round_trip():
+    fakeredis = pytest.importorskip("fakeredis")
+    store = RedisBehaviorStore(fakeredis.FakeRedis())
+
+    new_devices, user_counts, device_counts = store.observe_batch([1, 1, 2, 1], [10, 10, 20, 11], NOW)
+    assert new_devices == [True, False, True, True]
+    assert [counts[2] for counts in user_counts] == [1, 2, 1, 3]
+    assert [counts[2] for counts in device_counts] == [1, 2, 1, 1]
+
+    assert store.observe(1, 11, NOW + 120) == (False, [1, 4, 4], [1, 2, 2])
+    assert store.stats() == {"observations": 5, "round_trips": 2}
+
+
+def test_sliding_window_keeps_counts_across_the_hour_boundary():
+    windows = SlidingWindows()
+    buckets, heads, totals = windows.allocate(1)
+    top_of_hour = 1_700_002_800.0
+
+    for offset in range(-300, 300, 60):
+        counts = windows.add(buckets[0], heads[0], totals[0], top_of_hour + offset)
+
+    assert counts == [1, 10, 10]
+    assert windows.add(buckets[0], heads[0], totals[0], top_of_hour + 3300)[2] == 6
+    assert windows.add(buckets[0], heads[0], totals[0], top_of_hour + 7200) == [1, 1, 1]
@@ -0,0 +1,336 @@
+"""
+Load test and latency benchmark for the scoring API.
+
+``replay`` sends transactions from Dataset CSVs or a JSON-lines capture of
+request bodies at a fixed open-loop rate, either to the app in this process
+or to a running server (``--url``). It reports p50/p95/p99/p999 latency,
+throughput and error rate. Latency is measured from each request's
+scheduled send time, so a server that falls behind shows up as queueing
+instead of quietly slowing the sender down. ``micro`` times preprocessing,
+the ONNX run and the rules on their own. Both can save their results as
+JSON, and ``compare`` diffs two saved runs, e.g. from two commits:
+
+    python bench_api.py replay --rate 200 --duration 30 --output before.json
+    python bench_api.py replay --url http://localhost:8000 --endpoint batch --batch-size 64 --rate 50
+    python bench_api.py micro --batch-sizes 1,32,256 --output micro.json
+    python bench_api.py compare before.json after.json
+
+In-process runs share this process's CPU between the load generator and the
+app; use ``--url`` against a separate server for capacity numbers. Replays
+cycle through a fixed set of transactions, so each request carries a fresh
+Idempotency-Key to keep the API's result cache from answering repeats;
+``--cache-hits`` keys each request by its body to measure the cache instead.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import subprocess
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import pandas as pd
+from pydantic import ValidationError
+
+from behavior import ShardedBehaviorStore
+from codec import MSGPACK_MEDIA_TYPE, pack_msgpack
+from features import GraphFeeds
+from main import RULES, VELOCITY_WINDOWS, Transaction, app, behavior_context, build_features, load_artifacts
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "Dataset"
+FIELDS = list(Transaction.model_fields)
+ENDPOINTS = {"detect": "/detect", "batch": "/detect/batch", "msgpack": "/detect/msgpack"}
+PERCENTILES = {"p50": 50, "p95": 95, "p99": 99, "p999": 99.9}
+
+
+def load_transactions(paths: List[Path], users: int = 1000) -> List[Dict[str, Any]]:
+    """Read CSV rows or JSON lines (one transaction, or one batch array, per line) as validated payloads.
+
+    Rows without a ``User_ID`` (the Dataset CSVs have none) are spread over ``users`` synthetic users.
+    Rows the API would reject with 422 (e.g. fractional counts in the adversarial set) are skipped.
+    """
+    payloads: List[Dict[str, Any]] = []
+    skipped = 0
+    for path in paths:
+        if path.suffix == ".jsonl":
+            rows: List[Dict[str, Any]] = []
+            with path.open() as handle:
+                for line in handle:
+                    if line.strip():
+                        body = json.loads(line)
+                        rows.extend(body if isinstance(body, list) else [body])
+        else:
+            rows = pd.read_csv(path).to_dict("records")
+        for row in rows:
+            if "User_ID" not in row:
+                row["User_ID"] = len(payloads) % users
+            try:
+                payloads.append(Transaction(**{name: row.get(name) for name in FIELDS}).model_dump())
+            except ValidationError:
+                skipped += 1
+    if skipped:
+        print(f"Skipped {skipped} rows that fail Transaction validation")
+    if not payloads:
+        raise ValueError("No transactions to replay")
+    return payloads
+
+
+def build_requests(payloads: List[Dict[str, Any]], endpoint: str, batch_size: int) -> List[Tuple[bytes, str, int]]:
+    """Encode the request bodies once, up front, as (body, content type, transactions)."""
+    if endpoint == "detect":
+        return [(json.dumps(payload).encode(), "application/json", 1) for payload in payloads]
+    batches = [payloads[start : start + batch_size] for start in range(0, len(payloads), batch_size)]
+    if endpoint == "msgpack":
+        return [(pack_msgpack(batch), MSGPACK_MEDIA_TYPE, len(batch)) for batch in batches]
+    return [(json.dumps(batch).encode(), "application/json", len(batch)) for batch in batches]
+
+
+@asynccontextmanager
+async def open_client(url: Optional[str], connections: int, timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    if url:
+        async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+            yield client
+        return
+    # ASGITransport does not run startup/shutdown handlers, so load the artifacts here.
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://in-process", timeout=timeout) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+
+
+async def send(
+    client: httpx.AsyncClient, path: str, request: Tuple[bytes, str, int], scheduled: float, unique: bool = True
+) -> Tuple[float, int]:
+    body, content_type, _ = request
+    headers = {"Content-Type": content_type}
+    # A per-body key makes every repeat of a row a retry that the result cache answers.
+    headers["Idempotency-Key"] = uuid.uuid4().hex if unique else hashlib.blake2b(body, digest_size=16).hexdigest()
+    try:
+        response = await client.post(path, content=body, headers=headers)
+        code = response.status_code
+    except httpx.HTTPError:
+        code = 0
+    return time.perf_counter() - scheduled, code
+
+
+async def replay(
+    client: httpx.AsyncClient,
+    path: str,
+    requests: List[Tuple[bytes, str, int]],
+    rate: float,
+    count: int,
+    poisson: bool = False,
+    seed: int = 0,
+    unique: bool = True,
+) -> Tuple[List[Tuple[float, int]], float]:
+    """Send ``count`` requests at ``rate`` per second without waiting for responses; return (latency, status)s."""
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    scheduled = start
+    tasks = []
+    for index in range(count):
+        delay = scheduled - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(client, path, requests[index % len(requests)], scheduled, unique)))
+        scheduled += rng.expovariate(rate) if poisson else 1 / rate
+    results = await asyncio.gather(*tasks)
+    return results, time.perf_counter() - start
+
+
+def summarize(results: List[Tuple[float, int]], elapsed: float, transactions_per_request: float) -> Dict[str, Any]:
+    ok = np.array([latency for latency, code in results if code == 200]) * 1000
+    statuses: Dict[str, int] = {}
+    for _, code in results:
+        statuses[str(code)] = statuses.get(str(code), 0) + 1
+    errors = len(results) - len(ok)
+    latency = {name: round(float(np.percentile(ok, q)), 3) if len(ok) else None for name, q in PERCENTILES.items()}
+    latency["mean"] = round(float(ok.mean()), 3) if len(ok) else None
+    latency["max"] = round(float(ok.max()), 3) if len(ok) else None
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "error_rate": round(errors / len(results), 4) if results else 0.0,
+        "statuses": statuses,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(ok) / elapsed, 1) if elapsed else 0.0,
+        "transactions_per_s": round(len(ok) * transactions_per_request / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": latency,
+    }
+
+
+async def run_replay(args: argparse.Namespace) -> Dict[str, Any]:
+    payloads = load_transactions(args.source, args.users)
+    requests = build_requests(payloads, args.endpoint, args.batch_size)
+    count = args.requests or max(1, int(args.rate * args.duration))
+    path = ENDPOINTS[args.endpoint]
+    async with open_client(args.url, args.connections, args.timeout) as client:
+        unique = not args.cache_hits
+        for request in requests[: args.warmup]:
+            await send(client, path, request, time.perf_counter(), unique)
+        results, elapsed = await replay(client, path, requests, args.rate, count, args.poisson, args.seed, unique)
+    mean_rows = sum(requests[index % len(requests)][2] for index in range(count)) / count
+    return summarize(results, elapsed, mean_rows)
+
+
+def time_call(call: Any, repeats: int) -> float:
+    call()
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        call()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings))
+
+
+def run_micro(args: argparse.Namespace) -> Dict[str, Any]:
+    """Median seconds per batch for preprocessing, the ONNX run, the behavior update and the rules."""
+    payloads = load_transactions(args.source, args.users)
+    preprocessor, session, input_name = load_artifacts()
+    rules = RULES.current()
+    store = ShardedBehaviorStore(windows=VELOCITY_WINDOWS)
+    results: Dict[str, Any] = {}
+    for size in args.batch_sizes:
+        batch = [payloads[row % len(payloads)] for row in range(size)]
+        users = [payload["User_ID"] for payload in batch]
+        devices = [payload["Device_ID"] for payload in batch]
+        if isinstance(preprocessor, GraphFeeds):
+            preprocess = lambda: preprocessor.feeds(batch)  # noqa: E731
+        else:
+            preprocess = lambda: {input_name: build_features(batch, preprocessor)}  # noqa: E731
+        feeds = preprocess()
+        context = behavior_context(users, devices, time.time(), store)
+        stages = {
+            "preprocess": preprocess,
+            "onnx": lambda: session.run(None, feeds),
+            "behavior": lambda: behavior_context(users, devices, time.time(), store),
+            "rules": lambda: rules.evaluate(batch, context),
+        }
+        results[str(size)] = {stage: time_call(call, args.repeats) for stage, call in stages.items()}
+    return results
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_replay(summary: Dict[str, Any]) -> None:
+    print(
+        f"requests {summary['requests']}  errors {summary['errors']} ({summary['error_rate']:.2%})  "
+        f"throughput {summary['throughput_rps']:,.1f} req/s ({summary['transactions_per_s']:,.1f} tx/s)"
+    )
+    print("latency ms  " + "  ".join(f"{name} {value}" for name, value in summary["latency_ms"].items()))
+
+
+def print_micro(results: Dict[str, Any]) -> None:
+    print(f"{'batch':>8}{'stage':>12}{'median us':>14}{'us/row':>10}")
+    for size, stages in results.items():
+        for stage, seconds in stages.items():
+            print(f"{size:>8}{stage:>12}{seconds * 1e6:>14,.1f}{seconds * 1e6 / int(size):>10.2f}")
+
+
+def print_comparison(before: Dict[str, Any], after: Dict[str, Any]) -> None:
+    if before["kind"] != after["kind"]:
+        raise SystemExit(f"Cannot compare a {before['kind']} run with a {after['kind']} run")
+    rows: List[Tuple[str, Optional[float], Optional[float]]] = []
+    if before["kind"] == "replay":
+        for name in list(PERCENTILES) + ["mean", "max"]:
+            rows.append((f"{name} ms", before["results"]["latency_ms"][name], after["results"]["latency_ms"][name]))
+        for name in ("throughput_rps", "transactions_per_s", "error_rate"):
+            rows.append((name, before["results"][name], after["results"][name]))
+    else:
+        for size, stages in after["results"].items():
+            for stage, seconds in stages.items():
+                old = before["results"].get(size, {}).get(stage)
+                rows.append((f"{stage} x{size} us", None if old is None else old * 1e6, seconds * 1e6))
+    print(f"{'metric':>22}{before.get('commit') or 'before':>14}{after.get('commit') or 'after':>14}{'change':>10}")
+    for name, old, new in rows:
+        change = f"{(new - old) / old:+.1%}" if old and new is not None else "-"
+        print(f"{name:>22}{_cell(old):>14}{_cell(new):>14}{change:>10}")
+
+
+def _cell(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:,.3f}"
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Latency and throughput benchmarks for the scoring API")
+    commands = parser.add_subparsers(dest="command", required=True)
+    default_sources = sorted(DATASET_DIR.glob("*.csv"))
+
+    replay_parser = commands.add_parser("replay", help="Open-loop load test against the app or a running server")
+    replay_parser.add_argument("--source", type=Path, nargs="+", default=default_sources, help="CSV or .jsonl files")
+    replay_parser.add_argument("--url", help="Base URL of a running server (default: the app in this process)")
+    replay_parser.add_argument("--endpoint", choices=sorted(ENDPOINTS), default="detect")
+    replay_parser.add_argument("--batch-size", type=int, default=32, help="Transactions per batch/msgpack request")
+    replay_parser.add_argument("--rate", type=float, default=100.0, help="Requests per second")
+    replay_parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load (unless --requests)")
+    replay_parser.add_argument("--requests", type=int, default=0)
+    replay_parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    replay_parser.add_argument("--warmup", type=int, default=50, help="Requests sent one at a time before timing")
+    replay_parser.add_argument("--connections", type=int, default=256)
+    replay_parser.add_argument("--timeout", type=float, default=10.0)
+    replay_parser.add_argument("--users", type=int, default=1000)
+    replay_parser.add_argument("--seed", type=int, default=0)
+    replay_parser.add_argument(
+        "--cache-hits", action="store_true", help="Key requests by body so repeated rows hit the result cache"
+    )
+    replay_parser.add_argument("--output", type=Path, help="Save the run as JSON")
+
+    micro_parser = commands.add_parser("micro", help="Time preprocessing, ONNX and rules in isolation")
+    micro_parser.add_argument("--source", type=Path, nargs="+", default=default_sources)
+    micro_parser.add_argument("--batch-sizes", type=parse_sizes, default=[1, 8, 32, 128, 512])
+    micro_parser.add_argument("--repeats", type=int, default=200)
+    micro_parser.add_argument("--users", type=int, default=1000)
+    micro_parser.add_argument("--output", type=Path, help="Save the run as JSON")
+
+    compare_parser = commands.add_parser("compare", help="Diff two saved runs")
+    compare_parser.add_argument("before", type=Path)
+    compare_parser.add_argument("after", type=Path)
+    args = parser.parse_args()
+
+    if args.command == "compare":
+        print_comparison(json.loads(args.before.read_text()), json.loads(args.after.read_text()))
+        return
+    if args.command == "replay":
+        results = asyncio.run(run_replay(args))
+        print_replay(results)
+    else:
+        results = run_micro(args)
+        print_micro(results)
+    if args.output:
+        config = {key: str(value) if isinstance(value, Path) else value for key, value in vars(args).items()}
+        config["source"] = [str(path) for path in args.source]
+        record = {
+            "kind": args.command,
+            "created": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "config": config,
+            "results": results,
+        }
+        args.output.write_text(json.dumps(record, indent=2))
+        print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
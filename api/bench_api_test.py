@@ -0,0 +1,32 @@
+import asyncio
+from pathlib import Path
+
+from bench_api import build_requests, load_transactions, open_client, replay, summarize
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+def test_summary_percentiles_and_error_rate():
+    results = [(index / 1000, 200) for index in range(1, 101)] + [(0.5, 503), (0.5, 0)]
+
+    summary = summarize(results, elapsed=2.0, transactions_per_request=4)
+
+    assert summary["requests"] == 102 and summary["errors"] == 2
+    assert summary["statuses"] == {"200": 100, "503": 1, "0": 1}
+    assert summary["throughput_rps"] == 50.0 and summary["transactions_per_s"] == 200.0
+    assert summary["latency_ms"]["p50"] == 50.5 and summary["latency_ms"]["max"] == 100.0
+
+
+def test_open_loop_replay_against_the_in_process_app():
+    payloads = load_transactions([DATASET], users=10)
+    requests = build_requests(payloads, "batch", batch_size=8)
+
+    async def scenario():
+        async with open_client(None, connections=16, timeout=10) as client:
+            return await replay(client, "/detect/batch", requests, rate=200, count=20, poisson=True)
+
+    results, elapsed = asyncio.run(scenario())
+
+    assert len(payloads) == 100 and [rows for _, _, rows in requests][-1] == 4
+    assert [code for _, code in results] == [200] * 20
+    assert elapsed > 0
@@ -0,0 +1,55 @@
+"""
+Behavior-store throughput as the request threadpool grows.
+
+Each thread replays ``observe`` calls for random users, the way FastAPI's
+threadpool does for concurrent ``/detect`` requests, against a single-lock
+store (``--shards 1`` behaves like the old global ``BEHAVIOR_LOCK``) and a
+lock-striped one.
+
+    python bench_behavior.py --threads 1,2,4,8,16,32 --shards 1,16
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from behavior import ShardedBehaviorStore
+
+
+def run(store: ShardedBehaviorStore, threads: int, calls_per_thread: int, users: int) -> float:
+    def worker(seed: int) -> None:
+        rng = random.Random(seed)
+        pairs = [(rng.randrange(users), rng.randrange(4)) for _ in range(calls_per_thread)]
+        for user_id, device_id in pairs:
+            store.observe(user_id, device_id, time.time())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(worker, range(threads)))
+    return threads * calls_per_thread / (time.perf_counter() - start)
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark behavior-store throughput against threadpool size")
+    parser.add_argument("--threads", type=parse_sizes, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--shards", type=parse_sizes, default=[1, 16])
+    parser.add_argument("--calls", type=int, default=20_000, help="observe() calls per thread")
+    parser.add_argument("--users", type=int, default=50_000)
+    args = parser.parse_args()
+
+    print(f"{'threads':>8}" + "".join(f"{f'shards={count} ops/s':>22}" for count in args.shards))
+    for threads in args.threads:
+        row = f"{threads:>8}"
+        for count in args.shards:
+            store = ShardedBehaviorStore(shards=count, max_users=args.users)
+            row += f"{run(store, threads, args.calls, args.users):>22,.0f}"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
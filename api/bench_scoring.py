@@ -0,0 +1,95 @@
+"""
+Bulk-scoring throughput as the worker count grows.
+
+Tiles a Dataset CSV into ``--rows`` in-memory rows and pushes them through
+``score_file.score_stream``. The run is repeated in-process (0 workers) and
+for each worker count, with shared-memory feature slots and with whole chunks
+pickled to the pool. File I/O is left out, so the numbers show scoring
+throughput only:
+
+    python bench_scoring.py --workers 1,2,4,8,16,32 --rows 1000000
+
+With shared-memory slots the workers build the features and run the model.
+Behavior, rules, output formatting and the column copy into the slots stay
+serial in the parent, so the speedup levels off at (in-process time) /
+(parent time). The last table
+breaks the parent's time down by stage from the 1-worker shared-memory run
+and prints that ceiling for the machine it runs on.
+"""
+import argparse
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from main import RULE_COLUMNS, RULES_PATH
+from rules import CompiledRules
+from score_file import create_backend, score_stream
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "Dataset"
+
+
+def make_chunks(csv_path: Path, rows: int, chunk_size: int) -> List[pd.DataFrame]:
+    sample = pd.read_csv(csv_path)
+    repeats = -(-rows // len(sample))
+    frame = pd.concat([sample] * repeats, ignore_index=True).head(rows)
+    return [frame.iloc[start : start + chunk_size] for start in range(0, rows, chunk_size)]
+
+
+def run(
+    chunks: List[pd.DataFrame],
+    rules: CompiledRules,
+    workers: int,
+    chunk_size: int,
+    shared: bool,
+    timings: Optional[Dict[str, float]] = None,
+) -> float:
+    backend = create_backend(workers, chunk_size, shared=shared)
+    try:
+        # Warm up the workers' sessions before timing.
+        score_stream(chunks[: max(1, workers)], lambda _: None, backend, rules, None)
+        start = time.perf_counter()
+        rows = score_stream(chunks, lambda _: None, backend, rules, None, timings=timings)
+        return rows / (time.perf_counter() - start)
+    finally:
+        backend.close()
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark bulk-scoring rows/sec against worker count")
+    parser.add_argument("--workers", type=parse_sizes, default=[1, 2, 4, 8])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--csv", type=Path, default=DATASET_DIR / "test_dataset_100_mixed.csv")
+    args = parser.parse_args()
+
+    chunks = make_chunks(args.csv, args.rows, args.chunk_size)
+    rules = CompiledRules.from_file(RULES_PATH, RULE_COLUMNS)
+
+    baseline = run(chunks, rules, 0, args.chunk_size, shared=True)
+    print(f"{'workers':>8}{'shm rows/s':>16}{'speedup':>10}{'pickle rows/s':>16}{'speedup':>10}")
+    print(f"{0:>8}{baseline:>16,.0f}{1.0:>10.2f}{baseline:>16,.0f}{1.0:>10.2f}")
+    for workers in args.workers:
+        shared = run(chunks, rules, workers, args.chunk_size, shared=True)
+        pickled = run(chunks, rules, workers, args.chunk_size, shared=False)
+        print(f"{workers:>8}{shared:>16,.0f}{shared / baseline:>10.2f}{pickled:>16,.0f}{pickled / baseline:>10.2f}")
+
+    timings: Dict[str, float] = {}
+    run(chunks, rules, 1, args.chunk_size, shared=True, timings=timings)
+    per_100k = 100_000 / args.rows
+    serial = sum(seconds for stage, seconds in timings.items() if stage != "wait")
+    print(f"\nParent time per 100k rows, 1 worker, shared memory ({os.cpu_count()} CPUs):")
+    for stage, seconds in timings.items():
+        print(f"{stage:>10}{seconds * per_100k:>10.3f}s{'  (waiting on workers)' if stage == 'wait' else ''}")
+    print(f"Serial parent work {serial * per_100k:.3f}s vs {args.rows / baseline * per_100k:.3f}s in-process:")
+    print(f"speedup ceiling {args.rows / baseline / serial:.1f}x however many workers")
+
+
+if __name__ == "__main__":
+    main()
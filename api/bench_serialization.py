@@ -0,0 +1,115 @@
+"""
+Request/response serialization cost per transaction, without the model.
+
+Compares, for the same batch of Dataset rows and canned results:
+
+- ``json+pydantic``: stdlib JSON parse, ``Transaction`` validation,
+  ``AlertResponse`` validation, stdlib JSON render (the old ``/detect`` path)
+- ``orjson+pydantic``: orjson parse, ``Transaction`` validation, orjson
+  render of the result dicts without re-validating them
+- ``msgpack``: msgpack unpack, ``TransactionDecoder`` checks, msgpack pack
+  (``/detect/msgpack``)
+
+    python bench_serialization.py --batch-sizes 1,32,1000
+"""
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+import msgpack
+import orjson
+import pandas as pd
+
+from codec import TransactionDecoder
+from main import AlertResponse, Transaction
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "Dataset"
+FIELDS = list(Transaction.model_fields)
+DECODER = TransactionDecoder.from_model(Transaction)
+
+
+def load_payloads(csv_path: Path, count: int) -> List[Dict[str, Any]]:
+    frame = pd.read_csv(csv_path)
+    frame["User_ID"] = frame.index
+    rows = [Transaction(**{name: row[name] for name in FIELDS}).model_dump() for row in frame.to_dict("records")]
+    return [rows[index % len(rows)] for index in range(count)]
+
+
+def canned_results(payloads: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [
+        {
+            "Transaction_ID": 1_700_000_000_000 + index,
+            "User_ID": payload["User_ID"],
+            "Fraud_Probability": 0.0123,
+            "Final_Risk_Score": 0.5123,
+            "isFraud_pred": 0,
+            "alert_triggered": False,
+            "alert_reasons": ["New Device", "Burst"],
+            "timestamp": "2024-01-01T00:00:00.000000",
+        }
+        for index, payload in enumerate(payloads)
+    ]
+
+
+def json_pydantic(body: bytes, results: List[Dict[str, Any]]) -> bytes:
+    payloads = [Transaction(**row).model_dump() for row in json.loads(body)]
+    assert len(payloads) == len(results)
+    return json.dumps([AlertResponse(**result).model_dump() for result in results]).encode()
+
+
+def orjson_pydantic(body: bytes, results: List[Dict[str, Any]]) -> bytes:
+    payloads = [Transaction(**row).model_dump() for row in orjson.loads(body)]
+    assert len(payloads) == len(results)
+    return orjson.dumps(results)
+
+
+def msgpack_decoder(body: bytes, results: List[Dict[str, Any]]) -> bytes:
+    payloads = DECODER.decode(msgpack.unpackb(body, raw=False))
+    assert len(payloads) == len(results)
+    return msgpack.packb(results, use_bin_type=True)
+
+
+Handler = Callable[[bytes, List[Dict[str, Any]]], bytes]
+
+
+def time_per_row(handler: Handler, body: bytes, results: List[Dict[str, Any]], rows: int) -> float:
+    repeats = max(5, 20_000 // rows)
+    handler(body, results)
+    start = time.perf_counter()
+    for _ in range(repeats):
+        handler(body, results)
+    return (time.perf_counter() - start) / repeats / rows * 1e6
+
+
+def parse_sizes(value: str) -> List[int]:
+    return [int(size) for size in value.split(",") if size.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark JSON/pydantic vs orjson vs msgpack request handling")
+    parser.add_argument("--batch-sizes", type=parse_sizes, default=[1, 32, 1000])
+    parser.add_argument("--csv", type=Path, default=DATASET_DIR / "test_dataset_100_mixed.csv")
+    args = parser.parse_args()
+
+    print(
+        f"{'batch':>6}{'json+pydantic us/row':>24}{'orjson+pydantic us/row':>26}"
+        f"{'msgpack us/row':>18}{'bytes json/msgpack':>22}"
+    )
+    for size in args.batch_sizes:
+        payloads = load_payloads(args.csv, size)
+        results = canned_results(payloads)
+        json_body = json.dumps(payloads).encode()
+        msgpack_body = msgpack.packb([[payload[name] for name in FIELDS] for payload in payloads])
+        print(
+            f"{size:>6}"
+            f"{time_per_row(json_pydantic, json_body, results, size):>24.2f}"
+            f"{time_per_row(orjson_pydantic, json_body, results, size):>26.2f}"
+            f"{time_per_row(msgpack_decoder, msgpack_body, results, size):>18.2f}"
+            f"{f'{len(json_body)}/{len(msgpack_body)}':>22}"
+        )
+
+
+if __name__ == "__main__":
+    main()
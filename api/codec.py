@@ -0,0 +1,111 @@
+"""
+Request/response encoding for the scoring endpoints.
+
+``JSON_RESPONSE`` renders with orjson when it is installed (plain
+``JSONResponse`` otherwise). ``TransactionDecoder`` checks msgpack-decoded
+transactions against the ``Transaction`` schema field by field, without
+building a pydantic model per row. It accepts rows either as maps or as
+compact arrays in schema field order, and accepts and coerces exactly what
+``/detect`` does.
+"""
+from typing import Annotated, Any, Callable, Dict, List, Sequence, Tuple, Type
+
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+try:
+    import orjson  # noqa: F401
+    from fastapi.responses import ORJSONResponse as JSON_RESPONSE
+except ImportError:
+    JSON_RESPONSE = JSONResponse
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+SUPPORTED_TYPES = (int, float, str)
+_MISSING = object()
+
+
+def field_converter(annotation: Any, metadata: Sequence[Any] = ()) -> Callable[[Any], Any]:
+    """Validate one field value the way pydantic's lax mode does for the same annotation and constraints.
+
+    A value of exactly the annotated type, on a field without constraints, is returned as is. Anything
+    else (bools, numeric strings, integral floats, values to range-check) goes through pydantic, so a
+    transaction gets the same answer whether it arrives as JSON or msgpack.
+    """
+    adapter: TypeAdapter = TypeAdapter(Annotated[(annotation, *metadata)] if metadata else annotation)
+    exact = None if metadata else annotation
+
+    def convert(value: Any) -> Any:
+        if type(value) is exact:
+            return value
+        try:
+            return adapter.validate_python(value)
+        except ValidationError as exc:
+            raise ValueError(exc.errors()[0]["msg"]) from None
+
+    return convert
+
+
+class TransactionDecoder:
+    """Checks decoded rows against a flat pydantic model with one converter call per field."""
+
+    def __init__(self, fields: Sequence[Tuple[str, Any]]) -> None:
+        self.fields = list(fields)
+        self.names = [name for name, _ in self.fields]
+
+    @classmethod
+    def from_model(cls, model: Type[BaseModel]) -> "TransactionDecoder":
+        fields = []
+        for name, info in model.model_fields.items():
+            if info.annotation not in SUPPORTED_TYPES:
+                raise ValueError(f"Field '{name}' has unsupported type {info.annotation!r}")
+            fields.append((name, field_converter(info.annotation, info.metadata)))
+        return cls(fields)
+
+    def decode(self, rows: Any) -> List[Dict[str, Any]]:
+        """Return one payload dict per row; raise 422 listing every invalid field."""
+        if not isinstance(rows, list):
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Body must be an array of transactions")
+        payloads: List[Dict[str, Any]] = []
+        errors: List[Dict[str, Any]] = []
+        width = len(self.fields)
+        for index, row in enumerate(rows):
+            if isinstance(row, dict):
+                values = [row.get(name, _MISSING) for name in self.names]
+            elif isinstance(row, list) and len(row) == width:
+                values = row
+            else:
+                errors.append({"loc": [index], "msg": f"Row must be a map or an array of {width} values"})
+                continue
+            payload: Dict[str, Any] = {}
+            for (name, convert), value in zip(self.fields, values):
+                if value is _MISSING:
+                    errors.append({"loc": [index, name], "msg": "Field required"})
+                    continue
+                try:
+                    payload[name] = convert(value)
+                except ValueError as exc:
+                    errors.append({"loc": [index, name], "msg": str(exc)})
+            payloads.append(payload)
+        if errors:
+            raise HTTPException(status.HTTP_422_UNPROCESSABLE_ENTITY, detail=errors[:50])
+        return payloads
+
+
+def unpack_msgpack(body: bytes) -> Any:
+    try:
+        import msgpack
+    except ImportError as exc:
+        raise HTTPException(
+            status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="msgpack ingest requires `pip install msgpack`"
+        ) from exc
+    try:
+        return msgpack.unpackb(body, raw=False, strict_map_key=True)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, detail="Body is not valid msgpack") from exc
+
+
+def pack_msgpack(content: Any) -> bytes:
+    import msgpack
+
+    return msgpack.packb(content, use_bin_type=True)
@@ -0,0 +1,102 @@
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from pydantic import ValidationError
+
+import main
+from codec import MSGPACK_MEDIA_TYPE, TransactionDecoder
+from main import Transaction
+
+msgpack = pytest.importorskip("msgpack")
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+FIELDS = list(Transaction.model_fields)
+
+
+@pytest.fixture(scope="module")
+def payloads():
+    frame = pd.read_csv(DATASET).head(20)
+    frame["User_ID"] = frame.index % 3
+    return [Transaction(**{name: row[name] for name in FIELDS}).model_dump() for row in frame.to_dict("records")]
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(main.app) as client:
+        yield client
+
+
+def test_decoder_matches_pydantic_for_maps_and_arrays(payloads):
+    decoder = TransactionDecoder.from_model(Transaction)
+    arrays = [[payload[name] for name in FIELDS] for payload in payloads]
+
+    assert decoder.decode(payloads) == payloads
+    assert decoder.decode(arrays) == payloads
+    assert decoder.decode([{**payloads[0], "Transaction_Hour": 3.0}])[0]["Transaction_Hour"] == 3
+
+
+def test_decoder_coerces_like_pydantic_lax_mode(payloads):
+    decoder = TransactionDecoder.from_model(Transaction)
+    lax = dict(payloads[0], Transaction_Hour="3", Merchant_ID=True, Transaction_Amount="1500.5", Hour_sin=0)
+    rejected = [dict(payloads[0], Transaction_Hour=value) for value in ("3.5", "three", None)]
+
+    assert decoder.decode([lax]) == [Transaction.model_validate_json(json.dumps(lax)).model_dump()]
+    for row in rejected:
+        with pytest.raises(ValidationError):
+            Transaction.model_validate_json(json.dumps(row))
+        with pytest.raises(HTTPException):
+            decoder.decode([row])
+
+
+def test_decoder_reports_every_invalid_field(payloads):
+    decoder = TransactionDecoder.from_model(Transaction)
+    broken = dict(payloads[0], Transaction_Hour=3.5, Card_Type=7)
+    del broken["User_ID"]
+
+    with pytest.raises(HTTPException) as error:
+        decoder.decode([broken, [1, 2, 3]])
+
+    assert error.value.status_code == 422
+    assert [item["loc"] for item in error.value.detail] == [
+        [0, "User_ID"],
+        [0, "Card_Type"],
+        [0, "Transaction_Hour"],
+        [1],
+    ]
+
+
+def test_msgpack_endpoint_scores_like_the_json_batch_endpoint(client, payloads):
+    strip = lambda result: {key: value for key, value in result.items() if key not in ("Transaction_ID", "timestamp")}
+    main.BEHAVIOR_STORE.clear()
+    expected = client.post("/detect/batch", json=payloads).json()
+    main.BEHAVIOR_STORE.clear()
+
+    response = client.post(
+        "/detect/msgpack",
+        content=msgpack.packb([[payload[name] for name in FIELDS] for payload in payloads]),
+        headers={"Content-Type": MSGPACK_MEDIA_TYPE},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == MSGPACK_MEDIA_TYPE
+    assert [strip(result) for result in msgpack.unpackb(response.content)] == [strip(result) for result in expected]
+
+
+def test_msgpack_endpoint_rejects_malformed_bodies(client, payloads):
+    assert client.post("/detect/msgpack", content=b"\xc1").status_code == 400
+    assert client.post("/detect/msgpack", content=msgpack.packb({"User_ID": 1})).status_code == 422
+    oversized = msgpack.packb([payloads[0]] * (main.MAX_BATCH_SIZE + 1))
+    assert client.post("/detect/msgpack", content=oversized).status_code == 413
+
+
+def test_ids_outside_the_behavior_store_range_are_rejected(client, payloads):
+    for field, value in (("User_ID", 2**63), ("Device_ID", 2**64 - 1), ("User_ID", -1)):
+        row = dict(payloads[0], **{field: value})
+        assert client.post("/detect", json=row).status_code == 422
+        packed = msgpack.packb([row])
+        assert client.post("/detect/msgpack", content=packed).status_code == 422
+    assert client.post("/detect", json=dict(payloads[0], Device_ID=2**63 - 1)).status_code == 200
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from main import Transaction
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+def payloads(count, first_user):
+    frame = pd.read_csv(DATASET).head(count)
+    frame["User_ID"] = first_user + frame.index
+    fields = list(Transaction.model_fields)
+    return [Transaction(**{name: row[name] for name in fields}).model_dump() for row in frame.to_dict("records")]
+
+
+def scores(results):
+    # Transaction_ID and timestamp are assigned per call; User_ID differs between the two runs by construction.
+    skipped = ("Transaction_ID", "User_ID", "timestamp")
+    return [{key: value for key, value in result.items() if key not in skipped} for result in results]
+
+
+def test_batch_results_match_single_detect_calls():
+    # Fresh users on each side so both runs see the same behavior state (first transaction, new device).
+    batch = payloads(20, 700_000)
+    singles = payloads(20, 710_000)
+    with TestClient(main.app) as client:
+        batch_response = client.post("/detect/batch", json=batch)
+        single_results = [client.post("/detect", json=payload).json() for payload in singles]
+
+    assert batch_response.status_code == 200
+    batch_results = batch_response.json()
+    assert [result["User_ID"] for result in batch_results] == [payload["User_ID"] for payload in batch]
+    assert scores(batch_results) == scores(single_results)
+
+
+def test_batch_size_limit_is_enforced(monkeypatch):
+    monkeypatch.setattr(main, "MAX_BATCH_SIZE", 3)
+    with TestClient(main.app) as client:
+        too_large = client.post("/detect/batch", json=payloads(4, 720_000))
+        at_limit = client.post("/detect/batch", json=payloads(3, 730_000))
+        empty = client.post("/detect/batch", json=[])
+
+    assert too_large.status_code == 413
+    assert at_limit.status_code == 200 and len(at_limit.json()) == 3
+    assert empty.status_code == 200 and empty.json() == []
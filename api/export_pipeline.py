@@ -0,0 +1,112 @@
+"""
+Build-time export of the preprocessor and the fraud model as one ONNX graph.
+
+The fitted ColumnTransformer is rewritten as ONNX operators (Sub/Div for the
+StandardScaler, ai.onnx.ml OneHotEncoder for the categorical columns) and
+spliced in front of ``fraud_model.onnx``. The exported graph takes one
+``[N, 1]`` input per raw column (double for numeric, string for categorical),
+so serving it needs neither sklearn nor pandas.
+
+Requires the ``onnx`` package at build time only:
+
+    pip install onnx
+    python export_pipeline.py --output fraud_pipeline.onnx
+"""
+import argparse
+import os
+from pathlib import Path
+from typing import List, Tuple
+
+import joblib
+import numpy as np
+import onnx
+from onnx import TensorProto, helper, numpy_helper
+
+from features import FeatureBuilder
+
+ML_DOMAIN = "ai.onnx.ml"
+# OneHotEncoder has been in ai.onnx.ml since opset 1.
+ML_OPSET_VERSION = 1
+
+
+def build_pipeline(preprocessor, model_path: Path) -> onnx.ModelProto:
+    builder = FeatureBuilder.from_preprocessor(preprocessor)
+    model = onnx.load(str(model_path))
+    graph = model.graph
+    features_name = graph.input[0].name
+
+    inputs: List[onnx.ValueInfoProto] = []
+    nodes: List[onnx.NodeProto] = []
+    initializers: List[onnx.TensorProto] = []
+    blocks: List[Tuple[int, str]] = []
+
+    for block_index, ((columns, mean, scale), start) in enumerate(zip(builder.numeric_blocks, builder.offsets)):
+        for column in columns:
+            inputs.append(helper.make_tensor_value_info(column, TensorProto.DOUBLE, [None, 1]))
+        prefix = f"pre_num{block_index}"
+        initializers.append(numpy_helper.from_array(mean.astype(np.float64), f"{prefix}_mean"))
+        initializers.append(numpy_helper.from_array(scale.astype(np.float64), f"{prefix}_scale"))
+        nodes.extend(
+            [
+                helper.make_node("Concat", list(columns), [f"{prefix}_raw"], axis=1),
+                helper.make_node("Sub", [f"{prefix}_raw", f"{prefix}_mean"], [f"{prefix}_centered"]),
+                helper.make_node("Div", [f"{prefix}_centered", f"{prefix}_scale"], [f"{prefix}_scaled"]),
+                helper.make_node("Cast", [f"{prefix}_scaled"], [f"{prefix}_out"], to=TensorProto.FLOAT),
+            ]
+        )
+        blocks.append((start, f"{prefix}_out"))
+
+    for columns, vocabularies, ignore_unknown in builder.categorical_blocks:
+        for column, vocabulary in zip(columns, vocabularies):
+            categories = sorted(vocabulary, key=vocabulary.get)
+            prefix = f"pre_cat_{column}"
+            inputs.append(helper.make_tensor_value_info(column, TensorProto.STRING, [None, 1]))
+            nodes.extend(
+                [
+                    helper.make_node(
+                        "OneHotEncoder",
+                        [column],
+                        [f"{prefix}_onehot"],
+                        domain=ML_DOMAIN,
+                        cats_strings=[str(category) for category in categories],
+                        zeros=int(ignore_unknown),
+                    ),
+                    helper.make_node("Flatten", [f"{prefix}_onehot"], [f"{prefix}_out"], axis=1),
+                ]
+            )
+            blocks.append((vocabulary[categories[0]], f"{prefix}_out"))
+
+    nodes.append(helper.make_node("Concat", [name for _, name in sorted(blocks)], [features_name], axis=1))
+
+    pipeline_graph = helper.make_graph(
+        nodes + list(graph.node),
+        "fraud_pipeline",
+        inputs,
+        list(graph.output),
+        initializer=initializers + list(graph.initializer),
+        value_info=list(graph.value_info),
+    )
+    opset_imports = list(model.opset_import)
+    if not any(opset.domain == ML_DOMAIN for opset in opset_imports):
+        # A model without ML operators (e.g. a plain neural net) does not import the domain the encoders need.
+        opset_imports.append(helper.make_opsetid(ML_DOMAIN, ML_OPSET_VERSION))
+    pipeline = helper.make_model(pipeline_graph, opset_imports=opset_imports, producer_name="fraudguard")
+    pipeline.ir_version = model.ir_version
+    onnx.checker.check_model(pipeline)
+    return pipeline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Fold preprocessor.pkl into fraud_model.onnx")
+    parser.add_argument("--preprocessor", type=Path, default=Path(os.getenv("PREPROC_PATH", "preprocessor.pkl")))
+    parser.add_argument("--model", type=Path, default=Path(os.getenv("MODEL_PATH", "fraud_model.onnx")))
+    parser.add_argument("--output", type=Path, default=Path("fraud_pipeline.onnx"))
+    args = parser.parse_args()
+
+    pipeline = build_pipeline(joblib.load(args.preprocessor), args.model)
+    onnx.save(pipeline, str(args.output))
+    print(f"Pipeline model written to {args.output} ({len(pipeline.graph.input)} raw inputs)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+import pytest
+
+from features import FeatureBuilder, GraphFeeds
+
+pytest.importorskip("onnx")
+import onnx  # noqa: E402
+from onnx import TensorProto, helper  # noqa: E402
+
+from export_pipeline import ML_DOMAIN, build_pipeline  # noqa: E402
+
+API_DIR = Path(__file__).resolve().parent
+DATASET_DIR = API_DIR.parent / "Dataset"
+
+
+@pytest.mark.parametrize("csv_name", ["test_dataset_100_mixed.csv", "adversarial_test_100.csv"])
+def test_pipeline_matches_separate_artifacts(csv_name):
+    preprocessor = joblib.load(API_DIR / "preprocessor.pkl")
+    model = ort.InferenceSession(str(API_DIR / "fraud_model.onnx"), providers=["CPUExecutionProvider"])
+    pipeline = ort.InferenceSession(
+        build_pipeline(preprocessor, API_DIR / "fraud_model.onnx").SerializeToString(),
+        providers=["CPUExecutionProvider"],
+    )
+    records = pd.read_csv(DATASET_DIR / csv_name).to_dict("records")
+    records[0]["Transaction_Location"] = "Russia"
+
+    features = FeatureBuilder.from_preprocessor(preprocessor).transform(records)
+    expected = model.run(None, {model.get_inputs()[0].name: features})[0]
+    actual = pipeline.run(None, GraphFeeds.from_session(pipeline).feeds(records))[0]
+
+    assert np.array_equal(actual, expected)
+
+
+def test_pipeline_adds_the_ml_opset_when_the_model_lacks_it(tmp_path):
+    preprocessor = joblib.load(API_DIR / "preprocessor.pkl")
+    builder = FeatureBuilder.from_preprocessor(preprocessor)
+    graph = helper.make_graph(
+        [helper.make_node("ReduceSum", ["features"], ["score"], keepdims=0, axes=[1])],
+        "sum_features",
+        [helper.make_tensor_value_info("features", TensorProto.FLOAT, [None, builder.width])],
+        [helper.make_tensor_value_info("score", TensorProto.FLOAT, [None])],
+    )
+    model_path = tmp_path / "plain.onnx"
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 12)])
+    model.ir_version = 8
+    onnx.save(model, str(model_path))
+
+    pipeline = build_pipeline(preprocessor, model_path)
+    session = ort.InferenceSession(pipeline.SerializeToString(), providers=["CPUExecutionProvider"])
+    records = pd.read_csv(DATASET_DIR / "test_dataset_100_mixed.csv").head(5).to_dict("records")
+
+    assert ML_DOMAIN in {opset.domain for opset in pipeline.opset_import}
+    np.testing.assert_allclose(
+        session.run(None, GraphFeeds.from_session(session).feeds(records))[0],
+        builder.transform(records).sum(axis=1),
+        rtol=1e-5,
+    )
@@ -0,0 +1,144 @@
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class FeatureBuilder:
+    """Pandas-free replacement for ``preprocessor.transform``.
+
+    Built once from the fitted ColumnTransformer: StandardScaler blocks keep
+    their means and scales, OneHotEncoder blocks keep their category
+    vocabularies. ``transform`` writes the scaled and encoded values straight
+    into a float32 matrix with the same column layout as the sklearn output.
+    """
+
+    def __init__(
+        self,
+        numeric_blocks: Sequence[Tuple[List[str], np.ndarray, np.ndarray]],
+        categorical_blocks: Sequence[Tuple[List[str], List[Dict[Any, int]], bool]],
+        width: int,
+        offsets: Sequence[int],
+    ) -> None:
+        self.numeric_blocks = list(numeric_blocks)
+        self.categorical_blocks = list(categorical_blocks)
+        self.width = width
+        self.offsets = list(offsets)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor: Any) -> "FeatureBuilder":
+        from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+        if preprocessor.remainder != "drop":
+            raise ValueError("Only ColumnTransformers with a dropped remainder can be compiled")
+
+        numeric_blocks: List[Tuple[List[str], np.ndarray, np.ndarray]] = []
+        categorical_blocks: List[Tuple[List[str], List[Dict[Any, int]], bool]] = []
+        offsets: List[int] = []
+        width = 0
+        for name, transformer, columns in preprocessor.transformers_:
+            if name == "remainder" or transformer == "drop":
+                continue
+            columns = [str(column) for column in columns]
+            if isinstance(transformer, StandardScaler):
+                n_columns = len(columns)
+                mean = transformer.mean_ if transformer.with_mean else np.zeros(n_columns)
+                scale = transformer.scale_ if transformer.with_std else np.ones(n_columns)
+                numeric_blocks.append((columns, np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)))
+                offsets.append(width)
+                width += n_columns
+            elif isinstance(transformer, OneHotEncoder):
+                if transformer.drop is not None or getattr(transformer, "_infrequent_enabled", False):
+                    raise ValueError(f"OneHotEncoder '{name}' uses drop or infrequent categories")
+                vocabularies = []
+                for categories in transformer.categories_:
+                    vocabularies.append({category: width + index for index, category in enumerate(categories)})
+                    width += len(categories)
+                categorical_blocks.append((columns, vocabularies, transformer.handle_unknown == "ignore"))
+            else:
+                raise ValueError(f"Unsupported transformer '{name}' ({type(transformer).__name__})")
+
+        return cls(numeric_blocks, categorical_blocks, width, offsets)
+
+    def transform(self, payloads: Sequence[Dict[str, Any]], out: Optional[np.ndarray] = None) -> np.ndarray:
+        n_rows = len(payloads)
+        if out is None:
+            out = np.zeros((n_rows, self.width), dtype=np.float32)
+        else:
+            out[:n_rows].fill(0.0)
+
+        for (columns, mean, scale), start in zip(self.numeric_blocks, self.offsets):
+            values = np.array([[payload[column] for column in columns] for payload in payloads], dtype=np.float64)
+            values -= mean
+            values /= scale
+            out[:n_rows, start : start + len(columns)] = values
+
+        for columns, vocabularies, ignore_unknown in self.categorical_blocks:
+            for column, vocabulary in zip(columns, vocabularies):
+                for row, payload in enumerate(payloads):
+                    index = vocabulary.get(payload[column])
+                    if index is not None:
+                        out[row, index] = 1.0
+                    elif not ignore_unknown:
+                        raise ValueError(f"Found unknown category {payload[column]!r} in column '{column}'")
+        return out[:n_rows]
+
+    def transform_columns(
+        self, columns: Mapping[str, Sequence[Any]], n_rows: int, out: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """Column-oriented ``transform`` for chunks already held as arrays (e.g. a DataFrame)."""
+        if out is None:
+            out = np.zeros((n_rows, self.width), dtype=np.float32)
+        else:
+            out[:n_rows].fill(0.0)
+
+        for (names, mean, scale), start in zip(self.numeric_blocks, self.offsets):
+            values = np.column_stack([np.asarray(columns[name], dtype=np.float64) for name in names])
+            values -= mean
+            values /= scale
+            out[:n_rows, start : start + len(names)] = values
+
+        for names, vocabularies, ignore_unknown in self.categorical_blocks:
+            for name, vocabulary in zip(names, vocabularies):
+                lookup = vocabulary.get
+                indices = np.fromiter((lookup(value, -1) for value in columns[name]), dtype=np.int64, count=n_rows)
+                known = indices >= 0
+                if not ignore_unknown and not known.all():
+                    value = np.asarray(columns[name], dtype=object)[~known][0]
+                    raise ValueError(f"Found unknown category {value!r} in column '{name}'")
+                rows = np.flatnonzero(known)
+                out[rows, indices[rows]] = 1.0
+        return out[:n_rows]
+
+
+class GraphFeeds:
+    """Raw column feeds for a pipeline model written by ``export_pipeline.py``.
+
+    The pipeline graph takes one ``[N, 1]`` input per raw column, so the only
+    work left on the request path is gathering each column into an array.
+    """
+
+    def __init__(self, inputs: Sequence[Tuple[str, bool]]) -> None:
+        self.inputs = list(inputs)
+
+    @classmethod
+    def from_session(cls, session: Any) -> "GraphFeeds":
+        return cls([(node.name, node.type == "tensor(string)") for node in session.get_inputs()])
+
+    def feeds(self, payloads: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+        return {
+            name: np.array(
+                [str(payload[name]) if is_string else payload[name] for payload in payloads],
+                dtype=object if is_string else np.float64,
+            ).reshape(-1, 1)
+            for name, is_string in self.inputs
+        }
+
+    def feeds_columns(self, columns: Mapping[str, Sequence[Any]]) -> Dict[str, np.ndarray]:
+        feeds: Dict[str, np.ndarray] = {}
+        for name, is_string in self.inputs:
+            if is_string:
+                values = np.array([str(value) for value in columns[name]], dtype=object)
+            else:
+                values = np.asarray(columns[name], dtype=np.float64)
+            feeds[name] = values.reshape(-1, 1)
+        return feeds
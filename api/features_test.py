@@ -0,0 +1,59 @@
+from pathlib import Path
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+
+from features import FeatureBuilder
+
+API_DIR = Path(__file__).resolve().parent
+DATASET_DIR = API_DIR.parent / "Dataset"
+
+
+@pytest.fixture(scope="module")
+def preprocessor():
+    return joblib.load(API_DIR / "preprocessor.pkl")
+
+
+def sklearn_features(preprocessor, frame: pd.DataFrame) -> np.ndarray:
+    features = preprocessor.transform(frame)
+    if hasattr(features, "toarray"):
+        features = features.toarray()
+    return np.asarray(features, dtype=np.float32)
+
+
+@pytest.mark.parametrize("csv_name", ["test_dataset_100_mixed.csv", "adversarial_test_100.csv"])
+def test_builder_matches_preprocessor(preprocessor, csv_name):
+    frame = pd.read_csv(DATASET_DIR / csv_name).drop(columns=["isFraud", "Fraud_Probability", "isFraud_pred"])
+    builder = FeatureBuilder.from_preprocessor(preprocessor)
+
+    expected = sklearn_features(preprocessor, frame)
+    actual = builder.transform(frame.to_dict("records"))
+
+    assert actual.dtype == np.float32
+    assert actual.shape == expected.shape
+    assert np.array_equal(actual.view(np.uint32), expected.view(np.uint32))
+
+
+def test_builder_single_row_and_unknown_category(preprocessor):
+    frame = pd.read_csv(DATASET_DIR / "test_dataset_100_mixed.csv").head(1)
+    frame["Transaction_Location"] = "Russia"
+    builder = FeatureBuilder.from_preprocessor(preprocessor)
+    out = np.full((4, builder.width), np.nan, dtype=np.float32)
+
+    actual = builder.transform(frame.to_dict("records"), out=out)
+
+    assert np.array_equal(actual, sklearn_features(preprocessor, frame))
+    assert np.shares_memory(actual, out)
+
+
+@pytest.mark.parametrize("csv_name", ["test_dataset_100_mixed.csv", "adversarial_test_100.csv"])
+def test_column_transform_matches_row_transform(preprocessor, csv_name):
+    frame = pd.read_csv(DATASET_DIR / csv_name)
+    builder = FeatureBuilder.from_preprocessor(preprocessor)
+
+    expected = builder.transform(frame.to_dict("records"))
+    actual = builder.transform_columns(frame, len(frame))
+
+    assert np.array_equal(actual.view(np.uint32), expected.view(np.uint32))
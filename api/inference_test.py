@@ -0,0 +1,161 @@
+import asyncio
+import threading
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+import main
+from main import InferenceQueue, MicroBatcher, reserve_transaction_ids
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_concurrent_requests_are_scored_in_one_batch():
+    batches = []
+
+    def infer(payloads):
+        batches.append(len(payloads))
+        return np.array([payload["x"] / 10 for payload in payloads])
+
+    async def scenario():
+        queue = InferenceQueue(infer, workers=1, max_pending=16, queue_timeout_ms=1000, max_batch=4, max_wait_us=50_000)
+        try:
+            return await asyncio.gather(*(queue.probability({"x": value}) for value in range(4))), queue.stats()
+        finally:
+            queue.stop()
+
+    results, stats = run(scenario())
+
+    assert results == [0.0, 0.1, 0.2, 0.3]
+    assert batches == [4]
+    assert stats["admitted"] == 4 and stats["pending"] == 0
+
+
+def wait_samples():
+    text = main.METRICS.render()
+    lines = [line for line in text.splitlines() if line.startswith("fraud_inference_queue_wait_seconds_")]
+    return {line.rsplit(" ", 1)[0]: float(line.rsplit(" ", 1)[1]) for line in lines}
+
+
+def test_full_queue_sheds_with_429_and_stale_requests_with_503():
+    release = threading.Event()
+    before = wait_samples()
+
+    def infer(payloads):
+        release.wait(5)
+        return np.zeros(len(payloads))
+
+    async def scenario():
+        queue = InferenceQueue(infer, workers=1, max_pending=2, queue_timeout_ms=20, max_batch=1, max_wait_us=0)
+        try:
+            first = asyncio.ensure_future(queue.probability({}))
+            second = asyncio.ensure_future(queue.probability({}))
+            await asyncio.sleep(0.05)
+            with pytest.raises(HTTPException) as full:
+                await queue.probability({})
+            release.set()
+            outcomes = await asyncio.gather(first, second, return_exceptions=True)
+            return full.value, outcomes, queue.stats()
+        finally:
+            queue.stop()
+
+    full, (first, second), stats = run(scenario())
+
+    assert full.status_code == 429
+    assert first == 0.0
+    assert isinstance(second, HTTPException) and second.status_code == 503
+    assert stats["shed_queue_full"] == 1 and stats["shed_queue_timeout"] == 1
+    # Both admitted requests were timed, including the one shed after waiting too long.
+    after = wait_samples()
+
+    def delta(name):
+        series = f"fraud_inference_queue_wait_seconds_{name}"
+        return after[series] - before.get(series, 0)
+
+    assert delta("count") == 2 and delta("sum") > 0.02
+
+
+def test_inference_errors_reach_every_request_in_the_batch():
+    def infer(payloads):
+        raise HTTPException(status_code=500, detail="Model inference failed")
+
+    async def scenario():
+        queue = InferenceQueue(infer, workers=1, max_pending=8, queue_timeout_ms=1000, max_batch=2, max_wait_us=50_000)
+        try:
+            return await asyncio.gather(queue.probability({}), queue.probability({}), return_exceptions=True)
+        finally:
+            queue.stop()
+
+    assert [error.status_code for error in run(scenario())] == [500, 500]
+
+
+def test_a_failing_payload_only_fails_its_own_queued_request():
+    def infer(payloads):
+        if any(payload["x"] < 0 for payload in payloads):
+            raise HTTPException(status_code=500, detail="Model inference failed")
+        return np.array([payload["x"] / 10 for payload in payloads])
+
+    async def scenario():
+        queue = InferenceQueue(infer, workers=1, max_pending=8, queue_timeout_ms=1000, max_batch=3, max_wait_us=50_000)
+        try:
+            return await asyncio.gather(*(queue.probability({"x": x}) for x in (1, -1, 3)), return_exceptions=True)
+        finally:
+            queue.stop()
+
+    first, failed, third = run(scenario())
+    assert (first, third) == (0.1, 0.3) and failed.status_code == 500
+
+
+def test_a_failing_payload_only_fails_its_own_micro_batched_request():
+    batches, finished = [], []
+
+    def infer(payloads):
+        batches.append(len(payloads))
+        if any(payload["x"] < 0 for payload in payloads):
+            raise ValueError("bad payload")
+        return np.array([payload["x"] * 2.0 for payload in payloads])
+
+    def finish(payloads, probabilities):
+        finished.append([payload["x"] for payload in payloads])
+        return probabilities.tolist()
+
+    batcher = MicroBatcher(infer, finish, max_size=3, max_wait_us=200_000)
+    futures = [batcher.submit({"x": value}) for value in (1, -1, 3)]
+    batcher.start()
+    try:
+        assert futures[0].result(timeout=5) == 2 and futures[2].result(timeout=5) == 6
+        with pytest.raises(ValueError):
+            futures[1].result(timeout=5)
+    finally:
+        batcher.stop()
+    assert batches == [3, 1, 1, 1]
+    # The survivors are finished together, once: behavior is never counted twice.
+    assert finished == [[1, 3]]
+
+
+def test_a_failed_finish_is_not_retried():
+    finished = []
+
+    def finish(payloads, probabilities):
+        finished.append(len(payloads))
+        raise RuntimeError("rules failed after behavior was recorded")
+
+    batcher = MicroBatcher(lambda payloads: np.zeros(len(payloads)), finish, max_size=2, max_wait_us=200_000)
+    futures = [batcher.submit({"x": value}) for value in (1, 2)]
+    batcher.start()
+    try:
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+    finally:
+        batcher.stop()
+    assert finished == [2]
+
+
+def test_back_to_back_batches_get_distinct_transaction_ids():
+    first = reserve_transaction_ids(1000)
+    second = reserve_transaction_ids(1000)
+    assert second >= first + 1000
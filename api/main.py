@@ -1,41 +1,170 @@
+import asyncio
+import functools
+import hashlib
 import logging
 import os
+import queue
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from threading import Lock
-from typing import Any, Dict, List, Tuple
+from threading import Lock, Thread
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
 
-import joblib
 import numpy as np
 import onnxruntime as ort
-import pandas as pd
-from fastapi import FastAPI, HTTPException, status
-from pydantic import BaseModel
+from fastapi import FastAPI, Header, HTTPException, Request, Response, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field
 
-MODEL_PATH = Path(os.getenv("MODEL_PATH", "fraud_model.onnx"))
-PREPROC_PATH = Path(os.getenv("PREPROC_PATH", "preprocessor.pkl"))
+from behavior import RedisBehaviorStore, ShardedBehaviorStore, SharedMemoryBehaviorStore
+from codec import JSON_RESPONSE, MSGPACK_MEDIA_TYPE, TransactionDecoder, pack_msgpack, unpack_msgpack
+from features import FeatureBuilder, GraphFeeds
+from metrics import MetricsRegistry
+from probability_cache import ProbabilityCache
+from result_cache import IdempotencyConflict, ResultCache, cache_key, payload_digest
+from rules import RuleSet
+from windows import SlidingWindows
+
+# Default artifact paths are next to this file, so tools importing main (score_file.py...) work from any directory.
+API_DIR = Path(__file__).resolve().parent
+MODEL_PATH = Path(os.getenv("MODEL_PATH", API_DIR / "fraud_model.onnx"))
+MODEL_VARIANT = os.getenv("MODEL_VARIANT", "")
+if MODEL_VARIANT:
+    # Variants written by quantize_model.py, e.g. fraud_model.int8_dynamic.onnx
+    MODEL_PATH = MODEL_PATH.with_name(f"{MODEL_PATH.stem}.{MODEL_VARIANT}{MODEL_PATH.suffix}")
+PREPROC_PATH = Path(os.getenv("PREPROC_PATH", API_DIR / "preprocessor.pkl"))
+PIPELINE_MODEL_PATH = Path(os.environ["PIPELINE_MODEL_PATH"]) if os.getenv("PIPELINE_MODEL_PATH") else None
 PORT = int(os.getenv("PORT", 8000))
+COMPILED_PREPROCESSOR = os.getenv("COMPILED_PREPROCESSOR", "1") == "1"
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", 1000))
+MICRO_BATCH_MAX_SIZE = int(os.getenv("MICRO_BATCH_MAX_SIZE", 32))
+MICRO_BATCH_MAX_WAIT_US = int(os.getenv("MICRO_BATCH_MAX_WAIT_US", 500))
+ASYNC_DETECT = os.getenv("ASYNC_DETECT", "0") == "1"
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", 256))
+INFERENCE_QUEUE_TIMEOUT_MS = float(os.getenv("INFERENCE_QUEUE_TIMEOUT_MS", 100))
+ORT_INTRA_OP_THREADS = int(os.getenv("ORT_INTRA_OP_THREADS", 0))
+ORT_INTER_OP_THREADS = int(os.getenv("ORT_INTER_OP_THREADS", 0))
+ORT_EXECUTION_MODE = os.getenv("ORT_EXECUTION_MODE", "sequential")
+ORT_GRAPH_OPTIMIZATION = os.getenv("ORT_GRAPH_OPTIMIZATION", "all")
+ORT_ALLOW_SPINNING = os.getenv("ORT_ALLOW_SPINNING", "1") == "1"
+ORT_INTRA_OP_AFFINITIES = os.getenv("ORT_INTRA_OP_AFFINITIES", "")
+ORT_OPTIMIZED_MODEL_PATH = Path(os.environ["ORT_OPTIMIZED_MODEL_PATH"]) if os.getenv("ORT_OPTIMIZED_MODEL_PATH") else None
+ORT_BENCHMARK_BATCH_SIZES = [int(size) for size in os.getenv("ORT_BENCHMARK_BATCH_SIZES", "").split(",") if size.strip()]
+ORT_BENCHMARK_REPEATS = int(os.getenv("ORT_BENCHMARK_REPEATS", 20))
+# Concurrent session.run calls in async mode. With ORT_INTRA_OP_THREADS=0 one run already uses every core.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", 0)) or (
+    max(1, (os.cpu_count() or 1) // ORT_INTRA_OP_THREADS) if ORT_INTRA_OP_THREADS else 1
+)
+RULES_PATH = Path(os.getenv("RULES_PATH", API_DIR / "rules.json"))
+RULES_RELOAD_SECONDS = float(os.getenv("RULES_RELOAD_SECONDS", 5))
+# Repeat requests within the TTL get the first response back; RESULT_CACHE_SIZE=0 turns this off.
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", 10_000))
+RESULT_CACHE_TTL_SECONDS = float(os.getenv("RESULT_CACHE_TTL_SECONDS", 60))
+# Opt-in: without an Idempotency-Key, treat an identical /detect body as a retry of the first one.
+# Off by default, since genuine duplicate transactions within the TTL would share a Transaction_ID.
+RESULT_CACHE_BY_PAYLOAD = os.getenv("RESULT_CACHE_BY_PAYLOAD", "0") == "1"
+# Memoized model probabilities by quantized feature vector (off by default; PROBABILITY_CACHE_SIZE > 0 enables).
+PROBABILITY_CACHE_SIZE = int(os.getenv("PROBABILITY_CACHE_SIZE", 0))
+PROBABILITY_CACHE_TTL_SECONDS = float(os.getenv("PROBABILITY_CACHE_TTL_SECONDS", 3600))
+PROBABILITY_CACHE_QUANTUM = float(os.getenv("PROBABILITY_CACHE_QUANTUM", 0.001))
+PROBABILITY_CACHE_CHECK_SECONDS = float(os.getenv("PROBABILITY_CACHE_CHECK_SECONDS", 5))
+
+EXECUTION_MODES = {
+    "sequential": ort.ExecutionMode.ORT_SEQUENTIAL,
+    "parallel": ort.ExecutionMode.ORT_PARALLEL,
+}
+GRAPH_OPTIMIZATION_LEVELS = {
+    "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("fraud-api")
 
-FRAUD_SIGNATURES = {
-    "high_amount": 50_000_000,
-    "foreign_country": ["Russia", "Turkey", "USA", "China", "UAE"],
-    "velocity_threshold": 10,
-    "night_transaction": (0, 5),
-}
+METRICS = MetricsRegistry()
+STAGE_SECONDS = METRICS.histogram(
+    "fraud_stage_seconds",
+    "Time per scoring batch in each stage (build, preprocess, onnx, behavior, behavior_lock_wait, rules).",
+    "stage",
+)
+REQUEST_SECONDS = METRICS.histogram("fraud_request_seconds", "Scoring request latency.", "endpoint")
+REQUESTS = METRICS.counter("fraud_requests_total", "Scoring requests handled.", "endpoint")
+TRANSACTIONS_SCORED = METRICS.counter("fraud_transactions_scored_total", "Transactions scored.")
+ALERTS = METRICS.counter("fraud_alerts_total", "Transactions that raised an alert.")
+ALERT_REASONS = METRICS.counter("fraud_alert_reasons_total", "Rule hits, by alert reason.", "reason")
+QUEUE_WAIT_SECONDS = METRICS.histogram(
+    "fraud_inference_queue_wait_seconds", "Time async /detect requests waited for an inference worker."
+)
+
+
+RESULT_CACHE = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+PROBABILITY_CACHE = ProbabilityCache(
+    PROBABILITY_CACHE_SIZE,
+    PROBABILITY_CACHE_TTL_SECONDS,
+    PROBABILITY_CACHE_QUANTUM,
+    check_seconds=PROBABILITY_CACHE_CHECK_SECONDS,
+)
 
-USER_BEHAVIOR: Dict[int, Dict[str, Any]] = {}
-BEHAVIOR_LOCK = Lock()
+
+def record_lock_wait(seconds: float) -> None:
+    STAGE_SECONDS.observe("behavior_lock_wait", seconds)
+
+
+BEHAVIOR_BACKEND = os.getenv("BEHAVIOR_BACKEND", "memory")
+BEHAVIOR_SHARDS = int(os.getenv("BEHAVIOR_SHARDS", 16))
+BEHAVIOR_MAX_USERS = int(os.getenv("BEHAVIOR_MAX_USERS", 100_000))
+BEHAVIOR_TTL_SECONDS = float(os.getenv("BEHAVIOR_TTL_SECONDS", 7 * 24 * 3600))
+BEHAVIOR_MAX_DEVICES = int(os.getenv("BEHAVIOR_MAX_DEVICES", 16))
+BEHAVIOR_MAX_BYTES = int(os.environ["BEHAVIOR_MAX_BYTES"]) if os.getenv("BEHAVIOR_MAX_BYTES") else None
+BEHAVIOR_SHM_PATH = Path(os.getenv("BEHAVIOR_SHM_PATH", "/dev/shm/fraudguard-behavior"))
+BEHAVIOR_REDIS_URL = os.getenv("BEHAVIOR_REDIS_URL", "redis://localhost:6379/0")
+VELOCITY_WINDOWS = SlidingWindows()
+
+
+def create_behavior_store() -> Any:
+    if BEHAVIOR_BACKEND == "shm":
+        return SharedMemoryBehaviorStore(
+            BEHAVIOR_SHM_PATH,
+            max_users=BEHAVIOR_MAX_USERS,
+            ttl_seconds=BEHAVIOR_TTL_SECONDS,
+            max_devices=BEHAVIOR_MAX_DEVICES,
+            windows=VELOCITY_WINDOWS,
+            on_lock_wait=record_lock_wait,
+        )
+    if BEHAVIOR_BACKEND == "redis":
+        return RedisBehaviorStore.from_url(
+            BEHAVIOR_REDIS_URL, ttl_seconds=BEHAVIOR_TTL_SECONDS, windows=VELOCITY_WINDOWS
+        )
+    if BEHAVIOR_BACKEND != "memory":
+        raise ValueError(f"Unknown BEHAVIOR_BACKEND '{BEHAVIOR_BACKEND}' (expected memory, shm or redis)")
+    return ShardedBehaviorStore(
+        shards=BEHAVIOR_SHARDS,
+        max_users=BEHAVIOR_MAX_USERS,
+        ttl_seconds=BEHAVIOR_TTL_SECONDS,
+        max_devices=BEHAVIOR_MAX_DEVICES,
+        max_bytes=BEHAVIOR_MAX_BYTES,
+        windows=VELOCITY_WINDOWS,
+        on_lock_wait=record_lock_wait,
+    )
+
+
+BEHAVIOR_STORE = create_behavior_store()
+
+
+# The behavior stores key users and devices by int64.
+BEHAVIOR_ID = Field(ge=0, le=2**63 - 1)
 
 
 class Transaction(BaseModel):
-    User_ID: int
+    User_ID: int = BEHAVIOR_ID
     Transaction_Amount: float
     Transaction_Location: str
     Merchant_ID: int
-    Device_ID: int
+    Device_ID: int = BEHAVIOR_ID
     Card_Type: str
     Transaction_Currency: str
     Transaction_Status: str
@@ -59,6 +188,18 @@ class Transaction(BaseModel):
     Weekday_cos: float
 
 
+# Columns the behavior store adds next to the payload fields, e.g. user_tx_1h.
+BEHAVIOR_COLUMNS = ["new_device"] + [
+    f"{scope}_tx_{label}" for scope in ("user", "device") for label in VELOCITY_WINDOWS.labels
+]
+# Every column a rule may read, with its type so rules.json edits are type-checked before they go live.
+RULE_COLUMNS: Dict[str, type] = {
+    **{name: info.annotation for name, info in Transaction.model_fields.items()},
+    **{name: bool if name == "new_device" else int for name in BEHAVIOR_COLUMNS},
+}
+RULES = RuleSet(RULES_PATH, RULES_RELOAD_SECONDS, columns=RULE_COLUMNS)
+
+
 class AlertResponse(BaseModel):
     Transaction_ID: int
     User_ID: int
@@ -70,90 +211,500 @@ class AlertResponse(BaseModel):
     timestamp: str
 
 
-def load_artifacts() -> Tuple[Any, ort.InferenceSession, str]:
+def optimized_model_path(model_path: Path) -> Optional[Path]:
+    """Cache file for the optimized graph of ``model_path``, or None when ORT_OPTIMIZED_MODEL_PATH is unset.
+
+    The name carries a digest of the source model's path and bytes and of the optimization level, so
+    another MODEL_VARIANT or a replaced model file never loads a graph optimized from a different model.
+    """
+    if ORT_OPTIMIZED_MODEL_PATH is None:
+        return None
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{model_path.resolve()}\0{ORT_GRAPH_OPTIMIZATION}\0".encode())
+    with open(model_path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(chunk)
+    base = ORT_OPTIMIZED_MODEL_PATH
+    return base.with_name(f"{base.stem}.{digest.hexdigest()}{base.suffix}")
+
+
+def create_session(model_path: Path) -> ort.InferenceSession:
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = ORT_INTRA_OP_THREADS
+    options.inter_op_num_threads = ORT_INTER_OP_THREADS
+    options.execution_mode = EXECUTION_MODES[ORT_EXECUTION_MODE]
+    options.add_session_config_entry("session.intra_op.allow_spinning", "1" if ORT_ALLOW_SPINNING else "0")
+    if ORT_INTRA_OP_AFFINITIES:
+        options.add_session_config_entry("session.intra_op_thread_affinities", ORT_INTRA_OP_AFFINITIES)
+
+    source = model_path
+    optimized = optimized_model_path(model_path)
+    partial: Optional[Path] = None
+    if optimized is not None and optimized.exists():
+        # Already optimized on an earlier startup; skip the graph rewrites.
+        source = optimized
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+    else:
+        options.graph_optimization_level = GRAPH_OPTIMIZATION_LEVELS[ORT_GRAPH_OPTIMIZATION]
+        if optimized is not None:
+            # Workers starting together each write their own file and rename it into place, so none of them
+            # can load a half-written graph.
+            partial = optimized.with_name(f"{optimized.name}.{os.getpid()}.tmp")
+            options.optimized_model_filepath = str(partial)
+
+    session = ort.InferenceSession(str(source), sess_options=options, providers=["CPUExecutionProvider"])
+    if partial is not None and optimized is not None:
+        try:
+            os.replace(partial, optimized)
+        except OSError:
+            logger.warning("Could not save the optimized graph to %s", optimized, exc_info=True)
+    logger.info(
+        "ONNX session loaded from %s (intra_op=%d, inter_op=%d, mode=%s)",
+        source,
+        ORT_INTRA_OP_THREADS,
+        ORT_INTER_OP_THREADS,
+        ORT_EXECUTION_MODE,
+    )
+    return session
+
+
+def benchmark_session(session: ort.InferenceSession, batch_sizes: List[int], repeats: int) -> Dict[int, float]:
+    latencies: Dict[int, float] = {}
+    for batch_size in batch_sizes:
+        feeds = {}
+        for node in session.get_inputs():
+            shape = [dim if isinstance(dim, int) else batch_size for dim in node.shape]
+            if node.type == "tensor(string)":
+                feeds[node.name] = np.full(shape, "", dtype=object)
+            else:
+                feeds[node.name] = np.zeros(shape, dtype=np.float64 if node.type == "tensor(double)" else np.float32)
+        session.run(None, feeds)
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            session.run(None, feeds)
+            timings.append(time.perf_counter() - start)
+        latencies[batch_size] = float(np.median(timings)) * 1000
+        logger.info(
+            "Benchmark batch_size=%d: p50 %.3f ms (%.1f us/row)",
+            batch_size,
+            latencies[batch_size],
+            latencies[batch_size] * 1000 / batch_size,
+        )
+    return latencies
+
+
+def load_preprocessor() -> Any:
     if not PREPROC_PATH.exists():
         raise FileNotFoundError(f"Preprocessor not found at {PREPROC_PATH}")
+    import joblib
+
+    preprocessor = joblib.load(PREPROC_PATH)
+    if COMPILED_PREPROCESSOR:
+        try:
+            preprocessor = FeatureBuilder.from_preprocessor(preprocessor)
+        except ValueError:
+            logger.warning("Preprocessor cannot be compiled, falling back to sklearn transform", exc_info=True)
+    return preprocessor
+
+
+def load_artifacts() -> Tuple[Any, ort.InferenceSession, str]:
+    if PIPELINE_MODEL_PATH is not None:
+        if not PIPELINE_MODEL_PATH.exists():
+            raise FileNotFoundError(f"Pipeline model not found at {PIPELINE_MODEL_PATH}")
+        session = create_session(PIPELINE_MODEL_PATH)
+        return GraphFeeds.from_session(session), session, session.get_inputs()[0].name
     if not MODEL_PATH.exists():
         raise FileNotFoundError(f"Model not found at {MODEL_PATH}")
-    preprocessor = joblib.load(PREPROC_PATH)
-    session = ort.InferenceSession(str(MODEL_PATH), providers=["CPUExecutionProvider"])
+    preprocessor = load_preprocessor()
+    session = create_session(MODEL_PATH)
     input_name = session.get_inputs()[0].name
+    PROBABILITY_CACHE.bind(MODEL_PATH)
     return preprocessor, session, input_name
 
 
-def evaluate_risk(
-    payload: Dict[str, Any],
+def build_features(payloads: List[Dict[str, Any]], preprocessor: Any) -> np.ndarray:
+    start = time.perf_counter()
+    if isinstance(preprocessor, FeatureBuilder):
+        # The compiled builder goes straight from payload dicts to the matrix; there is no DataFrame stage.
+        features = preprocessor.transform(payloads)
+        STAGE_SECONDS.observe("preprocess", time.perf_counter() - start)
+        return features
+    import pandas as pd
+
+    frame = pd.DataFrame(payloads)
+    built = time.perf_counter()
+    STAGE_SECONDS.observe("build", built - start)
+    features = preprocessor.transform(frame.drop(columns=["Transaction_ID", "User_ID"], errors="ignore"))
+    if hasattr(features, "toarray"):
+        features = features.toarray()
+    features = np.asarray(features, dtype=np.float32)
+    STAGE_SECONDS.observe("preprocess", time.perf_counter() - built)
+    return features
+
+
+def predict_probabilities(
+    payloads: List[Dict[str, Any]],
     preprocessor: Any,
     session: ort.InferenceSession,
     input_name: str,
-) -> Dict[str, Any]:
-    frame = pd.DataFrame([payload])
-    tx_id = int(datetime.utcnow().timestamp() * 1000)
-    frame.insert(0, "Transaction_ID", tx_id)
+) -> np.ndarray:
+    def run(feeds: Dict[str, Any]) -> np.ndarray:
+        start = time.perf_counter()
+        result = session.run(None, feeds)
+        STAGE_SECONDS.observe("onnx", time.perf_counter() - start)
+        return np.asarray(result[0], dtype=np.float64).reshape(-1)
+
     try:
-        features = preprocessor.transform(frame.drop(columns=["Transaction_ID", "User_ID"], errors="ignore"))
-        if hasattr(features, "toarray"):
-            features = features.toarray()
-        features = np.asarray(features, dtype=np.float32)
-        result = session.run(None, {input_name: features})
-        probability = float(result[0][0][0])
+        if isinstance(preprocessor, GraphFeeds):
+            # Preprocessing happens inside the graph, so there is no feature vector to memoize on.
+            start = time.perf_counter()
+            feeds = preprocessor.feeds(payloads)
+            STAGE_SECONDS.observe("build", time.perf_counter() - start)
+            return run(feeds)
+        features = build_features(payloads, preprocessor)
+        if PROBABILITY_CACHE.enabled:
+            return PROBABILITY_CACHE.predict(features, lambda rows: run({input_name: rows}))
+        return run({input_name: features})
     except Exception as exc:
         logger.exception("Model inference failed")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Model inference failed") from exc
 
-    prediction = int(probability > 0.5)
-    reasons: List[str] = []
-    boost = 0.0
-
-    if payload["Transaction_Amount"] > FRAUD_SIGNATURES["high_amount"]:
-        reasons.append("High Amount")
-        boost += 0.35
-    if FRAUD_SIGNATURES["night_transaction"][0] <= payload["Transaction_Hour"] < FRAUD_SIGNATURES["night_transaction"][1]:
-        reasons.append("Night")
-        boost += 0.25
-    if payload["Transaction_Velocity"] > FRAUD_SIGNATURES["velocity_threshold"]:
-        reasons.append("High Velocity")
-        boost += 0.20
-    if payload["Transaction_Location"] in FRAUD_SIGNATURES["foreign_country"]:
-        reasons.append("Foreign")
-        boost += 0.25
 
+def behavior_context(
+    user_ids: List[Any], device_ids: List[Any], now: float, store: Any = None
+) -> Dict[str, List[Any]]:
+    """Record a batch in the behavior store and return it as rule columns (``new_device``, ``user_tx_1h``...)."""
+    if store is None:
+        store = BEHAVIOR_STORE
+    new_devices, user_counts, device_counts = store.observe_batch(user_ids, device_ids, now)
+    context: Dict[str, List[Any]] = {"new_device": new_devices}
+    for window, label in enumerate(VELOCITY_WINDOWS.labels):
+        context[f"user_tx_{label}"] = [counts[window] for counts in user_counts]
+        context[f"device_tx_{label}"] = [counts[window] for counts in device_counts]
+    return context
+
+
+def combine_scores(probabilities: np.ndarray, boosts: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    predictions = (probabilities > 0.5).astype(np.int64)
+    final_scores = np.minimum(probabilities + boosts, 1.0)
+    alerts = (final_scores > 0.7) | (predictions == 1)
+    return predictions, final_scores, alerts
+
+
+_TRANSACTION_ID_LOCK = Lock()
+_last_transaction_id = 0
+
+
+def reserve_transaction_ids(count: int) -> int:
+    """First of ``count`` consecutive Transaction_IDs that no other call in this process gets.
+
+    IDs follow the millisecond clock, but a batch never reuses the range of the one before it.
+    """
+    global _last_transaction_id
+    with _TRANSACTION_ID_LOCK:
+        first = max(int(time.time() * 1000), _last_transaction_id + 1)
+        _last_transaction_id = first + count - 1
+    return first
+
+
+def evaluate_batch(
+    payloads: List[Dict[str, Any]],
+    preprocessor: Any,
+    session: ort.InferenceSession,
+    input_name: str,
+) -> List[Dict[str, Any]]:
+    probabilities = predict_probabilities(payloads, preprocessor, session, input_name)
+    return finish_batch(payloads, probabilities)
+
+
+def finish_batch(payloads: List[Dict[str, Any]], probabilities: np.ndarray) -> List[Dict[str, Any]]:
+    """Apply behavior and rules to scored payloads and build the response dicts."""
     now = datetime.utcnow()
-    user_id = payload["User_ID"]
-
-    with BEHAVIOR_LOCK:
-        profile = USER_BEHAVIOR.setdefault(user_id, {"devices": set(), "tx_count_1h": 0, "last_hour": now.hour})
-        if payload["Device_ID"] not in profile["devices"]:
-            reasons.append("New Device")
-            boost += 0.30
-            profile["devices"].add(payload["Device_ID"])
-        if now.hour != profile["last_hour"]:
-            profile["tx_count_1h"] = 0
-            profile["last_hour"] = now.hour
-        profile["tx_count_1h"] += 1
-        if profile["tx_count_1h"] > 8:
-            reasons.append("Burst")
-            boost += 0.20
-
-    final_score = min(probability + boost, 1.0)
-    alert = final_score > 0.7 or prediction == 1
 
-    return {
-        "Transaction_ID": tx_id,
-        "User_ID": user_id,
-        "Fraud_Probability": round(probability, 4),
-        "Final_Risk_Score": round(final_score, 4),
-        "isFraud_pred": prediction,
-        "alert_triggered": alert,
-        "alert_reasons": reasons,
-        "timestamp": now.isoformat(),
-    }
+    start = time.perf_counter()
+    context = behavior_context(
+        [payload["User_ID"] for payload in payloads], [payload["Device_ID"] for payload in payloads], time.time()
+    )
+    observed = time.perf_counter()
+    STAGE_SECONDS.observe("behavior", observed - start)
+    boosts, reasons = RULES.current().evaluate(payloads, context)
+    STAGE_SECONDS.observe("rules", time.perf_counter() - observed)
+    predictions, final_scores, alerts = combine_scores(probabilities, boosts)
+    timestamp = now.isoformat()
+    tx_base = reserve_transaction_ids(len(payloads))
+
+    TRANSACTIONS_SCORED.inc(amount=len(payloads))
+    ALERTS.inc(amount=int(alerts.sum()))
+    for row_reasons in reasons:
+        for reason in row_reasons:
+            ALERT_REASONS.inc(reason)
+
+    return [
+        {
+            "Transaction_ID": tx_base + row,
+            "User_ID": payload["User_ID"],
+            "Fraud_Probability": round(float(probabilities[row]), 4),
+            "Final_Risk_Score": round(float(final_scores[row]), 4),
+            "isFraud_pred": int(predictions[row]),
+            "alert_triggered": bool(alerts[row]),
+            "alert_reasons": reasons[row],
+            "timestamp": timestamp,
+        }
+        for row, payload in enumerate(payloads)
+    ]
+
+
+def evaluate_risk(
+    payload: Dict[str, Any],
+    preprocessor: Any,
+    session: ort.InferenceSession,
+    input_name: str,
+) -> Dict[str, Any]:
+    return evaluate_batch([payload], preprocessor, session, input_name)[0]
+
+
+class MicroBatcher:
+    """Coalesces concurrent single-item requests into one model run and one ``finish`` call.
+
+    A batch is flushed once it holds ``max_size`` payloads or ``max_wait_us``
+    microseconds have passed since its first payload arrived. If the model run
+    for the batch raises, each payload is run on its own, so only the requests
+    that fail by themselves get the error. ``finish`` (behavior and rules) is
+    never retried: it has already counted the batch in the behavior store.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[Dict[str, Any]]], np.ndarray],
+        finish: Callable[[List[Dict[str, Any]], np.ndarray], List[Dict[str, Any]]],
+        max_size: int = MICRO_BATCH_MAX_SIZE,
+        max_wait_us: int = MICRO_BATCH_MAX_WAIT_US,
+    ) -> None:
+        self.infer = infer
+        self.finish = finish
+        self.max_size = max(1, max_size)
+        self.max_wait = max(0, max_wait_us) / 1_000_000
+        self._queue: "queue.Queue[Optional[Tuple[Dict[str, Any], Future]]]" = queue.Queue()
+        self._thread = Thread(target=self._run, name="micro-batcher", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, payload: Dict[str, Any]) -> Future:
+        future: Future = Future()
+        self._queue.put((payload, future))
+        return future
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.perf_counter() + self.max_wait
+            stopping = False
+            while len(batch) < self.max_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._flush(batch)
+            if stopping:
+                return
+
+    def _flush(self, batch: List[Tuple[Dict[str, Any], Future]]) -> None:
+        try:
+            probabilities = self.infer([payload for payload, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                batch[0][1].set_exception(exc)
+                return
+            # One bad payload must not fail the requests it was coalesced with: rerun the model one by one.
+            logger.warning("Micro-batch of %d failed, rescoring its requests individually", len(batch))
+            batch, probabilities = self._infer_each(batch)
+            if not batch:
+                return
+        try:
+            results = self.finish([payload for payload, _ in batch], probabilities)
+        except Exception as exc:
+            for _, future in batch:
+                future.set_exception(exc)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+    def _infer_each(
+        self, batch: List[Tuple[Dict[str, Any], Future]]
+    ) -> Tuple[List[Tuple[Dict[str, Any], Future]], np.ndarray]:
+        """Run the model per payload; failures settle their own future, the rest are returned for ``finish``."""
+        live, probabilities = [], []
+        for payload, future in batch:
+            try:
+                probabilities.append(self.infer([payload])[0])
+            except Exception as exc:
+                future.set_exception(exc)
+            else:
+                live.append((payload, future))
+        return live, np.array(probabilities, dtype=np.float64)
+
+
+class InferenceQueue:
+    """Event-loop side of async ``/detect``: admission control plus micro-batched inference.
+
+    Requests are admitted on the event loop while fewer than ``max_pending``
+    are in the system (otherwise 429), grouped into batches of up to
+    ``max_batch`` for at most ``max_wait_us``, and each batch is scored on a
+    dedicated pool of ``workers`` threads. A request still queued after
+    ``queue_timeout_ms`` is shed with 503 instead of being run late.
+    """
+
+    def __init__(
+        self,
+        infer: Callable[[List[Dict[str, Any]]], np.ndarray],
+        workers: int,
+        max_pending: int,
+        queue_timeout_ms: float,
+        max_batch: int = MICRO_BATCH_MAX_SIZE,
+        max_wait_us: int = MICRO_BATCH_MAX_WAIT_US,
+    ) -> None:
+        self.infer = infer
+        self.workers = max(1, workers)
+        self.max_pending = max(1, max_pending)
+        self.queue_timeout = queue_timeout_ms / 1000
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_us) / 1_000_000
+        self.pending = 0
+        self.admitted = 0
+        self.shed_full = 0
+        self.shed_timeout = 0
+        self.waits: Deque[float] = deque(maxlen=4096)
+        self._lock = Lock()
+        self._batch: List[Tuple[Dict[str, Any], "asyncio.Future[float]", float]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix="inference")
+
+    def stop(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    async def probability(self, payload: Dict[str, Any]) -> float:
+        # pending/admitted/_batch are only touched on the event loop thread.
+        if self.pending >= self.max_pending:
+            self.shed_full += 1
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Inference queue is full",
+                headers={"Retry-After": "1"},
+            )
+        loop = asyncio.get_running_loop()
+        future: "asyncio.Future[float]" = loop.create_future()
+        self.pending += 1
+        self.admitted += 1
+        self._batch.append((payload, future, time.perf_counter()))
+        if len(self._batch) >= self.max_batch:
+            self._flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush, loop)
+        try:
+            return await future
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = sorted(self.waits)
+            shed_timeout = self.shed_timeout
+
+        def percentile(q: float) -> float:
+            return round(waits[min(len(waits) - 1, int(q * len(waits)))] * 1000, 3) if waits else 0.0
+
+        return {
+            "workers": self.workers,
+            "pending": self.pending,
+            "max_pending": self.max_pending,
+            "admitted": self.admitted,
+            "shed_queue_full": self.shed_full,
+            "shed_queue_timeout": shed_timeout,
+            "queue_wait_ms_p50": percentile(0.50),
+            "queue_wait_ms_p99": percentile(0.99),
+            "queue_wait_ms_max": round(waits[-1] * 1000, 3) if waits else 0.0,
+        }
+
+    def _flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._batch = self._batch, []
+        if batch:
+            self._pool.submit(self._run, loop, batch)
+
+    def _run(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        batch: List[Tuple[Dict[str, Any], "asyncio.Future[float]", float]],
+    ) -> None:
+        started = time.perf_counter()
+        live = []
+        with self._lock:
+            for item in batch:
+                waited = started - item[2]
+                self.waits.append(waited)
+                QUEUE_WAIT_SECONDS.observe("", waited)
+                if waited > self.queue_timeout:
+                    self.shed_timeout += 1
+                    shed = HTTPException(
+                        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                        detail="Inference queue wait exceeded",
+                        headers={"Retry-After": "1"},
+                    )
+                    loop.call_soon_threadsafe(_settle, item[1], None, shed)
+                else:
+                    live.append(item)
+        if not live:
+            return
+        self._infer(loop, live)
+
+    def _infer(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        batch: List[Tuple[Dict[str, Any], "asyncio.Future[float]", float]],
+    ) -> None:
+        try:
+            probabilities = self.infer([payload for payload, _, _ in batch])
+        except Exception as exc:
+            if len(batch) == 1:
+                loop.call_soon_threadsafe(_settle, batch[0][1], None, exc)
+                return
+            # Same as MicroBatcher: rerun one by one so a bad payload only fails its own request.
+            for item in batch:
+                self._infer(loop, [item])
+            return
+        for (_, future, _), probability in zip(batch, probabilities.tolist()):
+            loop.call_soon_threadsafe(_settle, future, probability, None)
+
+
+def _settle(future: "asyncio.Future[float]", result: Optional[float], error: Optional[BaseException]) -> None:
+    if future.done():  # client went away and the request was cancelled
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
 
 
 app = FastAPI(
     title="Real-Time Fraud Detection Engine",
     description="ONNX and rules based fraud detection service",
     version="3.0",
+    default_response_class=JSON_RESPONSE,
 )
 
 
@@ -169,6 +720,29 @@ async def on_startup() -> None:
     try:
         app.state.artifacts = load_artifacts()
         logger.info("Model artifacts loaded")
+        if ORT_BENCHMARK_BATCH_SIZES:
+            benchmark_session(app.state.artifacts[1], ORT_BENCHMARK_BATCH_SIZES, ORT_BENCHMARK_REPEATS)
+        if ASYNC_DETECT:
+            app.state.inference = InferenceQueue(
+                lambda payloads: predict_probabilities(payloads, *get_artifacts()),
+                workers=INFERENCE_WORKERS,
+                max_pending=INFERENCE_MAX_PENDING,
+                queue_timeout_ms=INFERENCE_QUEUE_TIMEOUT_MS,
+            )
+            logger.info(
+                "Async /detect enabled (inference_workers=%d, max_pending=%d, queue_timeout_ms=%.0f)",
+                INFERENCE_WORKERS,
+                INFERENCE_MAX_PENDING,
+                INFERENCE_QUEUE_TIMEOUT_MS,
+            )
+        elif MICRO_BATCH_MAX_SIZE > 1:
+            app.state.batcher = MicroBatcher(
+                lambda payloads: predict_probabilities(payloads, *get_artifacts()), finish_batch
+            )
+            app.state.batcher.start()
+            logger.info(
+                "Micro-batching enabled (max_size=%d, max_wait_us=%d)", MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_US
+            )
     except Exception as exc:
         logger.exception("Failed to initialize model artifacts")
         raise RuntimeError("Failed to initialize model artifacts") from exc
@@ -176,14 +750,213 @@ async def on_startup() -> None:
 
 @app.on_event("shutdown")
 async def on_shutdown() -> None:
+    if hasattr(app.state, "batcher"):
+        app.state.batcher.stop()
+        delattr(app.state, "batcher")
+    if hasattr(app.state, "inference"):
+        app.state.inference.stop()
+        delattr(app.state, "inference")
     if hasattr(app.state, "artifacts"):
         delattr(app.state, "artifacts")
 
 
-@app.post("/detect", response_model=AlertResponse)
-def detect(transaction: Transaction) -> Dict[str, Any]:
+# The scoring endpoints return a rendered response so the result dicts, which are built with the
+# AlertResponse fields and types, are not validated a second time against response_model.
+def timed(endpoint: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Count an endpoint's requests and record their latency; works for sync and async handlers."""
+
+    def decorate(handler: Callable[..., Any]) -> Callable[..., Any]:
+        if asyncio.iscoroutinefunction(handler):
+
+            @functools.wraps(handler)
+            async def run_async(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return await handler(*args, **kwargs)
+                finally:
+                    REQUESTS.inc(endpoint)
+                    REQUEST_SECONDS.observe(endpoint, time.perf_counter() - start)
+
+            return run_async
+
+        @functools.wraps(handler)
+        def run(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                REQUESTS.inc(endpoint)
+                REQUEST_SECONDS.observe(endpoint, time.perf_counter() - start)
+
+        return run
+
+    return decorate
+
+
+def claim_result(
+    endpoint: str, body: Any, idempotency_key: Optional[str], by_payload: bool
+) -> Optional[Tuple[str, Future, bool]]:
+    """Look a request up in RESULT_CACHE: (key, future, owner), or None when it is not cacheable."""
+    if not RESULT_CACHE.enabled or not (idempotency_key or by_payload):
+        return None
+    digest = payload_digest(body)
+    key = cache_key(endpoint, idempotency_key, digest)
+    try:
+        future, owner = RESULT_CACHE.begin(key, digest)
+    except IdempotencyConflict:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency-Key was already used with a different request body",
+        )
+    return key, future, owner
+
+
+def replayed(result: Any) -> Response:
+    return JSON_RESPONSE(result, headers={"Idempotent-Replayed": "true"})
+
+
+def cached_result(
+    endpoint: str, body: Any, idempotency_key: Optional[str], by_payload: bool, compute: Callable[[], Any]
+) -> Response:
+    """Score through RESULT_CACHE: a repeat returns the first result without touching the model or behavior state."""
+    claim = claim_result(endpoint, body, idempotency_key, by_payload)
+    if claim is None:
+        return JSON_RESPONSE(compute())
+    key, future, owner = claim
+    if not owner:
+        return replayed(future.result())
+    try:
+        result = compute()
+    except BaseException as exc:
+        RESULT_CACHE.fail(key, future, exc)
+        raise
+    RESULT_CACHE.finish(key, future, result)
+    return JSON_RESPONSE(result)
+
+
+# Owner computations that outlive a cancelled request; held here so they are not garbage collected.
+_DETACHED_COMPUTES: Set["asyncio.Task[Any]"] = set()
+
+
+def _forget_compute(task: "asyncio.Task[Any]") -> None:
+    _DETACHED_COMPUTES.discard(task)
+    if not task.cancelled():
+        task.exception()  # already passed to the waiters via RESULT_CACHE.fail
+
+
+async def cached_result_async(
+    endpoint: str, body: Any, idempotency_key: Optional[str], by_payload: bool, compute: Callable[[], Awaitable[Any]]
+) -> Response:
+    """``cached_result`` for async handlers; ``compute`` returns an awaitable.
+
+    The owner's computation runs in its own task behind ``asyncio.shield``: if
+    the owner's client disconnects, the requests coalesced onto the same key
+    still get the result instead of the owner's ``CancelledError``.
+    """
+    claim = claim_result(endpoint, body, idempotency_key, by_payload)
+    if claim is None:
+        return JSON_RESPONSE(await compute())
+    key, future, owner = claim
+    if not owner:
+        return replayed(await asyncio.wrap_future(future))
+
+    async def settle() -> Any:
+        try:
+            result = await compute()
+        except BaseException as exc:
+            RESULT_CACHE.fail(key, future, exc)
+            raise
+        RESULT_CACHE.finish(key, future, result)
+        return result
+
+    task = asyncio.ensure_future(settle())
+    _DETACHED_COMPUTES.add(task)
+    task.add_done_callback(_forget_compute)
+    return JSON_RESPONSE(await asyncio.shield(task))
+
+
+IDEMPOTENCY_KEY = Header(None, alias="Idempotency-Key", max_length=255)
+
+
+@timed("detect")
+def detect(transaction: Transaction, idempotency_key: Optional[str] = IDEMPOTENCY_KEY) -> Response:
     preprocessor, session, input_name = get_artifacts()
-    return evaluate_risk(transaction.model_dump(), preprocessor, session, input_name)
+    batcher: Optional[MicroBatcher] = getattr(app.state, "batcher", None)
+    payload = transaction.model_dump()
+
+    def compute() -> Dict[str, Any]:
+        if batcher is not None:
+            return batcher.submit(payload).result()
+        return evaluate_risk(payload, preprocessor, session, input_name)
+
+    return cached_result("detect", payload, idempotency_key, RESULT_CACHE_BY_PAYLOAD, compute)
+
+
+@timed("detect")
+async def detect_async(transaction: Transaction, idempotency_key: Optional[str] = IDEMPOTENCY_KEY) -> Response:
+    get_artifacts()
+    inference: InferenceQueue = app.state.inference
+    payload = transaction.model_dump()
+
+    async def compute() -> Dict[str, Any]:
+        probability = await inference.probability(payload)
+        return finish_batch([payload], np.array([probability]))[0]
+
+    return await cached_result_async("detect", payload, idempotency_key, RESULT_CACHE_BY_PAYLOAD, compute)
+
+
+# Sync handlers run on FastAPI's threadpool; the async one keeps parsing and rules on the event loop.
+app.post("/detect", response_model=AlertResponse)(detect_async if ASYNC_DETECT else detect)
+
+
+def check_batch_size(size: int) -> None:
+    if size > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Batch exceeds {MAX_BATCH_SIZE} transactions",
+        )
+
+
+@app.post("/detect/batch", response_model=List[AlertResponse])
+@timed("detect_batch")
+def detect_batch(transactions: List[Transaction], idempotency_key: Optional[str] = IDEMPOTENCY_KEY) -> Response:
+    """Batches are only cached under an Idempotency-Key; hashing every batch body would rarely pay off."""
+    if not transactions:
+        return JSON_RESPONSE([])
+    check_batch_size(len(transactions))
+    preprocessor, session, input_name = get_artifacts()
+    payloads = [tx.model_dump() for tx in transactions]
+    return cached_result(
+        "detect_batch",
+        payloads,
+        idempotency_key,
+        False,
+        lambda: evaluate_batch(payloads, preprocessor, session, input_name),
+    )
+
+
+TRANSACTION_DECODER = TransactionDecoder.from_model(Transaction)
+
+
+@app.post(
+    "/detect/msgpack",
+    response_class=Response,
+    responses={200: {"content": {MSGPACK_MEDIA_TYPE: {}}, "description": "msgpack array of AlertResponse maps"}},
+)
+@timed("detect_msgpack")
+async def detect_msgpack(request: Request) -> Response:
+    """Batch scoring for internal callers: a msgpack array of transactions in, a msgpack array of alerts out.
+
+    Rows may be maps keyed by field name or arrays in ``Transaction`` field order.
+    """
+    rows = unpack_msgpack(await request.body())
+    if isinstance(rows, list):
+        check_batch_size(len(rows))
+    payloads = TRANSACTION_DECODER.decode(rows)
+    results: List[Dict[str, Any]] = []
+    if payloads:
+        results = await run_in_threadpool(evaluate_batch, payloads, *get_artifacts())
+    return Response(pack_msgpack(results), media_type=MSGPACK_MEDIA_TYPE)
 
 
 @app.get("/")
@@ -196,6 +969,88 @@ def root() -> Dict[str, Any]:
     }
 
 
+@app.get("/behavior/stats")
+def behavior_stats() -> Dict[str, int]:
+    return BEHAVIOR_STORE.stats()
+
+
+@app.get("/inference/stats")
+def inference_stats() -> Dict[str, Any]:
+    inference: Optional[InferenceQueue] = getattr(app.state, "inference", None)
+    if inference is None:
+        return {"mode": "sync"}
+    return {"mode": "async", **inference.stats()}
+
+
+@app.get("/rules/stats")
+def rules_stats() -> Dict[str, Any]:
+    return RULES.stats()
+
+
+@app.get("/cache/stats")
+def cache_stats() -> Dict[str, Any]:
+    return {"results": RESULT_CACHE.stats(), "probabilities": PROBABILITY_CACHE.stats()}
+
+
+def inference_pending() -> Dict[str, float]:
+    inference: Optional[InferenceQueue] = getattr(app.state, "inference", None)
+    return {} if inference is None else {"": inference.pending}
+
+
+def inference_shed() -> Dict[str, float]:
+    inference: Optional[InferenceQueue] = getattr(app.state, "inference", None)
+    if inference is None:
+        return {}
+    return {"queue_full": inference.shed_full, "queue_timeout": inference.shed_timeout}
+
+
+METRICS.gauge(
+    "fraud_behavior_store_keys",
+    "Keys held by the behavior store.",
+    lambda: {kind: value for kind, value in BEHAVIOR_STORE.stats().items() if kind in ("users", "devices")},
+    "kind",
+)
+METRICS.gauge(
+    "fraud_result_cache_lookups_total",
+    "Result cache lookups: hit, coalesced (waited for an identical request in flight) or miss.",
+    lambda: {"hit": RESULT_CACHE.hits, "coalesced": RESULT_CACHE.coalesced, "miss": RESULT_CACHE.misses},
+    "result",
+    kind="counter",
+)
+METRICS.gauge(
+    "fraud_result_cache_hit_ratio",
+    "Share of result cache lookups answered without scoring.",
+    lambda: {"": RESULT_CACHE.hit_ratio()},
+)
+METRICS.gauge("fraud_result_cache_entries", "Results held by the result cache.", lambda: {"": len(RESULT_CACHE)})
+METRICS.gauge(
+    "fraud_probability_cache_rows_total",
+    "Rows looked up in the probability cache: hit, miss, or bypassed (cache not bound to a model file yet).",
+    lambda: {
+        "hit": PROBABILITY_CACHE.hits,
+        "miss": PROBABILITY_CACHE.misses,
+        "bypassed": PROBABILITY_CACHE.bypassed,
+    },
+    "result",
+    kind="counter",
+)
+METRICS.gauge(
+    "fraud_probability_cache_hit_ratio",
+    "Share of probability cache lookups answered without running the model.",
+    lambda: {"": PROBABILITY_CACHE.hit_ratio()},
+)
+METRICS.gauge("fraud_inference_pending", "Async /detect requests admitted and not yet answered.", inference_pending)
+METRICS.gauge(
+    "fraud_inference_shed_total", "Async /detect requests shed, by cause.", inference_shed, "cause", kind="counter"
+)
+
+
+@app.get("/metrics", response_class=Response)
+def metrics() -> Response:
+    """Prometheus text format. Values are per worker process; Prometheus sums them across targets."""
+    return Response(METRICS.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/health")
 def health() -> Dict[str, str]:
     _ = get_artifacts()
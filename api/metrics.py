@@ -0,0 +1,197 @@
+"""
+Prometheus text-format metrics with per-thread, lock-free recording.
+
+Every metric keeps one small dict per recording thread. A thread only ever
+writes to its own dict, so ``observe``/``inc`` take no lock. The first
+record from a new thread registers its dict under a lock, once. ``render``
+adds the per-thread values together when ``/metrics`` is scraped. Values are
+per worker process.
+
+Threadpools retire idle threads (AnyIO after 10s), so a long-running process
+sees an unbounded number of threads over time. The dicts of threads that
+have exited are folded into one retired total, at registration and at
+render, so memory and scrape time follow the number of live threads.
+"""
+import bisect
+import threading
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Seconds; tuned for sub-millisecond stages up to slow batches.
+DEFAULT_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, label: str = "") -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label = label
+        self._local = threading.local()
+        self._shards: List[Tuple[threading.Thread, Dict[str, List[float]]]] = []
+        self._retired: Dict[str, List[float]] = {}
+        self._register = threading.Lock()
+
+    def _shard(self) -> Dict[str, List[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._register:
+                self._retire_dead_threads()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def _retire_dead_threads(self) -> None:
+        # Caller holds _register. A thread that has exited can no longer write to its dict.
+        live = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                live.append((thread, shard))
+            else:
+                _accumulate(self._retired, shard)
+        self._shards = live
+
+    def _collect(self) -> Dict[str, List[float]]:
+        with self._register:
+            self._retire_dead_threads()
+            shards = [shard for _, shard in self._shards]
+            totals = {label_value: list(values) for label_value, values in self._retired.items()}
+        for shard in shards:
+            # dict.copy() and list() run in C under the GIL, so a concurrent writer can't tear them.
+            _accumulate(totals, shard.copy())
+        return totals
+
+    def _labels(self, label_value: str, extra: str = "") -> str:
+        pairs = [f'{self.label}="{_escape(label_value)}"'] if self.label else []
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples(self._collect()))
+        return lines
+
+    def _samples(self, totals: Dict[str, List[float]]) -> Iterable[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, label_value: str = "", amount: float = 1.0) -> None:
+        shard = self._shard()
+        values = shard.get(label_value)
+        if values is None:
+            shard[label_value] = [amount]
+        else:
+            values[0] += amount
+
+    def _samples(self, totals: Dict[str, List[float]]) -> Iterable[str]:
+        for label_value in sorted(totals):
+            yield f"{self.name}{self._labels(label_value)} {_format(totals[label_value][0])}"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, label: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> None:
+        super().__init__(name, documentation, label)
+        self.buckets = sorted(buckets)
+
+    def observe(self, label_value: str, value: float) -> None:
+        shard = self._shard()
+        values = shard.get(label_value)
+        if values is None:
+            # One count per bucket, then +Inf, sum and count.
+            values = shard[label_value] = [0.0] * (len(self.buckets) + 3)
+        values[bisect.bisect_left(self.buckets, value)] += 1
+        values[-2] += value
+        values[-1] += 1
+
+    def _samples(self, totals: Dict[str, List[float]]) -> Iterable[str]:
+        for label_value in sorted(totals):
+            values = totals[label_value]
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + [float("inf")], values):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                yield f"{self.name}_bucket{self._labels(label_value, le)} {_format(cumulative)}"
+            yield f"{self.name}_sum{self._labels(label_value)} {repr(values[-2])}"
+            yield f"{self.name}_count{self._labels(label_value)} {_format(values[-1])}"
+
+
+class MetricsRegistry:
+    """Holds the metric families and renders them, plus scrape-time gauges, as Prometheus text."""
+
+    def __init__(self) -> None:
+        self.metrics: List[_Metric] = []
+        self.gauges: List[Tuple[str, str, Callable[[], Dict[str, float]], str, str]] = []
+
+    def counter(self, name: str, documentation: str, label: str = "") -> Counter:
+        metric = Counter(name, documentation, label)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, documentation: str, label: str = "", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, documentation, label, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(
+        self, name: str, documentation: str, read: Callable[[], Dict[str, float]], label: str = "", kind: str = "gauge"
+    ) -> None:
+        """Register a family read at scrape time; ``read`` returns {label value: value}.
+
+        Pass ``kind="counter"`` for running totals that are kept elsewhere.
+        """
+        self.gauges.append((name, documentation, read, label, kind))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for name, documentation, read, label, kind in self.gauges:
+            lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+            for label_value, value in sorted(read().items()):
+                labels = f'{{{label}="{_escape(label_value)}"}}' if label else ""
+                lines.append(f"{name}{labels} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def _accumulate(totals: Dict[str, List[float]], shard: Dict[str, List[float]]) -> None:
+    for label_value, values in shard.items():
+        current = totals.get(label_value)
+        if current is None:
+            totals[label_value] = list(values)
+        else:
+            for index, value in enumerate(values):
+                current[index] += value
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,96 @@
+import threading
+from pathlib import Path
+
+import pandas as pd
+from fastapi.testclient import TestClient
+
+import main
+from main import Transaction
+from metrics import MetricsRegistry
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+def samples(text):
+    return dict(line.rsplit(" ", 1) for line in text.splitlines() if not line.startswith("#"))
+
+
+def test_values_recorded_on_many_threads_are_summed_at_render():
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits.", "route")
+    latency = registry.histogram("latency_seconds", "Latency.", "route", buckets=[0.01, 0.1])
+
+    def work():
+        for _ in range(1000):
+            hits.inc("a")
+            latency.observe("a", 0.05)
+
+    threads = [threading.Thread(target=work) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    latency.observe("a", 0.001)
+    latency.observe("a", 5)
+
+    rendered = samples(registry.render())
+    assert rendered['hits_total{route="a"}'] == "4000"
+    assert rendered['latency_seconds_bucket{route="a",le="0.01"}'] == "1"
+    assert rendered['latency_seconds_bucket{route="a",le="0.1"}'] == "4001"
+    assert rendered['latency_seconds_bucket{route="a",le="+Inf"}'] == "4002"
+    assert rendered['latency_seconds_count{route="a"}'] == "4002"
+
+
+def test_exited_threads_are_folded_into_a_retired_total():
+    registry = MetricsRegistry()
+    hits = registry.counter("hits_total", "Hits.")
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=[0.1])
+
+    for _ in range(50):
+        batch = [threading.Thread(target=lambda: (hits.inc(), latency.observe("", 0.05))) for _ in range(40)]
+        for thread in batch:
+            thread.start()
+        for thread in batch:
+            thread.join()
+    rendered = samples(registry.render())
+
+    assert rendered["hits_total"] == "2000" and rendered['latency_seconds_bucket{le="0.1"}'] == "2000"
+    assert len(hits._shards) == 0 and len(latency._shards) == 0
+    hits.inc()
+    assert samples(registry.render())["hits_total"] == "2001" and len(hits._shards) == 1
+
+
+def test_scrape_time_families_and_label_escaping():
+    registry = MetricsRegistry()
+    registry.counter("reasons_total", "Reasons.", "reason").inc('say "hi"')
+    registry.gauge("queue_depth", "Depth.", lambda: {"": 3})
+
+    text = registry.render()
+    assert "# TYPE queue_depth gauge" in text
+    assert samples(text) == {'reasons_total{reason="say \\"hi\\""}': "1", "queue_depth": "3"}
+
+
+def test_metrics_endpoint_reports_stages_requests_and_alerts():
+    frame = pd.read_csv(DATASET).head(10)
+    frame["User_ID"] = frame.index % 3
+    fields = list(Transaction.model_fields)
+    payloads = [Transaction(**{name: row[name] for name in fields}).model_dump() for row in frame.to_dict("records")]
+    with TestClient(main.app) as client:
+        before = samples(client.get("/metrics").text)
+        results = client.post("/detect/batch", json=payloads).json()
+        response = client.get("/metrics")
+
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    after = samples(response.text)
+
+    def delta(name):
+        return float(after.get(name, 0)) - float(before.get(name, 0))
+
+    assert delta('fraud_requests_total{endpoint="detect_batch"}') == 1
+    assert delta("fraud_transactions_scored_total") == 10
+    assert delta("fraud_alerts_total") == sum(result["alert_triggered"] for result in results)
+    reasons = [reason for result in results for reason in result["alert_reasons"]]
+    assert sum(delta(f'fraud_alert_reasons_total{{reason="{reason}"}}') for reason in set(reasons)) == len(reasons)
+    for stage in ("preprocess", "onnx", "behavior", "behavior_lock_wait", "rules"):
+        assert delta(f'fraud_stage_seconds_count{{stage="{stage}"}}') >= 1
+    assert int(after['fraud_behavior_store_keys{kind="users"}']) >= 1
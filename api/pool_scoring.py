@@ -0,0 +1,152 @@
+"""
+Multi-process feature building and ONNX scoring over shared-memory column blocks.
+
+The parent copies each chunk's raw model columns into a slot of shared memory
+(numeric columns as float64, categorical ones as fixed-width strings), and a
+forked worker builds the feature matrix from that slot with
+``FeatureBuilder.transform_columns``, runs the model and writes the scores into
+a matching shared output slot. Only ``(slot, rows)`` is pickled per chunk.
+Workers are forked after the model file has been read, so they inherit its
+bytes and the fitted builder copy-on-write. Each worker builds one
+single-threaded session at start-up, so ``workers`` processes use ``workers``
+cores.
+
+Behavior, rules and output stay serial in the parent, since New Device/Burst
+state must be replayed in file order. The parent's per-row share is the
+column copy plus those stages; ``bench_scoring.py`` prints it, and the
+speedup ceiling it implies, for the machine it runs on.
+"""
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Deque, Dict, List, Optional
+
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+
+from features import FeatureBuilder
+
+# Per-worker state, set once by _init_worker.
+_SESSION: Optional[ort.InferenceSession] = None
+_INPUT_NAME = ""
+_BUILDER: Optional[FeatureBuilder] = None
+_COLUMNS: Dict[str, np.ndarray] = {}
+_FEATURES: Optional[np.ndarray] = None
+_SCORES: Optional[np.ndarray] = None
+
+
+def _init_worker(model: bytes, builder: FeatureBuilder, columns: Dict[str, np.ndarray], scores: np.ndarray) -> None:
+    global _SESSION, _INPUT_NAME, _BUILDER, _COLUMNS, _FEATURES, _SCORES
+    options = ort.SessionOptions()
+    options.intra_op_num_threads = 1
+    options.inter_op_num_threads = 1
+    options.add_session_config_entry("session.intra_op.allow_spinning", "0")
+    _SESSION = ort.InferenceSession(model, sess_options=options, providers=["CPUExecutionProvider"])
+    _INPUT_NAME = _SESSION.get_inputs()[0].name
+    _BUILDER, _COLUMNS, _SCORES = builder, columns, scores
+    _FEATURES = np.zeros((scores.shape[1], builder.width), dtype=np.float32)
+
+
+def _score_slot(slot: int, n_rows: int) -> int:
+    columns = {name: block[slot, :n_rows] for name, block in _COLUMNS.items()}
+    features = _BUILDER.transform_columns(columns, n_rows, out=_FEATURES)
+    result = _SESSION.run(None, {_INPUT_NAME: features})[0]
+    _SCORES[slot, :n_rows] = result.reshape(-1)
+    return n_rows
+
+
+class SharedMemoryScorer:
+    """Fork-based process pool that builds features and scores chunks held in shared memory.
+
+    Usage: ``slot = scorer.acquire()``, ``scorer.write(slot, frame)``,
+    ``future = scorer.submit(slot, len(frame))``, and once the future is done
+    read ``scorer.probabilities(slot, n)`` and ``release(slot)``. There are
+    ``slots_per_worker * workers`` slots, so a caller that keeps at most that
+    many chunks in flight never waits for a free one.
+
+    Categorical vocabularies must be strings. Cells are stored one character
+    longer than the longest category, so a longer value is truncated to
+    something that still matches no category.
+    """
+
+    def __init__(
+        self, model_path: Path, builder: FeatureBuilder, workers: int, slot_rows: int, slots_per_worker: int = 2
+    ) -> None:
+        vocabularies = [vocabulary for _, block, _ in builder.categorical_blocks for vocabulary in block]
+        if not all(isinstance(category, str) for vocabulary in vocabularies for category in vocabulary):
+            raise ValueError("Shared-memory columns need string categories")
+        self.workers = workers
+        self.slot_rows = slot_rows
+        self.n_slots = max(1, workers * slots_per_worker)
+        self.numeric_names: List[str] = [name for names, _, _ in builder.numeric_blocks for name in names]
+        self.categorical_names: List[str] = [name for names, _, _ in builder.categorical_blocks for name in names]
+        text = np.dtype(f"U{max((len(category) for v in vocabularies for category in v), default=0) + 1}")
+
+        shape = (self.n_slots, slot_rows)
+        self._segments: List[shared_memory.SharedMemory] = []
+        self.numeric = self._array((len(self.numeric_names), *shape), np.dtype(np.float64))
+        self.categorical = self._array((len(self.categorical_names), *shape), text)
+        self.scores = self._array(shape, np.dtype(np.float32))
+        columns = {name: self.numeric[index] for index, name in enumerate(self.numeric_names)}
+        columns.update({name: self.categorical[index] for index, name in enumerate(self.categorical_names)})
+
+        self._free: Deque[int] = deque(range(self.n_slots))
+        self._closed = False
+        # With fork, initargs are inherited rather than pickled, so the model bytes and buffers are shared.
+        self._pool = ProcessPoolExecutor(
+            workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(Path(model_path).read_bytes(), builder, columns, self.scores),
+        )
+
+    def _array(self, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        segment = shared_memory.SharedMemory(create=True, size=max(1, int(np.prod(shape)) * dtype.itemsize))
+        self._segments.append(segment)
+        return np.ndarray(shape, dtype=dtype, buffer=segment.buf)
+
+    def __enter__(self) -> "SharedMemoryScorer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def acquire(self) -> int:
+        if not self._free:
+            raise RuntimeError("No free column slot; wait for an in-flight chunk before submitting another")
+        return self._free.popleft()
+
+    def release(self, slot: int) -> None:
+        self._free.append(slot)
+
+    def write(self, slot: int, frame: pd.DataFrame) -> None:
+        """Copy a chunk's model columns into ``slot``."""
+        n_rows = len(frame)
+        if n_rows > self.slot_rows:
+            raise ValueError(f"Chunk of {n_rows} rows exceeds the {self.slot_rows}-row slot")
+        for index, name in enumerate(self.numeric_names):
+            self.numeric[index, slot, :n_rows] = frame[name].to_numpy(dtype=np.float64)
+        for index, name in enumerate(self.categorical_names):
+            self.categorical[index, slot, :n_rows] = frame[name].to_numpy()
+
+    def submit(self, slot: int, n_rows: int) -> Future:
+        if n_rows > self.slot_rows:
+            raise ValueError(f"Chunk of {n_rows} rows exceeds the {self.slot_rows}-row slot")
+        return self._pool.submit(_score_slot, slot, n_rows)
+
+    def probabilities(self, slot: int, n_rows: int) -> np.ndarray:
+        return self.scores[slot, :n_rows].astype(np.float64)
+
+    def close(self) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._pool.shutdown(cancel_futures=True)
+        # Views must go before the segments can be closed.
+        del self.numeric, self.categorical, self.scores
+        for segment in self._segments:
+            segment.close()
+            segment.unlink()
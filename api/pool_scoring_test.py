@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+import pytest
+
+from features import FeatureBuilder
+from main import MODEL_PATH, load_preprocessor
+from pool_scoring import SharedMemoryScorer
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+def test_workers_build_the_same_features_as_the_parent():
+    builder = load_preprocessor()
+    if not isinstance(builder, FeatureBuilder):
+        pytest.skip("shared-memory scoring needs a compiled FeatureBuilder")
+    frame = pd.read_csv(DATASET).head(40)
+    # Unknown categories, including one longer than the stored cell, must encode as all zeros.
+    frame.loc[0, "Transaction_Location"] = "Samarkand" * 4
+    frame.loc[1, "Card_Type"] = "Mastercard"
+
+    session = ort.InferenceSession(str(MODEL_PATH), providers=["CPUExecutionProvider"])
+    features = builder.transform_columns(frame, len(frame))
+    expected = session.run(None, {session.get_inputs()[0].name: features})[0].reshape(-1)
+
+    with SharedMemoryScorer(MODEL_PATH, builder, workers=2, slot_rows=32) as scorer:
+        results = []
+        for start in range(0, len(frame), 32):
+            chunk = frame.iloc[start : start + 32]
+            slot = scorer.acquire()
+            scorer.write(slot, chunk)
+            scorer.submit(slot, len(chunk)).result()
+            results.append(scorer.probabilities(slot, len(chunk)))
+            scorer.release(slot)
+
+    np.testing.assert_allclose(np.concatenate(results), expected, rtol=1e-6)
@@ -0,0 +1,154 @@
+import logging
+import time
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("fraud-api")
+
+
+def file_fingerprint(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ProbabilityCache:
+    """Memoizes model probabilities by quantized feature vector, between preprocessing and ``session.run``.
+
+    Each feature is rounded to a multiple of ``quantum`` (in the preprocessed,
+    i.e. scaled and one-hot, space; 0 means exact float32 match), and the
+    rounded row is the key. A hit returns the probability of the first row
+    that fell in the same cell, so ``quantum`` bounds how far apart two
+    "identical" payments may be. Entries live for ``ttl_seconds`` and the
+    least recently used are evicted beyond ``max_entries``.
+
+    The cache is bound to the model file the session was loaded from. The
+    file is checked at most every ``check_seconds``. When it changes, the
+    entries are dropped and the cache rebinds to the new file, so entries
+    computed before the swap are never served after it. The session keeps
+    running the model it loaded until the worker restarts; the change is
+    logged once so the restart is not forgotten.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, quantum: float, check_seconds: float = 5.0) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.quantum = quantum
+        self.check_seconds = check_seconds
+        self._entries: "OrderedDict[bytes, Tuple[float, float]]" = OrderedDict()
+        self._lock = Lock()
+        self._model_path: Optional[Path] = None
+        self._fingerprint: Optional[Tuple[int, int]] = None
+        self._checked = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def bind(self, model_path: Path) -> None:
+        """Start caching for a freshly loaded model."""
+        with self._lock:
+            self._entries.clear()
+            self._model_path = Path(model_path)
+            self._fingerprint = file_fingerprint(self._model_path)
+            self._checked = time.monotonic()
+
+    def keys(self, features: np.ndarray) -> List[bytes]:
+        if self.quantum > 0:
+            cells = np.rint(features / self.quantum).astype(np.int64)
+        else:
+            cells = np.ascontiguousarray(features, dtype=np.float32)
+        return [row.tobytes() for row in cells]
+
+    def predict(self, features: np.ndarray, run: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """Probabilities for ``features``, calling ``run`` only on the rows not cached."""
+        if not self._usable():
+            with self._lock:
+                self.bypassed += len(features)
+            return run(features)
+        keys = self.keys(features)
+        probabilities = np.empty(len(keys), dtype=np.float64)
+        missing: List[int] = []
+        now = time.monotonic()
+        with self._lock:
+            for row, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] > now:
+                    self._entries.move_to_end(key)
+                    probabilities[row] = entry[1]
+                else:
+                    missing.append(row)
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        if not missing:
+            return probabilities
+
+        computed = run(features[missing] if len(missing) < len(keys) else features)
+        probabilities[missing] = computed
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for row, probability in zip(missing, computed):
+                self._entries[keys[row]] = (expires_at, float(probability))
+                self._entries.move_to_end(keys[row])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return probabilities
+
+    def _usable(self) -> bool:
+        if not self.enabled or self._model_path is None:
+            return False
+        now = time.monotonic()
+        if now - self._checked >= self.check_seconds and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                fingerprint = file_fingerprint(self._model_path)
+                if fingerprint != self._fingerprint:
+                    self._entries.clear()
+                    self._fingerprint = fingerprint
+                    self.invalidations += 1
+                    logger.warning(
+                        "Model file %s changed; probability cache cleared. This worker keeps serving the model "
+                        "it loaded at startup until it is restarted",
+                        self._model_path,
+                    )
+            finally:
+                self._lock.release()
+        return True
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "enabled": self.enabled,
+            "model": str(self._model_path) if self._model_path else None,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "quantum": self.quantum,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hit_ratio(), 4),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,90 @@
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import main
+import probability_cache
+from main import Transaction
+from probability_cache import ProbabilityCache
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+class CountingModel:
+    def __init__(self):
+        self.rows = 0
+
+    def __call__(self, features):
+        self.rows += len(features)
+        return features.sum(axis=1).astype(np.float64)
+
+
+def test_rows_in_the_same_quantization_cell_share_one_model_run():
+    cache = ProbabilityCache(max_entries=100, ttl_seconds=60, quantum=0.01)
+    cache.bind(Path(__file__))
+    model = CountingModel()
+    features = np.array([[1.0, 2.0], [1.001, 2.002], [5.0, 5.0]], dtype=np.float32)
+
+    first = cache.predict(features[:1], model)
+    second = cache.predict(features, model)
+
+    assert model.rows == 2  # row 1 falls in row 0's cell, only row 2 is new
+    assert second[1] == first[0] == 3.0 and second[2] == 10.0
+    assert (cache.hits, cache.misses) == (2, 2)
+
+
+def test_entries_expire_and_the_least_recently_used_is_evicted(monkeypatch):
+    clock = [50.0]
+    monkeypatch.setattr(probability_cache.time, "monotonic", lambda: clock[0])
+    cache = ProbabilityCache(max_entries=2, ttl_seconds=10, quantum=0, check_seconds=1000)
+    cache.bind(Path(__file__))
+    model = CountingModel()
+    rows = np.eye(3, dtype=np.float32)
+
+    cache.predict(rows, model)
+    cache.predict(rows[2:], model)
+    assert model.rows == 3 and len(cache) == 2
+    cache.predict(rows[:1], model)
+    clock[0] += 10
+    cache.predict(rows[2:], model)
+    assert model.rows == 5
+
+
+def test_model_file_change_clears_the_cache_once_and_keeps_caching(tmp_path, caplog):
+    model_file = tmp_path / "model.onnx"
+    model_file.write_bytes(b"v1")
+    cache = ProbabilityCache(max_entries=100, ttl_seconds=60, quantum=0.001, check_seconds=0)
+    cache.bind(model_file)
+    model = CountingModel()
+    features = np.arange(12, dtype=np.float32).reshape(4, 3)
+
+    cache.predict(features, model)
+    model_file.write_bytes(b"v2 model")
+    os.utime(model_file, ns=(1, 1))
+    with caplog.at_level(logging.WARNING, logger="fraud-api"):
+        cache.predict(features, model)
+        cache.predict(features, model)
+
+    # Rows cached before the swap were recomputed once, then cached again without a rebind.
+    assert model.rows == 8 and len(cache) == 4
+    assert cache.stats()["invalidations"] == 1 and cache.bypassed == 0
+    assert ["restarted" in record.getMessage() for record in caplog.records] == [True]
+
+
+def test_cached_probabilities_match_the_model(monkeypatch):
+    frame = pd.read_csv(DATASET).head(50)
+    frame["User_ID"] = frame.index
+    fields = list(Transaction.model_fields)
+    payloads = [Transaction(**{name: row[name] for name in fields}).model_dump() for row in frame.to_dict("records")]
+    monkeypatch.setattr(main, "PROBABILITY_CACHE", ProbabilityCache(1000, 60, quantum=1e-6))
+    preprocessor, session, input_name = main.load_artifacts()
+
+    uncached = main.predict_probabilities(payloads, preprocessor, session, input_name)
+    assert main.PROBABILITY_CACHE.misses == 50
+    cached = main.predict_probabilities(payloads[::-1], preprocessor, session, input_name)
+
+    assert main.PROBABILITY_CACHE.hits == 50
+    np.testing.assert_allclose(cached[::-1], uncached, rtol=1e-6)
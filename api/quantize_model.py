@@ -0,0 +1,223 @@
+"""
+Quantized model variants and an accuracy-vs-latency comparison harness.
+
+Writes variants of ``fraud_model.onnx`` next to it, named
+``fraud_model.<variant>.onnx`` so the API can serve one with
+``MODEL_VARIANT=<variant>``:
+
+- ``int8_dynamic``: int8 weights, activations quantized at run time
+- ``int8_static``: int8 weights and activations (QDQ), calibrated on a CSV
+- ``fp16``: float16 weights with float32 inputs/outputs (needs ``onnxconverter-common``)
+
+Then scores every variant on the normal and adversarial test sets and
+reports ROC-AUC, PR-AUC, single-row p50/p99 latency, file size and the
+resident memory a loaded session adds (measured in a fresh process). A
+variant passes when neither AUC drops more than ``--max-auc-drop`` below
+the float32 model.
+
+Static quantization is calibrated on rows that are never evaluated: when
+``--calibration`` is the normal test set (the default), a stratified
+``--calibration-fraction`` of it is held out for calibration and the
+rest is scored.
+
+    python quantize_model.py --calibration ../Dataset/test_dataset_100_mixed.csv
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import joblib
+import numpy as np
+import onnxruntime as ort
+import pandas as pd
+from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_dynamic, quantize_static
+from sklearn.metrics import average_precision_score, roc_auc_score
+
+from features import FeatureBuilder
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "Dataset"
+VARIANTS = ("int8_dynamic", "int8_static", "fp16")
+
+
+def variant_path(model_path: Path, variant: str) -> Path:
+    return model_path.with_name(f"{model_path.stem}.{variant}{model_path.suffix}")
+
+
+def split_calibration(frame: pd.DataFrame, fraction: float, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Hold out ``fraction`` of the rows, stratified by ``isFraud``: (calibration, evaluation)."""
+    rng = np.random.default_rng(seed)
+    labels = frame["isFraud"] if "isFraud" in frame else pd.Series(0, index=frame.index)
+    held_out: List[Any] = []
+    for _, group in frame.groupby(labels):
+        count = int(round(len(group) * fraction))
+        held_out.extend(rng.choice(group.index.to_numpy(), size=count, replace=False))
+    calibration = frame.index.isin(held_out)
+    return frame[calibration], frame[~calibration]
+
+
+def load_features(builder: FeatureBuilder, source: Union[Path, pd.DataFrame]) -> Dict[str, np.ndarray]:
+    frame = source if isinstance(source, pd.DataFrame) else pd.read_csv(source)
+    return {
+        "features": builder.transform(frame.to_dict("records")),
+        "labels": frame["isFraud"].to_numpy() if "isFraud" in frame else np.zeros(len(frame), dtype=np.int64),
+    }
+
+
+class FeatureCalibrationReader(CalibrationDataReader):
+    def __init__(self, input_name: str, features: np.ndarray) -> None:
+        self.rows = iter([{input_name: features[index : index + 1]} for index in range(len(features))])
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        return next(self.rows, None)
+
+
+def build_variants(model_path: Path, calibration: np.ndarray) -> Dict[str, Path]:
+    outputs: Dict[str, Path] = {}
+
+    dynamic_path = variant_path(model_path, "int8_dynamic")
+    quantize_dynamic(str(model_path), str(dynamic_path), weight_type=QuantType.QInt8)
+    outputs["int8_dynamic"] = dynamic_path
+
+    input_name = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"]).get_inputs()[0].name
+    static_path = variant_path(model_path, "int8_static")
+    quantize_static(
+        str(model_path),
+        str(static_path),
+        FeatureCalibrationReader(input_name, calibration),
+        quant_format=QuantFormat.QDQ,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        per_channel=True,
+    )
+    outputs["int8_static"] = static_path
+
+    try:
+        import onnx
+        from onnxconverter_common import float16
+    except ImportError:
+        print("Skipping fp16 variant: onnxconverter-common is not installed")
+    else:
+        fp16_path = variant_path(model_path, "fp16")
+        onnx.save(float16.convert_float_to_float16(onnx.load(str(model_path)), keep_io_types=True), str(fp16_path))
+        outputs["fp16"] = fp16_path
+    return outputs
+
+
+def current_rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm") as handle:
+            return int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+
+        # Peak RSS where /proc is missing: kilobytes on Linux, bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _session_rss(model_path: str, rows: np.ndarray) -> int:
+    before = current_rss_bytes()
+    session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    session.run(None, {session.get_inputs()[0].name: rows})
+    return current_rss_bytes() - before
+
+
+def session_rss_mb(model_path: Path, rows: np.ndarray) -> float:
+    """Resident memory a loaded session adds after one run, measured in a fresh process."""
+    with multiprocessing.get_context("spawn").Pool(1) as pool:
+        return round(pool.apply(_session_rss, (str(model_path), rows)) / 1_048_576, 3)
+
+
+def evaluate_variant(model_path: Path, datasets: Dict[str, Dict[str, np.ndarray]], repeats: int) -> Dict[str, Any]:
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    report: Dict[str, Any] = {
+        "file_mb": round(model_path.stat().st_size / 1_048_576, 3),
+        "session_rss_mb": session_rss_mb(model_path, datasets["normal"]["features"]),
+    }
+
+    for name, data in datasets.items():
+        scores = session.run(None, {input_name: data["features"]})[0].reshape(-1)
+        report[f"{name}_roc_auc"] = round(float(roc_auc_score(data["labels"], scores)), 4)
+        report[f"{name}_pr_auc"] = round(float(average_precision_score(data["labels"], scores)), 4)
+
+    rows = datasets["normal"]["features"]
+    timings: List[float] = []
+    for index in range(repeats):
+        row = rows[index % len(rows) : index % len(rows) + 1]
+        start = time.perf_counter()
+        session.run(None, {input_name: row})
+        timings.append(time.perf_counter() - start)
+    report["p50_ms"] = round(float(np.percentile(timings, 50)) * 1000, 4)
+    report["p99_ms"] = round(float(np.percentile(timings, 99)) * 1000, 4)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Build and compare quantized fraud model variants")
+    parser.add_argument("--model", type=Path, default=Path(os.getenv("MODEL_PATH", "fraud_model.onnx")))
+    parser.add_argument("--preprocessor", type=Path, default=Path(os.getenv("PREPROC_PATH", "preprocessor.pkl")))
+    parser.add_argument("--calibration", type=Path, default=DATASET_DIR / "test_dataset_100_mixed.csv")
+    parser.add_argument("--normal", type=Path, default=DATASET_DIR / "test_dataset_100_mixed.csv")
+    parser.add_argument("--adversarial", type=Path, default=DATASET_DIR / "adversarial_test_100.csv")
+    parser.add_argument(
+        "--calibration-fraction",
+        type=float,
+        default=0.3,
+        help="Share of the normal set held out for calibration when --calibration is the same file",
+    )
+    parser.add_argument("--repeats", type=int, default=2000)
+    parser.add_argument("--max-auc-drop", type=float, default=0.005)
+    parser.add_argument("--skip-build", action="store_true", help="Only compare variants that already exist")
+    parser.add_argument("--report", type=Path, help="Write the comparison as JSON")
+    args = parser.parse_args()
+
+    builder = FeatureBuilder.from_preprocessor(joblib.load(args.preprocessor))
+    normal = pd.read_csv(args.normal)
+    if args.calibration.resolve() == args.normal.resolve():
+        calibration, normal = split_calibration(normal, args.calibration_fraction)
+        print(f"Calibrating on {len(calibration)} held-out rows of {args.normal.name}, evaluating on {len(normal)}")
+    else:
+        calibration = pd.read_csv(args.calibration)
+    datasets = {"normal": load_features(builder, normal), "adversarial": load_features(builder, args.adversarial)}
+
+    if args.skip_build:
+        variants = {name: variant_path(args.model, name) for name in VARIANTS if variant_path(args.model, name).exists()}
+    else:
+        variants = build_variants(args.model, load_features(builder, calibration)["features"])
+
+    results = {"fp32": evaluate_variant(args.model, datasets, args.repeats)}
+    for name, path in variants.items():
+        results[name] = evaluate_variant(path, datasets, args.repeats)
+
+    baseline = results["fp32"]
+    for name, report in results.items():
+        drops = [baseline[key] - report[key] for key in report if key.endswith("_auc")]
+        report["within_tolerance"] = max(drops) <= args.max_auc_drop
+
+    columns = [
+        "file_mb",
+        "session_rss_mb",
+        "normal_roc_auc",
+        "normal_pr_auc",
+        "adversarial_roc_auc",
+        "adversarial_pr_auc",
+        "p50_ms",
+        "p99_ms",
+        "within_tolerance",
+    ]
+    print(f"{'variant':<14}" + "".join(f"{column:>21}" for column in columns))
+    for name, report in results.items():
+        print(f"{name:<14}" + "".join(f"{str(report[column]):>21}" for column in columns))
+
+    if args.report:
+        args.report.write_text(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
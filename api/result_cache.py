@@ -0,0 +1,124 @@
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+
+class IdempotencyConflict(Exception):
+    """An Idempotency-Key was reused with a different request body."""
+
+
+def payload_digest(body: Any) -> str:
+    """Canonical hash of a JSON-compatible request body: key order and whitespace do not matter."""
+    canonical = json.dumps(body, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """Bounded LRU cache of scoring results with a TTL and single-flight for duplicates.
+
+    ``begin`` returns a future and whether the caller owns it. A cached result
+    comes back as a completed future. A request identical to one still being
+    scored gets that request's pending future, so it waits for the first
+    answer instead of scoring (and counting toward behavior state) again.
+    Only the owner computes; it must call ``finish`` or ``fail``. Failures
+    are passed to the waiters but never cached, so a later retry recomputes.
+
+    Each entry stores the digest of the body it was computed for, so reusing
+    an idempotency key with a different body raises ``IdempotencyConflict``.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, str, Any]]" = OrderedDict()
+        self._in_flight: Dict[str, Tuple[str, Future]] = {}
+        self._lock = Lock()
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.conflicts = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl_seconds > 0
+
+    def begin(self, key: str, digest: str) -> Tuple[Future, bool]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, cached_digest, result = entry
+                if expires_at <= now:
+                    del self._entries[key]
+                else:
+                    if cached_digest != digest:
+                        self.conflicts += 1
+                        raise IdempotencyConflict(key)
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    future: Future = Future()
+                    future.set_result(result)
+                    return future, False
+            in_flight = self._in_flight.get(key)
+            if in_flight is not None:
+                if in_flight[0] != digest:
+                    self.conflicts += 1
+                    raise IdempotencyConflict(key)
+                self.coalesced += 1
+                return in_flight[1], False
+            self.misses += 1
+            future = Future()
+            self._in_flight[key] = (digest, future)
+            return future, True
+
+    def finish(self, key: str, future: Future, result: Any) -> None:
+        with self._lock:
+            digest, _ = self._in_flight.pop(key)
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, digest, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        future.set_result(result)
+
+    def fail(self, key: str, future: Future, error: BaseException) -> None:
+        with self._lock:
+            self._in_flight.pop(key, None)
+        future.set_exception(error)
+
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.coalesced + self.misses
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries, in_flight = len(self._entries), len(self._in_flight)
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "in_flight": in_flight,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "coalesced": self.coalesced,
+            "misses": self.misses,
+            "conflicts": self.conflicts,
+            "hit_ratio": round(self.hit_ratio(), 4),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def cache_key(endpoint: str, idempotency_key: Optional[str], digest: str) -> str:
+    """Idempotency keys are scoped per endpoint; without one the body digest is the key."""
+    if idempotency_key:
+        return f"{endpoint}:key:{idempotency_key}"
+    return f"{endpoint}:body:{digest}"
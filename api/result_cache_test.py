@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import result_cache
+from main import Transaction
+from result_cache import IdempotencyConflict, ResultCache, payload_digest
+
+DATASET = Path(__file__).resolve().parent.parent / "Dataset" / "test_dataset_100_mixed.csv"
+
+
+def payloads(count):
+    frame = pd.read_csv(DATASET).head(count)
+    frame["User_ID"] = 900_000 + frame.index
+    fields = list(Transaction.model_fields)
+    return [Transaction(**{name: row[name] for name in fields}).model_dump() for row in frame.to_dict("records")]
+
+
+def samples(text):
+    return {name: float(value) for name, value in (line.rsplit(" ", 1) for line in text.splitlines() if line[0] != "#")}
+
+
+def test_hits_expire_after_the_ttl_and_the_oldest_entry_is_evicted(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(result_cache.time, "monotonic", lambda: clock[0])
+    cache = ResultCache(max_entries=2, ttl_seconds=10)
+    for key in ("a", "b", "c"):
+        future, owner = cache.begin(key, "digest")
+        assert owner
+        cache.finish(key, future, key.upper())
+
+    assert cache.begin("a", "digest")[1] is True  # evicted by "c"
+    future, owner = cache.begin("c", "digest")
+    assert not owner and future.result() == "C"
+    clock[0] += 10
+    assert cache.begin("c", "digest")[1] is True
+    assert (cache.hits, cache.misses) == (1, 5)
+
+
+def test_duplicates_wait_for_the_request_in_flight_and_failures_are_not_cached():
+    cache = ResultCache(max_entries=10, ttl_seconds=60)
+    future, owner = cache.begin("k", "d")
+    waiter, waiter_owns = cache.begin("k", "d")
+    assert owner and not waiter_owns and waiter is future
+
+    with pytest.raises(IdempotencyConflict):
+        cache.begin("k", "other body")
+    threading.Timer(0.05, cache.fail, args=("k", future, RuntimeError("model down"))).start()
+    with pytest.raises(RuntimeError):
+        waiter.result(timeout=5)
+    assert cache.begin("k", "d")[1] is True
+    assert cache.coalesced == 1 and cache.conflicts == 1 and len(cache) == 0
+
+
+def test_digest_ignores_key_order():
+    assert payload_digest({"a": 1, "b": [1.5, "x"]}) == payload_digest({"b": [1.5, "x"], "a": 1})
+    assert payload_digest({"a": 1}) != payload_digest({"a": 1.1})
+
+
+def test_repeated_detect_returns_the_first_response_without_scoring_again():
+    first_payload, other_payload = payloads(2)
+    with TestClient(main.app) as client:
+        before = samples(client.get("/metrics").text)
+        first = client.post("/detect", json=first_payload, headers={"Idempotency-Key": "retry-1"})
+        reordered = dict(reversed(list(first_payload.items())))
+        repeat = client.post("/detect", json=reordered, headers={"Idempotency-Key": "retry-1"})
+        reused_key = client.post("/detect", json=other_payload, headers={"Idempotency-Key": "retry-1"})
+        after = samples(client.get("/metrics").text)
+
+    assert repeat.json() == first.json()
+    assert repeat.headers["Idempotent-Replayed"] == "true" and "Idempotent-Replayed" not in first.headers
+    assert reused_key.status_code == 422
+
+    def delta(name):
+        return after.get(name, 0) - before.get(name, 0)
+
+    assert delta("fraud_transactions_scored_total") == 1
+    assert delta('fraud_stage_seconds_count{stage="behavior"}') == 1
+    assert delta('fraud_result_cache_lookups_total{result="hit"}') == 1
+    assert 0 < after["fraud_result_cache_hit_ratio"] <= 1
+
+
+def test_identical_bodies_without_a_key_are_scored_unless_payload_caching_is_on(monkeypatch):
+    payload = {**payloads(1)[0], "Transaction_Amount": 1234.5}
+    with TestClient(main.app) as client:
+        before = samples(client.get("/metrics").text)
+        plain = [client.post("/detect", json=payload) for _ in range(2)]
+        monkeypatch.setattr(main, "RESULT_CACHE_BY_PAYLOAD", True)
+        by_payload = [client.post("/detect", json={**payload, "Transaction_Amount": 4321.5}) for _ in range(2)]
+        after = samples(client.get("/metrics").text)
+
+    # Genuine duplicate transactions each get their own Transaction_ID, which the WebApp stores as a unique key.
+    assert not any("Idempotent-Replayed" in response.headers for response in plain)
+    assert plain[0].json()["Transaction_ID"] != plain[1].json()["Transaction_ID"]
+    assert by_payload[1].json() == by_payload[0].json() and by_payload[1].headers["Idempotent-Replayed"] == "true"
+    assert after["fraud_transactions_scored_total"] - before["fraud_transactions_scored_total"] == 3
+
+
+def test_batches_are_cached_only_under_an_idempotency_key():
+    batch = payloads(3)
+    with TestClient(main.app) as client:
+        before = samples(client.get("/metrics").text)
+        plain = [client.post("/detect/batch", json=batch) for _ in range(2)]
+        keyed = [client.post("/detect/batch", json=batch, headers={"Idempotency-Key": "batch-1"}) for _ in range(2)]
+        after = samples(client.get("/metrics").text)
+
+    assert not any("Idempotent-Replayed" in response.headers for response in plain)
+    assert keyed[0].json() == keyed[1].json() and keyed[1].headers["Idempotent-Replayed"] == "true"
+    assert after["fraud_transactions_scored_total"] - before["fraud_transactions_scored_total"] == 9
+
+
+def test_coalesced_async_requests_survive_the_owner_being_cancelled():
+    body = {"order": 1}
+    computed = []
+
+    async def scenario():
+        release = asyncio.Event()
+
+        async def compute():
+            await release.wait()
+            computed.append(1)
+            return {"score": 0.5}
+
+        owner = asyncio.ensure_future(main.cached_result_async("detect", body, "cancel-1", False, compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(main.cached_result_async("detect", body, "cancel-1", False, compute))
+        await asyncio.sleep(0)
+        owner.cancel()  # the first client disconnected
+        release.set()
+        response = await waiter
+        with pytest.raises(asyncio.CancelledError):
+            await owner
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.body == b'{"score":0.5}' and response.headers["Idempotent-Replayed"] == "true"
+    assert computed == [1]
+    assert main.RESULT_CACHE.begin("detect:key:cancel-1", payload_digest(body))[0].result() == {"score": 0.5}
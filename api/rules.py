@@ -0,0 +1,323 @@
+"""
+Data-driven alert rules compiled into vectorized NumPy evaluators.
+
+Rules are declared in a JSON file, in the order their reasons are reported::
+
+    {
+      "rules": [
+        {"reason": "Foreign", "boost": 0.25,
+         "when": [{"column": "Transaction_Location", "op": "in", "value": ["Russia", "UAE"]}]}
+      ]
+    }
+
+A rule fires when all of its ``when`` conditions hold. Conditions compare a
+payload field, or a context column supplied by the caller (behavior counts,
+new-device flags), against a constant:
+
+- ``>``, ``>=``, ``<``, ``<=``, ``==``, ``!=``: numeric comparison
+- ``between``: ``[low, high)`` range
+- ``in``, ``not_in``: set membership
+
+When the caller passes column types (``{"Transaction_Hour": int, ...}``)
+rather than just names, numeric operators on a ``str`` column are rejected
+at compile time instead of failing on the first batch.
+
+Every set-membership condition on a column gets one bit, and the column's
+values are mapped to a bitmask with a single dict lookup per row. All rules on
+that column then test their bit on the same ``uint64`` array, so a batch is
+scored in one pass over each column however many rules use it.
+"""
+import json
+import logging
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger("fraud-api")
+
+COMPARISONS: Dict[str, Callable[[np.ndarray, Any], np.ndarray]] = {
+    ">": np.greater,
+    ">=": np.greater_equal,
+    "<": np.less,
+    "<=": np.less_equal,
+    "==": np.equal,
+    "!=": np.not_equal,
+}
+MEMBERSHIP = ("in", "not_in")
+NUMERIC_TYPES = (int, float, bool)
+MAX_SETS_PER_COLUMN = 64
+
+Condition = Callable[["_Columns"], np.ndarray]
+# Column names, or a mapping of column name to its Python type (int, float, bool or str).
+Columns = Union[Iterable[str], Mapping[str, type]]
+
+
+class _Columns:
+    """Per-batch cache of the column arrays the compiled rules read."""
+
+    def __init__(
+        self, source: Callable[[str], Iterable[Any]], n_rows: int, bitmasks: Dict[str, Dict[Any, int]]
+    ) -> None:
+        self.source = source
+        self.n_rows = n_rows
+        self.bitmasks = bitmasks
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._bits: Dict[str, np.ndarray] = {}
+
+    def numeric(self, column: str) -> np.ndarray:
+        values = self._numeric.get(column)
+        if values is None:
+            raw = self.source(column)
+            if hasattr(raw, "__len__"):
+                values = np.asarray(raw, dtype=np.float64)
+            else:
+                values = np.fromiter(raw, dtype=np.float64, count=self.n_rows)
+            self._numeric[column] = values
+        return values
+
+    def bits(self, column: str) -> np.ndarray:
+        values = self._bits.get(column)
+        if values is None:
+            lookup = self.bitmasks[column].get
+            values = np.fromiter(
+                (lookup(value, 0) for value in self.source(column)), dtype=np.uint64, count=self.n_rows
+            )
+            self._bits[column] = values
+        return values
+
+
+class CompiledRules:
+    """An immutable, compiled rule set; swap in a new instance to change rules."""
+
+    def __init__(
+        self, rules: Sequence[Tuple[str, float, List[Condition]]], bitmasks: Dict[str, Dict[Any, int]]
+    ) -> None:
+        self.rules = list(rules)
+        self.bitmasks = bitmasks
+        self._lock = Lock()
+        self._calls = 0
+        self._rows = 0
+        self._nanos = [0] * len(self.rules)
+        self._fired = [0] * len(self.rules)
+
+    @classmethod
+    def from_config(cls, config: Mapping[str, Any], columns: Optional[Columns] = None) -> "CompiledRules":
+        known = set(columns) if columns is not None else None
+        types = columns if isinstance(columns, Mapping) else {}
+        bitmasks: Dict[str, Dict[Any, int]] = {}
+        set_counts: Dict[str, int] = {}
+        rules: List[Tuple[str, float, List[Condition]]] = []
+
+        for index, spec in enumerate(config.get("rules", [])):
+            try:
+                reason = str(spec["reason"])
+                boost = float(spec["boost"])
+                when = spec["when"]
+            except (KeyError, TypeError, ValueError) as exc:
+                raise ValueError(f"Rule #{index} needs 'reason', 'boost' and 'when'") from exc
+            if isinstance(when, Mapping):
+                when = [when]
+            if not when:
+                raise ValueError(f"Rule '{reason}' has no conditions")
+
+            conditions: List[Condition] = []
+            for condition in when:
+                if not isinstance(condition, Mapping):
+                    raise ValueError(f"Rule '{reason}' has a condition that is not an object")
+                column, op, value = condition.get("column"), condition.get("op"), condition.get("value")
+                if known is not None and column not in known:
+                    raise ValueError(f"Rule '{reason}' references unknown column '{column}'")
+                if op not in MEMBERSHIP and types.get(column, float) not in NUMERIC_TYPES:
+                    raise ValueError(f"Rule '{reason}': '{op}' needs a numeric column, '{column}' is not")
+                conditions.append(_compile_condition(reason, column, op, value, bitmasks, set_counts))
+            rules.append((reason, boost, conditions))
+        return cls(rules, bitmasks)
+
+    @classmethod
+    def from_file(cls, path: Path, columns: Optional[Columns] = None) -> "CompiledRules":
+        with open(path, encoding="utf-8") as handle:
+            return cls.from_config(json.load(handle), columns)
+
+    def evaluate(
+        self, payloads: Sequence[Mapping[str, Any]], context: Optional[Mapping[str, Any]] = None
+    ) -> Tuple[np.ndarray, List[List[str]]]:
+        """Return per-row boosts and the reasons of the rules that fired, in rule order."""
+        context = context or {}
+
+        def source(column: str) -> Iterable[Any]:
+            if column in context:
+                return context[column]
+            return (payload[column] for payload in payloads)
+
+        return self._evaluate(_Columns(source, len(payloads), self.bitmasks))
+
+    def evaluate_columns(self, columns: Mapping[str, Sequence[Any]], n_rows: int) -> Tuple[np.ndarray, List[List[str]]]:
+        """``evaluate`` for column-oriented batches, e.g. a DataFrame chunk plus behavior columns."""
+        return self._evaluate(_Columns(columns.__getitem__, n_rows, self.bitmasks))
+
+    def check(self, column_types: Mapping[str, type]) -> None:
+        """Evaluate one row of default values (0, 0.0, False, "") without recording stats; raises on failure."""
+        row = {column: kind() for column, kind in column_types.items()}
+        self._evaluate(_Columns(lambda column: [row[column]], 1, self.bitmasks), record=False)
+
+    def _evaluate(self, columns: _Columns, record: bool = True) -> Tuple[np.ndarray, List[List[str]]]:
+        boosts = np.zeros(columns.n_rows, dtype=np.float64)
+        reasons: List[List[str]] = [[] for _ in range(columns.n_rows)]
+        nanos = [0] * len(self.rules)
+        fired = [0] * len(self.rules)
+
+        for index, (reason, boost, conditions) in enumerate(self.rules):
+            start = time.perf_counter_ns()
+            mask = conditions[0](columns)
+            for condition in conditions[1:]:
+                mask = mask & condition(columns)
+            boosts += np.where(mask, boost, 0.0)
+            rows = np.flatnonzero(mask)
+            for row in rows:
+                reasons[row].append(reason)
+            nanos[index] = time.perf_counter_ns() - start
+            fired[index] = len(rows)
+
+        if not record:
+            return boosts, reasons
+        with self._lock:
+            self._calls += 1
+            self._rows += columns.n_rows
+            for index in range(len(self.rules)):
+                self._nanos[index] += nanos[index]
+                self._fired[index] += fired[index]
+        return boosts, reasons
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            calls, rows, nanos, fired = self._calls, self._rows, list(self._nanos), list(self._fired)
+        return {
+            "batches": calls,
+            "rows": rows,
+            "rules": [
+                {
+                    "reason": reason,
+                    "boost": boost,
+                    "fired": fired[index],
+                    "total_ms": round(nanos[index] / 1e6, 3),
+                    "us_per_batch": round(nanos[index] / 1e3 / calls, 3) if calls else 0.0,
+                }
+                for index, (reason, boost, _) in enumerate(self.rules)
+            ],
+        }
+
+
+def _compile_condition(
+    reason: str,
+    column: Any,
+    op: Any,
+    value: Any,
+    bitmasks: Dict[str, Dict[Any, int]],
+    set_counts: Dict[str, int],
+) -> Condition:
+    if not isinstance(column, str):
+        raise ValueError(f"Rule '{reason}' has a condition without a column")
+
+    if op in MEMBERSHIP:
+        if not isinstance(value, list):
+            raise ValueError(f"Rule '{reason}': '{op}' needs a list of values")
+        masks = bitmasks.setdefault(column, {})
+        position = set_counts.get(column, 0)
+        if position >= MAX_SETS_PER_COLUMN:
+            raise ValueError(f"Column '{column}' has more than {MAX_SETS_PER_COLUMN} set conditions")
+        set_counts[column] = position + 1
+        bit = 1 << position
+        for item in value:
+            masks[item] = masks.get(item, 0) | bit
+        bit_array = np.uint64(bit)
+        if op == "in":
+            return lambda columns: (columns.bits(column) & bit_array) != 0
+        return lambda columns: (columns.bits(column) & bit_array) == 0
+
+    if op == "between":
+        if not isinstance(value, list) or len(value) != 2:
+            raise ValueError(f"Rule '{reason}': 'between' needs [low, high]")
+        low, high = float(value[0]), float(value[1])
+        return lambda columns: (columns.numeric(column) >= low) & (columns.numeric(column) < high)
+
+    compare = COMPARISONS.get(op)
+    if compare is None:
+        raise ValueError(f"Rule '{reason}' uses unknown operator '{op}'")
+    try:
+        threshold = float(value)
+    except (TypeError, ValueError) as exc:
+        raise ValueError(f"Rule '{reason}': '{op}' needs a numeric value") from exc
+    return lambda columns: compare(columns.numeric(column), threshold)
+
+
+class RuleSet:
+    """Hot-reloadable rules backed by a file.
+
+    ``current()`` re-reads the file when its mtime changes, checking at most
+    once every ``reload_seconds``. Each worker process reloads on its own, so
+    editing the file takes effect without a restart. A file that fails to
+    compile, or (when column types are known) fails a dry run on a sample
+    row, is logged and the previous rules stay in service. The file is tried
+    again at the next check until a version of it loads.
+    """
+
+    def __init__(self, path: Path, reload_seconds: float = 5.0, columns: Optional[Columns] = None) -> None:
+        self.path = Path(path)
+        self.reload_seconds = reload_seconds
+        self.columns: Optional[Columns] = None
+        if isinstance(columns, Mapping):
+            self.columns = dict(columns)
+        elif columns is not None:
+            self.columns = set(columns)
+        self._lock = Lock()
+        self._mtime = self.path.stat().st_mtime_ns
+        self._rules = self._compile()
+        self._checked = time.monotonic()
+        self.reloads = 0
+        self.rejected = 0
+        self._rejected_mtime: Optional[int] = None
+
+    def current(self) -> CompiledRules:
+        now = time.monotonic()
+        if now - self._checked >= self.reload_seconds and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                self.reload()
+            finally:
+                self._lock.release()
+        return self._rules
+
+    def reload(self, force: bool = False) -> bool:
+        try:
+            mtime = self.path.stat().st_mtime_ns
+        except OSError:
+            logger.warning("Rules file %s is missing, keeping the loaded rules", self.path)
+            return False
+        if mtime == self._mtime and not force:
+            return False
+        try:
+            rules = self._compile()
+        except Exception as exc:
+            # _mtime is left alone, so the next check tries this file again (e.g. after a partial write).
+            if mtime != self._rejected_mtime:
+                self._rejected_mtime = mtime
+                self.rejected += 1
+                logger.error("Rules file %s rejected, keeping the loaded rules: %s", self.path, exc)
+            return False
+        self._rules = rules
+        self._mtime = mtime
+        self.reloads += 1
+        logger.info("Reloaded %d rules from %s", len(rules.rules), self.path)
+        return True
+
+    def _compile(self) -> CompiledRules:
+        rules = CompiledRules.from_file(self.path, self.columns)
+        if isinstance(self.columns, dict):
+            rules.check(self.columns)
+        return rules
+
+    def stats(self) -> Dict[str, Any]:
+        return {"path": str(self.path), "reloads": self.reloads, "rejected": self.rejected, **self._rules.stats()}
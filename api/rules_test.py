@@ -0,0 +1,138 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from rules import CompiledRules, RuleSet
+
+PAYLOADS = [
+    {"Transaction_Amount": 60_000_000.0, "Transaction_Hour": 3, "Transaction_Location": "Russia"},
+    {"Transaction_Amount": 100.0, "Transaction_Hour": 5, "Transaction_Location": "India"},
+    {"Transaction_Amount": 100.0, "Transaction_Hour": 0, "Transaction_Location": "UAE"},
+]
+COLUMN_TYPES = {"Transaction_Amount": float, "Transaction_Hour": int, "Transaction_Location": str}
+
+
+def _rule(reason, boost, *conditions):
+    return {"reason": reason, "boost": boost, "when": list(conditions)}
+
+
+def test_rules_fire_in_declared_order_and_sum_boosts():
+    rules = CompiledRules.from_config(
+        {
+            "rules": [
+                _rule("High Amount", 0.35, {"column": "Transaction_Amount", "op": ">", "value": 50_000_000}),
+                _rule("Night", 0.25, {"column": "Transaction_Hour", "op": "between", "value": [0, 5]}),
+                _rule("Foreign", 0.25, {"column": "Transaction_Location", "op": "in", "value": ["Russia", "UAE"]}),
+            ]
+        }
+    )
+
+    boosts, reasons = rules.evaluate(PAYLOADS)
+
+    assert reasons == [["High Amount", "Night", "Foreign"], [], ["Night", "Foreign"]]
+    np.testing.assert_allclose(boosts, [0.85, 0.0, 0.5])
+
+
+def test_set_conditions_on_one_column_share_a_bitmask_lookup():
+    rules = CompiledRules.from_config(
+        {
+            "rules": [
+                _rule("Sanctioned", 0.5, {"column": "Transaction_Location", "op": "in", "value": ["Russia"]}),
+                _rule("Gulf", 0.1, {"column": "Transaction_Location", "op": "in", "value": ["UAE", "Russia"]}),
+                _rule("Abroad", 0.1, {"column": "Transaction_Location", "op": "not_in", "value": ["India"]}),
+            ]
+        }
+    )
+
+    assert rules.bitmasks == {"Transaction_Location": {"Russia": 0b011, "UAE": 0b010, "India": 0b100}}
+    assert rules.evaluate(PAYLOADS)[1] == [["Sanctioned", "Gulf", "Abroad"], [], ["Gulf", "Abroad"]]
+
+
+def test_conditions_are_anded_and_can_read_context_columns():
+    rules = CompiledRules.from_config(
+        {
+            "rules": [
+                _rule(
+                    "Night Burst",
+                    0.2,
+                    {"column": "Transaction_Hour", "op": "<", "value": 5},
+                    {"column": "user_tx_1h", "op": ">", "value": 8},
+                ),
+                _rule("New Device", 0.3, {"column": "new_device", "op": "==", "value": True}),
+            ]
+        },
+        columns=["Transaction_Hour", "user_tx_1h", "new_device"],
+    )
+
+    _, reasons = rules.evaluate(PAYLOADS, {"user_tx_1h": [9, 12, 2], "new_device": [False, True, False]})
+
+    assert reasons == [["Night Burst"], ["New Device"], []]
+    assert [rule["fired"] for rule in rules.stats()["rules"]] == [1, 1]
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        _rule("Typo", 0.1, {"column": "Transaction_Amout", "op": ">", "value": 1}),
+        _rule("Bad Op", 0.1, {"column": "Transaction_Hour", "op": "~", "value": 1}),
+        _rule("Bad Set", 0.1, {"column": "Transaction_Location", "op": "in", "value": "Russia"}),
+        {"reason": "No Boost", "when": [{"column": "Transaction_Hour", "op": ">", "value": 1}]},
+    ],
+)
+def test_invalid_rules_are_rejected_at_compile_time(rule):
+    with pytest.raises(ValueError):
+        CompiledRules.from_config({"rules": [rule]}, columns=list(PAYLOADS[0]))
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        _rule("Numeric Op On Text", 0.1, {"column": "Transaction_Location", "op": ">", "value": 1}),
+        _rule("Text Range", 0.1, {"column": "Transaction_Location", "op": "between", "value": [0, 1]}),
+        {"reason": "Not An Object", "boost": 0.1, "when": ["Transaction_Hour > 1"]},
+    ],
+)
+def test_operators_are_checked_against_column_types(rule):
+    with pytest.raises(ValueError):
+        CompiledRules.from_config({"rules": [rule]}, columns=COLUMN_TYPES)
+
+
+def test_rule_set_hot_reloads_and_keeps_last_good_rules(tmp_path):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [_rule("Night", 0.25, {"column": "Transaction_Hour", "op": "<", "value": 5})]}))
+    rule_set = RuleSet(path, reload_seconds=0)
+
+    path.write_text(json.dumps({"rules": [_rule("Late", 0.1, {"column": "Transaction_Hour", "op": ">=", "value": 5})]}))
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1_000_000))
+    assert rule_set.current().evaluate(PAYLOADS)[1] == [[], ["Late"], []]
+
+    path.write_text("{not json")
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 2_000_000))
+    assert rule_set.current().evaluate(PAYLOADS)[1] == [[], ["Late"], []]
+    assert rule_set.reloads == 1
+
+
+def test_rejected_edits_keep_the_old_rules_and_are_retried(tmp_path, monkeypatch):
+    path = tmp_path / "rules.json"
+    path.write_text(json.dumps({"rules": [_rule("Night", 0.25, {"column": "Transaction_Hour", "op": "<", "value": 5})]}))
+    rule_set = RuleSet(path, reload_seconds=0, columns=COLUMN_TYPES)
+
+    def write(*rules, mtime):
+        path.write_text(json.dumps({"rules": list(rules)}))
+        os.utime(path, ns=(0, mtime))
+
+    mtime = path.stat().st_mtime_ns + 1_000_000
+    write(_rule("Far", 0.1, {"column": "Transaction_Location", "op": ">", "value": 1}), mtime=mtime)
+    assert rule_set.current().evaluate(PAYLOADS)[1] == [["Night"], [], ["Night"]]
+
+    # A failure of any kind in the dry run also keeps the loaded rules instead of reaching the caller.
+    write(_rule("Late", 0.1, {"column": "Transaction_Hour", "op": ">=", "value": 5}), mtime=mtime + 1)
+    with monkeypatch.context() as patch:
+        patch.setattr(CompiledRules, "check", lambda self, types: 1 / 0)
+        assert rule_set.current().evaluate(PAYLOADS)[1] == [["Night"], [], ["Night"]]
+
+    # The rejected mtime is not remembered as loaded, so the same file is picked up once it compiles.
+    assert rule_set.current().evaluate(PAYLOADS)[1] == [[], ["Late"], []]
+    assert (rule_set.reloads, rule_set.rejected) == (1, 2)
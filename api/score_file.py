@@ -0,0 +1,360 @@
+"""
+Streaming bulk scorer for transaction files too large to push through ``/detect``.
+
+Reads a CSV or Parquet file in fixed-size chunks, scores each chunk with the
+same artifacts, rules and behavior columns as the API (vectorized features,
+one ``session.run`` per chunk) and appends the results to the output as it
+goes, so memory stays flat however large the input is:
+
+    python score_file.py ../Dataset/test_dataset_100_mixed.csv scored.csv
+    python score_file.py history.parquet scored.parquet --chunk-size 50000 --workers 8 --time-column Event_Time
+
+The output keeps ``--keep`` columns and adds ``Fraud_Probability``,
+``Final_Risk_Score``, ``isFraud_pred``, ``alert_triggered`` and
+``alert_reasons`` (``;``-separated). Parquet input/output needs ``pyarrow``.
+
+With ``--workers N`` the parent copies each chunk's model columns into a
+shared-memory slot and N forked workers build the features and run the
+model (see ``pool_scoring.py``); ``--pickle-chunks``, or a pipeline/sklearn
+preprocessor, ships whole chunks to the pool instead. New Device/Burst
+state and the rules always run in the parent in file order, so the worker
+count changes throughput but not results.
+
+New Device/Burst need to know when each row happened, so they are only
+computed with ``--time-column``, which names a column of event times
+(epoch seconds or date-time strings, in file order). Without it the
+behavior columns are zero and only the other rules apply.
+"""
+import argparse
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from behavior import ShardedBehaviorStore
+from features import FeatureBuilder, GraphFeeds
+from main import (
+    BEHAVIOR_COLUMNS,
+    BEHAVIOR_MAX_DEVICES,
+    BEHAVIOR_MAX_USERS,
+    BEHAVIOR_TTL_SECONDS,
+    MODEL_PATH,
+    PIPELINE_MODEL_PATH,
+    RULE_COLUMNS,
+    RULES_PATH,
+    VELOCITY_WINDOWS,
+    behavior_context,
+    combine_scores,
+    load_artifacts,
+    load_preprocessor,
+)
+from pool_scoring import SharedMemoryScorer
+from rules import CompiledRules
+
+# Loaded once per pool worker by _init_pickled_worker.
+_ARTIFACTS: Optional[tuple] = None
+
+
+def is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in (".parquet", ".pq")
+
+
+def read_chunks(path: Path, chunk_size: int) -> Iterator[pd.DataFrame]:
+    if is_parquet(path):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as exc:
+            raise SystemExit("Reading Parquet requires pyarrow: pip install pyarrow") from exc
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+class ChunkWriter:
+    """Appends scored chunks to a CSV or Parquet file without holding earlier chunks."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.rows = 0
+        self._handle: Any = None
+        self._parquet: Any = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if is_parquet(self.path):
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError as exc:
+                raise SystemExit("Writing Parquet requires pyarrow: pip install pyarrow") from exc
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self._parquet is None:
+                self._parquet = pq.ParquetWriter(self.path, table.schema)
+            self._parquet.write_table(table)
+        else:
+            if self._handle is None:
+                self._handle = open(self.path, "w", newline="", encoding="utf-8")
+            frame.to_csv(self._handle, header=self.rows == 0, index=False)
+        self.rows += len(frame)
+
+    def close(self) -> None:
+        if self._parquet is not None:
+            self._parquet.close()
+        if self._handle is not None:
+            self._handle.close()
+
+
+def chunk_probabilities(frame: pd.DataFrame, preprocessor: Any, session: Any, input_name: str) -> np.ndarray:
+    if isinstance(preprocessor, GraphFeeds):
+        feeds = preprocessor.feeds_columns(frame)
+    elif isinstance(preprocessor, FeatureBuilder):
+        feeds = {input_name: preprocessor.transform_columns(frame, len(frame))}
+    else:
+        features = preprocessor.transform(frame)
+        if hasattr(features, "toarray"):
+            features = features.toarray()
+        feeds = {input_name: np.asarray(features, dtype=np.float32)}
+    return np.asarray(session.run(None, feeds)[0], dtype=np.float64).reshape(-1)
+
+
+def _init_pickled_worker() -> None:
+    global _ARTIFACTS
+    _ARTIFACTS = load_artifacts()
+
+
+def _pickled_probabilities(frame: pd.DataFrame) -> np.ndarray:
+    return chunk_probabilities(frame, *_ARTIFACTS)
+
+
+class InProcessBackend:
+    max_in_flight = 1
+
+    def __init__(self) -> None:
+        self.artifacts = load_artifacts()
+
+    def start(self, frame: pd.DataFrame) -> Any:
+        return chunk_probabilities(frame, *self.artifacts)
+
+    def finish(self, handle: Any) -> np.ndarray:
+        return handle
+
+    def close(self) -> None:
+        pass
+
+
+class PickledPoolBackend:
+    """Ships whole chunks to a process pool; used when features cannot be built in the parent."""
+
+    def __init__(self, workers: int) -> None:
+        self.max_in_flight = workers * 2
+        self.pool = ProcessPoolExecutor(workers, initializer=_init_pickled_worker)
+
+    def start(self, frame: pd.DataFrame) -> Any:
+        return self.pool.submit(_pickled_probabilities, frame)
+
+    def finish(self, handle: Any) -> np.ndarray:
+        return handle.result()
+
+    def close(self) -> None:
+        self.pool.shutdown(cancel_futures=True)
+
+
+class SharedMemoryBackend:
+    """Copies raw columns into shared-memory slots; forked workers build the features and run the model."""
+
+    def __init__(self, builder: FeatureBuilder, workers: int, chunk_size: int) -> None:
+        self.scorer = SharedMemoryScorer(MODEL_PATH, builder, workers, chunk_size)
+        self.max_in_flight = self.scorer.n_slots
+
+    def start(self, frame: pd.DataFrame) -> Any:
+        slot = self.scorer.acquire()
+        self.scorer.write(slot, frame)
+        return slot, len(frame), self.scorer.submit(slot, len(frame))
+
+    def finish(self, handle: Any) -> np.ndarray:
+        slot, n_rows, future = handle
+        future.result()
+        probabilities = self.scorer.probabilities(slot, n_rows)
+        self.scorer.release(slot)
+        return probabilities
+
+    def close(self) -> None:
+        self.scorer.close()
+
+
+def create_backend(workers: int, chunk_size: int, shared: bool = True) -> Any:
+    if workers <= 0:
+        return InProcessBackend()
+    if shared and PIPELINE_MODEL_PATH is None:
+        preprocessor = load_preprocessor()
+        if isinstance(preprocessor, FeatureBuilder):
+            try:
+                return SharedMemoryBackend(preprocessor, workers, chunk_size)
+            except ValueError:
+                pass  # non-string categories: ship whole chunks instead
+    return PickledPoolBackend(workers)
+
+
+def scored_frame(
+    ids: pd.DataFrame, probabilities: np.ndarray, boosts: np.ndarray, reasons: List[List[str]]
+) -> pd.DataFrame:
+    predictions, final_scores, alerts = combine_scores(probabilities, boosts)
+    # Python's round, not ndarray.round, so values match the API response exactly.
+    ids["Fraud_Probability"] = [round(value, 4) for value in probabilities.tolist()]
+    ids["Final_Risk_Score"] = [round(value, 4) for value in final_scores.tolist()]
+    ids["isFraud_pred"] = predictions
+    ids["alert_triggered"] = alerts
+    ids["alert_reasons"] = [";".join(row) for row in reasons]
+    return ids
+
+
+def empty_context(n_rows: int) -> Dict[str, Any]:
+    context: Dict[str, Any] = {name: np.zeros(n_rows, dtype=np.int64) for name in BEHAVIOR_COLUMNS}
+    context["new_device"] = np.zeros(n_rows, dtype=bool)
+    return context
+
+
+def event_times(values: pd.Series) -> np.ndarray:
+    """Epoch seconds from a column of epoch seconds or date-time strings (naive times are taken as UTC)."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=np.float64)
+    stamps = pd.to_datetime(values, utc=True)
+    return (stamps - pd.Timestamp(0, tz="UTC")).dt.total_seconds().to_numpy()
+
+
+def replay_context(
+    store: ShardedBehaviorStore, user_ids: List[Any], device_ids: List[Any], times: np.ndarray
+) -> Dict[str, List[Any]]:
+    """``behavior_context`` for rows stamped with their own event times, one store call per run of equal times."""
+    context: Dict[str, List[Any]] = {name: [] for name in BEHAVIOR_COLUMNS}
+    start = 0
+    for end in range(1, len(user_ids) + 1):
+        if end < len(user_ids) and times[end] == times[start]:
+            continue
+        part = behavior_context(user_ids[start:end], device_ids[start:end], float(times[start]), store=store)
+        for name, values in part.items():
+            context[name].extend(values)
+        start = end
+    return context
+
+
+def score_stream(
+    chunks: Iterable[pd.DataFrame],
+    write: Callable[[pd.DataFrame], None],
+    backend: Any,
+    rules: CompiledRules,
+    store: Optional[ShardedBehaviorStore],
+    keep: Optional[List[str]] = None,
+    time_column: Optional[str] = None,
+    timings: Optional[Dict[str, float]] = None,
+) -> int:
+    """Score chunks in order; behavior and rules run here, model scoring on ``backend``.
+
+    With a ``store``, each row is counted at the event time in ``time_column``.
+    ``timings``, if given, accumulates the seconds this (parent) process spends
+    per stage: ``read``, ``behavior``, ``dispatch`` (``backend.start``: the column
+    copy for the shared-memory backend, everything for the in-process one),
+    ``rules``, ``wait`` (blocked on workers) and ``write``. Everything except
+    ``wait`` is serial, which bounds how far more workers can speed a run up.
+    """
+    if store is not None and time_column is None:
+        raise ValueError("Behavior state needs a time column to replay the rows at their event times")
+    pending: Deque[Tuple[Any, pd.DataFrame, np.ndarray, List[List[str]]]] = deque()
+    rows = 0
+    clock = [time.perf_counter()]
+
+    def lap(stage: str) -> None:
+        now = time.perf_counter()
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + now - clock[0]
+        clock[0] = now
+
+    def flush_oldest() -> None:
+        handle, ids, boosts, reasons = pending.popleft()
+        probabilities = backend.finish(handle)
+        lap("wait")
+        write(scored_frame(ids, probabilities, boosts, reasons))
+        lap("write")
+
+    for frame in chunks:
+        lap("read")
+        if keep is None:
+            keep = [column for column in ("Transaction_ID", "User_ID") if column in frame.columns]
+        if store is None:
+            context = empty_context(len(frame))
+        else:
+            context = replay_context(
+                store, frame["User_ID"].tolist(), frame["Device_ID"].tolist(), event_times(frame[time_column])
+            )
+        columns = {name: frame[name] for name in frame.columns}
+        columns.update(context)
+        lap("behavior")
+
+        handle = backend.start(frame)
+        lap("dispatch")
+        boosts, reasons = rules.evaluate_columns(columns, len(frame))
+        lap("rules")
+        pending.append((handle, frame[keep].reset_index(drop=True), boosts, reasons))
+        rows += len(frame)
+        while len(pending) >= backend.max_in_flight:
+            flush_oldest()
+    while pending:
+        flush_oldest()
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Score a large CSV/Parquet file in streaming chunks")
+    parser.add_argument("input", type=Path)
+    parser.add_argument("output", type=Path)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--workers", type=int, default=0, help="Score chunks in a process pool (0: in-process)")
+    parser.add_argument(
+        "--pickle-chunks", action="store_true", help="Send whole chunks to workers instead of shared-memory features"
+    )
+    parser.add_argument("--rules", type=Path, default=RULES_PATH)
+    parser.add_argument("--keep", nargs="*", help="Input columns copied to the output (default: ID columns present)")
+    parser.add_argument(
+        "--time-column",
+        help="Column of event times (epoch seconds or date-times, in file order); enables New Device/Burst",
+    )
+    args = parser.parse_args()
+
+    store = None
+    if args.time_column:
+        header = next(read_chunks(args.input, 1))
+        missing = [column for column in ("User_ID", "Device_ID", args.time_column) if column not in header]
+        if missing:
+            parser.error(f"{args.input} has no {', '.join(missing)} column, needed by --time-column")
+        store = ShardedBehaviorStore(
+            shards=1,
+            max_users=BEHAVIOR_MAX_USERS,
+            ttl_seconds=BEHAVIOR_TTL_SECONDS,
+            max_devices=BEHAVIOR_MAX_DEVICES,
+            windows=VELOCITY_WINDOWS,
+        )
+    rules = CompiledRules.from_file(args.rules, RULE_COLUMNS)
+
+    writer = ChunkWriter(args.output)
+    backend = create_backend(args.workers, args.chunk_size, shared=not args.pickle_chunks)
+    start = time.perf_counter()
+    try:
+        score_stream(
+            read_chunks(args.input, args.chunk_size), writer.write, backend, rules, store, args.keep, args.time_column
+        )
+    finally:
+        writer.close()
+        backend.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    rate = writer.rows / elapsed
+    print(f"Scored {writer.rows} rows into {args.output} in {elapsed:.2f}s ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
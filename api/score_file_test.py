@@ -0,0 +1,93 @@
+import sys
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+import score_file
+from main import evaluate_batch, load_artifacts
+
+API_DIR = Path(__file__).resolve().parent
+DATASET_DIR = API_DIR.parent / "Dataset"
+
+
+@pytest.fixture
+def transactions(tmp_path):
+    frame = pd.concat(
+        [pd.read_csv(DATASET_DIR / "test_dataset_100_mixed.csv"), pd.read_csv(DATASET_DIR / "adversarial_test_100.csv")],
+        ignore_index=True,
+    )
+    frame["User_ID"] = frame.index % 7
+    frame["Event_Time"] = 1_700_000_000.0  # one instant, as the API sees a batch
+    for column in ("Time_Since_Last_Transaction_min", "Transaction_Velocity"):
+        frame[column] = frame[column].round().astype(int)
+    path = tmp_path / "transactions.csv"
+    frame.to_csv(path, index=False)
+    return frame, path
+
+
+def run_cli(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["score_file.py", *map(str, args)])
+    score_file.main()
+
+
+@pytest.mark.parametrize("workers", [[], ["--workers", 2], ["--workers", 2, "--pickle-chunks"]])
+def test_streamed_scores_match_the_api(transactions, tmp_path, monkeypatch, workers):
+    frame, path = transactions
+    output = tmp_path / "scored.csv"
+    monkeypatch.setattr("main.BEHAVIOR_STORE", score_file.ShardedBehaviorStore(shards=1))
+    expected = evaluate_batch(frame.to_dict("records"), *load_artifacts())
+
+    run_cli(monkeypatch, path, output, "--chunk-size", 37, "--keep", "User_ID", "--time-column", "Event_Time", *workers)
+
+    scored = pd.read_csv(output, keep_default_na=False)
+    assert list(scored.columns) == ["User_ID"] + [
+        "Fraud_Probability",
+        "Final_Risk_Score",
+        "isFraud_pred",
+        "alert_triggered",
+        "alert_reasons",
+    ]
+    assert scored["Fraud_Probability"].tolist() == [row["Fraud_Probability"] for row in expected]
+    assert scored["Final_Risk_Score"].tolist() == [row["Final_Risk_Score"] for row in expected]
+    assert scored["alert_triggered"].tolist() == [row["alert_triggered"] for row in expected]
+    assert scored["alert_reasons"].tolist() == [";".join(row["alert_reasons"]) for row in expected]
+
+
+def test_behavior_needs_a_time_column(transactions, tmp_path, monkeypatch):
+    frame, _ = transactions
+    path = tmp_path / "no_users.csv"
+    frame.drop(columns=["User_ID"]).to_csv(path, index=False)
+
+    with pytest.raises(SystemExit):
+        run_cli(monkeypatch, path, tmp_path / "scored.csv", "--time-column", "Event_Time")
+
+    run_cli(monkeypatch, path, tmp_path / "scored.csv")
+    scored = pd.read_csv(tmp_path / "scored.csv", keep_default_na=False)
+    assert len(scored) == len(frame)
+    assert not scored["alert_reasons"].str.contains("New Device|Burst").any()
+
+
+def test_history_is_replayed_at_its_event_times(transactions, tmp_path, monkeypatch):
+    frame, path = transactions
+    frame = frame.assign(User_ID=1, Device_ID=5)
+    # One transaction every 10 minutes: never more than 6 in an hour, so Burst (more than 8 in 1h) must not fire.
+    frame["Event_Time"] = pd.to_datetime(1_700_000_000 + frame.index * 600, unit="s").astype(str)
+    frame.to_csv(path, index=False)
+
+    run_cli(monkeypatch, path, tmp_path / "spread.csv", "--time-column", "Event_Time")
+    frame.assign(Event_Time=frame["Event_Time"].iloc[0]).to_csv(path, index=False)
+    run_cli(monkeypatch, path, tmp_path / "same_instant.csv", "--time-column", "Event_Time")
+
+    spread = pd.read_csv(tmp_path / "spread.csv", keep_default_na=False)["alert_reasons"]
+    same_instant = pd.read_csv(tmp_path / "same_instant.csv", keep_default_na=False)["alert_reasons"]
+    assert spread.str.contains("New Device").sum() == 1
+    assert not spread.str.contains("Burst").any()
+    assert same_instant.str.contains("Burst").sum() == len(frame) - 8
+
+
+def test_cli_runs_from_another_directory(transactions, tmp_path, monkeypatch):
+    _, path = transactions
+    monkeypatch.chdir(tmp_path)
+    run_cli(monkeypatch, path, "scored.csv")
+    assert len(pd.read_csv(tmp_path / "scored.csv")) == 200
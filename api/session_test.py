@@ -0,0 +1,43 @@
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+import main
+
+pytest.importorskip("onnx")
+from onnx import TensorProto, helper, save  # noqa: E402
+
+API_DIR = Path(__file__).resolve().parent
+
+
+def plain_model(path):
+    graph = helper.make_graph(
+        [helper.make_node("ReduceSum", ["plain_features"], ["plain_score"], keepdims=0, axes=[1])],
+        "plain",
+        [helper.make_tensor_value_info("plain_features", TensorProto.FLOAT, [None, 4])],
+        [helper.make_tensor_value_info("plain_score", TensorProto.FLOAT, [None])],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 12)])
+    model.ir_version = 8
+    save(model, str(path))
+    return path
+
+
+def test_optimized_graphs_are_cached_per_source_model(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "ORT_OPTIMIZED_MODEL_PATH", tmp_path / "optimized" / "model.onnx")
+    (tmp_path / "optimized").mkdir()
+    model_a = Path(shutil.copy(API_DIR / "fraud_model.onnx", tmp_path / "a.onnx"))
+    model_b = plain_model(tmp_path / "b.onnx")
+    os.utime(model_b, ns=(1, 1))  # older than A's optimized graph, which used to be reused for it
+
+    main.create_session(model_a)
+    session_b = main.create_session(model_b)
+    reloaded_a = main.create_session(model_a)
+
+    assert [node.name for node in session_b.get_inputs()] == ["plain_features"]
+    assert reloaded_a.get_inputs()[0].name != "plain_features"
+    cached = sorted(path.name for path in (tmp_path / "optimized").iterdir())
+    assert len(cached) == 2 and not any(name.endswith(".tmp") for name in cached)
+    assert main.optimized_model_path(model_a).name in cached
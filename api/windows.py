@@ -0,0 +1,72 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+# label -> (window length in seconds, ring-buffer buckets)
+WINDOW_SPANS: Dict[str, Tuple[int, int]] = {
+    "1m": (60, 6),
+    "10m": (600, 10),
+    "1h": (3600, 12),
+}
+
+
+class SlidingWindows:
+    """Bucketed sliding-window counters kept in caller-owned arrays.
+
+    Each window is a ring of ``buckets`` counters, each covering
+    ``seconds / buckets`` of wall-clock time, plus a running total. Adding an
+    event clears only the buckets that slid out since the key was last
+    touched, so updates are O(1) amortized and every key costs a fixed
+    ``len(windows) * max_buckets`` counters. Counts cover the current bucket
+    and the ``buckets - 1`` before it, i.e. the trailing window at bucket
+    granularity.
+    """
+
+    def __init__(self, spans: Dict[str, Tuple[int, int]] = WINDOW_SPANS) -> None:
+        self.labels: List[str] = list(spans)
+        self.buckets: List[int] = [buckets for _, buckets in spans.values()]
+        self.widths: List[float] = [seconds / buckets for seconds, buckets in spans.values()]
+        self.seconds: List[int] = [seconds for seconds, _ in spans.values()]
+        self.max_buckets = max(self.buckets)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def bytes_per_key(self) -> int:
+        return len(self) * (self.max_buckets * 4 + 8 + 4)
+
+    def allocate(self, n_keys: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        return (
+            np.zeros((n_keys, len(self), self.max_buckets), dtype=np.int32),
+            np.zeros((n_keys, len(self)), dtype=np.int64),
+            np.zeros((n_keys, len(self)), dtype=np.int32),
+        )
+
+    def epochs(self, now: float) -> List[int]:
+        return [int(now // width) for width in self.widths]
+
+    def add(self, buckets: np.ndarray, heads: np.ndarray, totals: np.ndarray, now: float) -> List[int]:
+        """Count one event for a single key (``buckets[W, B]``, ``heads[W]``, ``totals[W]``, updated in place)."""
+        counts: List[int] = []
+        for window, epoch in enumerate(self.epochs(now)):
+            size = self.buckets[window]
+            ring = buckets[window]
+            head = int(heads[window])
+            total = int(totals[window])
+            if epoch > head:
+                if epoch - head >= size:
+                    ring[:size] = 0
+                    total = 0
+                else:
+                    for stale in range(head + 1, epoch + 1):
+                        total -= int(ring[stale % size])
+                        ring[stale % size] = 0
+                heads[window] = head = epoch
+            # Events stamped before the head (clock skew between workers) land in the newest bucket.
+            ring[head % size] += 1
+            totals[window] = total + 1
+            counts.append(total + 1)
+        return counts
+
+    def as_dicts(self, counts: Sequence[Sequence[int]]) -> List[Dict[str, int]]:
+        return [dict(zip(self.labels, row)) for row in counts]